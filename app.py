@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import os
 
 from ui.main_view import PDFToolboxApp
 from controller.pdf_controller import PDFController
+from model.server import SERVER_ENV
 
 def main():
-    controller = PDFController()
-    app = PDFToolboxApp(controller)
+    # Con PDF_TOOLBOX_SERVER (host:puerto o socket Unix) los lotes van al servidor local de trabajos
+    controller = PDFController(server=os.environ.get(SERVER_ENV))
+    # PDF_TOOLBOX_PREWARM=0: no adelantar la carga de PyMuPDF/pypdf/Pillow en segundo plano
+    app = PDFToolboxApp(controller, prewarm_libs=os.environ.get("PDF_TOOLBOX_PREWARM", "1") != "0")
     app.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Corpus sintético y reproducible para los benchmarks (misma semilla = mismos archivos).
+# Los archivos se generan una vez por tamaño y se reutilizan entre corridas.
+import io
+import os
+import random
+
+import pymupdf as fitz
+from PIL import Image, ImageDraw, ImageFilter
+
+from model.pdf_writer import ImagePageWriter, StreamingPDFWriter
+
+SEED = 1234
+# Páginas por documento (y archivos en "small") según el tamaño de la corrida
+SIZES = {
+    "s": {"text": 20, "images": 5, "scanned": 5, "small": 20, "huge": 200},
+    "m": {"text": 200, "images": 30, "scanned": 30, "small": 100, "huge": 2000},
+    "l": {"text": 1000, "images": 120, "scanned": 120, "small": 500, "huge": 10000},
+}
+KINDS = ("text", "images", "scanned", "small", "huge", "locked")
+PASSWORD = "bench"
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore".split()
+
+
+def _paragraph(rng, words=60) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def _text_page(doc, rng, index):
+    page = doc.new_page()
+    page.insert_text((72, 60), f"Página {index + 1}", fontsize=16, fontname="hebo")
+    page.insert_textbox(fitz.Rect(72, 90, 523, 770), "\n\n".join(_paragraph(rng) for _ in range(6)), fontsize=10, fontname="helv")
+    return page
+
+def _photo(rng, size=(1600, 1200)) -> bytes:
+    # Ruido suavizado: se comprime como una foto, no como un color plano
+    small = Image.frombytes("RGB", (size[0] // 16, size[1] // 16), rng.randbytes(size[0] // 16 * size[1] // 16 * 3))
+    img = small.resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+def _scan(rng, size=(1240, 1754)) -> bytes:
+    # Página "escaneada" a 150 DPI: líneas de texto negras sobre fondo casi blanco
+    img = Image.new("L", size, 250)
+    draw = ImageDraw.Draw(img)
+    for y in range(120, size[1] - 120, 28):
+        draw.text((100, y), _paragraph(rng, 16), fill=0)
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+def _build(kind: str, n: int, path: str, rng):
+    doc = fitz.open()
+    if kind in ("text", "locked"):
+        for i in range(n):
+            _text_page(doc, rng, i)
+    elif kind == "images":
+        for i in range(n):
+            page = doc.new_page()
+            page.insert_image(fitz.Rect(36, 36, 559, 428), stream=_photo(rng))
+            page.insert_image(fitz.Rect(36, 440, 559, 806), stream=_photo(rng, (1200, 900)))
+    elif kind == "scanned":
+        for i in range(n):
+            page = doc.new_page()
+            page.insert_image(page.rect, stream=_scan(rng))
+    elif kind == "huge":
+        # Un logo compartido por todas las páginas y texto propio en cada una
+        logo = _photo(rng, (400, 300))
+        for i in range(n):
+            page = _text_page(doc, rng, i)
+            page.insert_image(fitz.Rect(460, 20, 560, 95), stream=logo)
+    if kind == "locked":
+        doc.save(path, encryption=fitz.PDF_ENCRYPT_RC4_128, owner_pw=PASSWORD, user_pw=PASSWORD)
+    else:
+        doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+def corpus(root: str, size: str = "s") -> dict:
+    """Genera (si falta) el corpus del tamaño indicado y devuelve {tipo: ruta o lista de rutas}."""
+    counts = dict(SIZES[size], locked=SIZES[size]["text"])
+    base = os.path.join(root, size)
+    os.makedirs(base, exist_ok=True)
+    out = {}
+    for kind in KINDS:
+        if kind == "small":
+            paths = [os.path.join(base, "small", f"small_{i:04d}.pdf") for i in range(counts["small"])]
+            os.makedirs(os.path.dirname(paths[0]), exist_ok=True)
+            for i, path in enumerate(paths):
+                if not os.path.exists(path):
+                    _build("text", 1 + i % 3, path, random.Random(f"{SEED}-small-{size}-{i}"))
+            out[kind] = paths
+            continue
+        path = os.path.join(base, f"{kind}.pdf")
+        if not os.path.exists(path):
+            _build(kind, counts[kind], path, random.Random(f"{SEED}-{kind}-{size}"))
+        out[kind] = path
+    # Imágenes sueltas para images_to_pdf
+    img_dir = os.path.join(base, "jpg")
+    os.makedirs(img_dir, exist_ok=True)
+    out["jpg"] = []
+    for i in range(counts["images"]):
+        path = os.path.join(img_dir, f"foto_{i:04d}.jpg")
+        if not os.path.exists(path):
+            with open(path, "wb") as fp:
+                fp.write(_photo(random.Random(f"{SEED}-jpg-{size}-{i}"), (3000, 2000)))
+        out["jpg"].append(path)
+    return out
+
+def giant(root: str, mb: int) -> str:
+    """PDF de ~mb MB escrito por streaming (sirve para archivos más grandes que la RAM).
+
+    Cada página lleva una imagen gris sin comprimir de 4 MB con datos aleatorios.
+    """
+    path = os.path.join(root, f"giant_{mb}mb.pdf")
+    if os.path.exists(path):
+        return path
+    os.makedirs(root, exist_ok=True)
+    rng = random.Random(f"{SEED}-giant-{mb}")
+    side = 2048
+    entries = f"/Width {side} /Height {side} /ColorSpace /DeviceGray /BitsPerComponent 8"
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fp:
+        pages = ImagePageWriter(StreamingPDFWriter(fp))
+        for _ in range(max(1, mb // 4)):
+            pages.add_image_page(595, 842, entries, rng.randbytes(side * side))
+        pages.close()
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# Benchmarks de model/pdf_ops.py sobre el corpus sintético.
+#
+#   python -m benchmarks.run --sizes s m --out resultados.json
+#   python -m benchmarks.run --baseline benchmarks/baseline.json      # falla si hay regresiones
+#   python -m benchmarks.run --save-baseline benchmarks/baseline.json
+#
+# Cada caso corre en un subproceso aparte para medir su pico de memoria (RSS).
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from model import largefile, pdf_ops as ops
+from benchmarks.corpus import corpus, giant, PASSWORD
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Tolerancia relativa y margen absoluto (ruido en casos muy cortos) antes de marcar una regresión
+TOLERANCE = {"seconds": (0.25, 0.05), "peak_rss_mb": (0.20, 5.0), "output_bytes": (0.05, 0)}
+
+
+def _pages(path) -> int:
+    with ops.fitz.open(path) as doc:
+        return doc.page_count
+
+def _in_memory(fn, path: str, out: str, *args) -> int:
+    # Entrada y salida en memoria, como en un servicio; el resultado se escribe solo para medirlo
+    with open(path, "rb") as fp:
+        res = fn(fp.read(), None, *args)
+    with open(out, "wb") as fp:
+        fp.write(res["data"] if isinstance(res, dict) else res)
+    return _pages(path)
+
+def _out_bytes(path) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+# Arranque en frío en un intérprete limpio; falla si alguna biblioteca pesada se importó antes de usarla
+HEAVY = ("pymupdf", "fitz", "pypdf", "PIL.Image")
+STARTUP = {
+    "import": "import controller.pdf_controller",
+    # Hasta el primer dibujado; requiere pantalla (sin ella el caso queda como error y no se compara)
+    "window": ("from controller.pdf_controller import PDFController\n"
+               "from ui.main_view import PDFToolboxApp\n"
+               "app = PDFToolboxApp(PDFController(), prewarm_libs=False)\n"
+               "app.update()\n"
+               "app.destroy()"),
+}
+
+def _startup(kind: str) -> int:
+    code = STARTUP[kind] + f"\nimport sys\nsys.exit(sorted(m for m in {HEAVY!r} if m in sys.modules) or None)"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"arranque {kind}: " + ((proc.stderr.strip().splitlines() or ["?"])[-1]))
+    return 1
+
+# caso: (entrada del corpus, función(entrada, salida) -> páginas procesadas)
+CASES = {
+    "startup_import": ("startup", lambda c, out: _startup("import")),
+    "startup_window": ("startup", lambda c, out: _startup("window")),
+    "merge_small": ("small", lambda c, out: (ops.merge_pdfs(c, out), sum(map(_pages, c)))[1]),
+    "merge_huge": ("huge", lambda c, out: (ops.merge_pdfs([c, c], out), 2 * _pages(c))[1]),
+    "split_text": ("text", lambda c, out: len(ops.split_pdf(c, "1-", out))),
+    "split_huge_every": ("huge", lambda c, out: (ops.split_pdf_by(c, out, "pages", 50), _pages(c))[1]),
+    "rotate_huge": ("huge", lambda c, out: (ops.rotate_pdf(c, out, 90), _pages(c))[1]),
+    "rotate_incremental_huge": ("huge", lambda c, out: ops.rotate_pdf_incremental(c, out, "1-10:90")["pages"]),
+    "unlock_text": ("locked", lambda c, out: (ops.remove_password(c, out, PASSWORD), _pages(c))[1]),
+    "lossless_images": ("images", lambda c, out: (ops.compress_pdf_lossless(c, out), _pages(c))[1]),
+    "lossless_huge": ("huge", lambda c, out: (ops.compress_pdf_lossless(c, out), _pages(c))[1]),
+    "downsample_images": ("images", lambda c, out: (ops.compress_pdf_images(c, out, 100), _pages(c))[1]),
+    "raster_scanned": ("scanned", lambda c, out: (ops.compress_pdf_rasterize(c, out, 150), _pages(c))[1]),
+    "raster_text": ("text", lambda c, out: (ops.compress_pdf_rasterize(c, out, 100), _pages(c))[1]),
+    "to_png_text": ("text", lambda c, out: len(ops.pdf_to_images(c, out, 100, "png"))),
+    "to_jpg_images": ("images", lambda c, out: len(ops.pdf_to_images(c, out, 100, "jpg"))),
+    "to_zip_huge": ("huge", lambda c, out: ops.export_images(c, out, 100, container="zip")["pages"]),
+    "to_tiff_scanned": ("scanned", lambda c, out: ops.export_images(c, out, 100, container="tiff")["pages"]),
+    "memory_merge_huge": ("huge", lambda c, out: _in_memory(lambda d, o: ops.merge_pdfs([d, d], o), c, out) * 2),
+    "memory_lossless_images": ("images", lambda c, out: _in_memory(ops.compress_pdf_lossless, c, out)),
+    "memory_raster_text": ("text", lambda c, out: _in_memory(ops.compress_pdf_rasterize, c, out, 100)),
+    "from_jpg": ("jpg", lambda c, out: (ops.images_to_pdf(c, out), len(c))[1]),
+    # Modo de memoria acotada: con --giant-mb corren sobre un archivo de ese tamaño
+    "large_rotate": ("large", lambda c, out: largefile.rotate_pdf_large(c, out, 90, LARGE_MEMORY_MB)["pages"]),
+    "large_split": ("large", lambda c, out: largefile.split_pdf_large(c, "1-", out, memory_mb=LARGE_MEMORY_MB)["pages"]),
+    "large_merge": ("large", lambda c, out: largefile.merge_pdfs_large([c, c], out, LARGE_MEMORY_MB)["pages"]),
+}
+DIR_OUTPUT = {"split_text", "split_huge_every", "to_png_text", "to_jpg_images", "large_split"}
+LARGE_MEMORY_MB = 256
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    # ru_maxrss está en KiB en Linux y en bytes en macOS; RUSAGE_CHILDREN cubre los workers ya terminados
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        # En Linux ru_maxrss hereda el pico del proceso padre a través de exec; VmHWM no
+        with open("/proc/self/status") as fp:
+            own = next(int(l.split()[1]) for l in fp if l.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        pass
+    return round(max(own, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / unit, 1)
+
+def run_case(name: str, size: str, corpus_dir: str, giant_mb: int = 0) -> dict:
+    """Ejecuta un caso en este proceso (lo llama el subproceso)."""
+    kind, fn = CASES[name]
+    if kind == "startup":
+        entry = None
+    elif kind == "large":
+        entry = giant(corpus_dir, giant_mb) if giant_mb else corpus(corpus_dir, size)["huge"]
+    else:
+        entry = corpus(corpus_dir, size)[kind]
+    work = tempfile.mkdtemp(prefix="bench_")
+    out = os.path.join(work, "out" if name in DIR_OUTPUT else "out.pdf")
+    try:
+        start = time.perf_counter()
+        pages = fn(entry, out)
+        seconds = time.perf_counter() - start
+        return {"seconds": round(seconds, 4), "peak_rss_mb": _peak_rss_mb(),
+                "output_bytes": _out_bytes(out) if os.path.exists(out) else 0,
+                "pages": pages, "pages_per_s": round(pages / seconds, 1) if seconds else None}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+def _spawn(name: str, size: str, corpus_dir: str, giant_mb: int = 0) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks.run", "--case", name, "--sizes", size, "--corpus", corpus_dir,
+           "--giant-mb", str(giant_mb)]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["?"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def _versions() -> dict:
+    import pypdf, PIL
+    return {"python": platform.python_version(), "pymupdf": ops.fitz.VersionBind, "pypdf": pypdf.__version__,
+            "pillow": PIL.__version__, "cpus": ops.cpu_count(), "platform": platform.platform()}
+
+def compare(current: dict, baseline: dict) -> list:
+    """Lista de regresiones (métrica peor que la línea base más la tolerancia)."""
+    problems = []
+    for key, base in baseline.get("results", {}).items():
+        cur = current["results"].get(key)
+        if cur is None or "error" in base:
+            continue
+        if "error" in cur:
+            problems.append(f"{key}: falla ({cur['error']})")
+            continue
+        for metric, (tol, slack) in TOLERANCE.items():
+            b, c = base.get(metric), cur.get(metric)
+            if b and c is not None and c > b * (1 + tol) + slack:
+                problems.append(f"{key}: {metric} {b} → {c} (+{(c / b - 1):.0%})")
+    return problems
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description="Benchmarks de pdf_ops")
+    parser.add_argument("--sizes", nargs="+", default=["s"], choices=["s", "m", "l"])
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), help="solo estos casos")
+    parser.add_argument("--repeat", type=int, default=3, help="corridas por caso (se guarda la más rápida)")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "pdf_toolbox_corpus"))
+    parser.add_argument("--out", help="guardar resultados en JSON")
+    parser.add_argument("--baseline", help="comparar contra una línea base y fallar si hay regresiones")
+    parser.add_argument("--save-baseline", help="guardar los resultados como nueva línea base")
+    parser.add_argument("--giant-mb", type=int, default=0,
+                        help="tamaño del archivo para los casos large_* (p. ej. mayor que la RAM)")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.sizes[0], args.corpus, args.giant_mb)))
+        return 0
+
+    report = {"meta": _versions(), "results": {}}
+    for size in args.sizes:
+        corpus(args.corpus, size)  # genera una vez antes de medir
+        if args.giant_mb:
+            giant(args.corpus, args.giant_mb)
+        for name in args.only or CASES:
+            giant_mb = args.giant_mb if CASES[name][0] == "large" else 0
+            runs = [_spawn(name, size, args.corpus, giant_mb) for _ in range(max(1, args.repeat))]
+            ok = [r for r in runs if "error" not in r]
+            best = min(ok, key=lambda r: r["seconds"]) if ok else runs[0]
+            report["results"][f"{name}/{size}" + (f"/{giant_mb}mb" if giant_mb else "")] = best
+            print(f"{name}/{size}: " + (f"{best['seconds']:.3f}s {best['pages_per_s']} pág/s {best['peak_rss_mb']} MB "
+                                        f"{best['output_bytes']} B" if ok else best["error"]), file=sys.stderr)
+
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as fp:
+                json.dump(report, fp, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fp:
+            problems = compare(report, json.load(fp))
+        for p in problems:
+            print(f"REGRESIÓN {p}", file=sys.stderr)
+        return 1 if problems else 0
+    if not args.out and not args.save_baseline:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+# Cola de trabajos con prioridad y un número fijo de workers.
+# Cada trabajo corre en un hilo o, para código limitado por el GIL (pypdf),
+# en un proceso aparte que se puede terminar al cancelar.
+# Con track=True el objetivo recibe progress(hechas, total) y cancel (is_set()),
+# como las funciones de model/pdf_ops.py.
+import heapq
+import itertools
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from typing import Callable, List, Optional
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+_ids = itertools.count(1)
+CANCEL_GRACE = 5.0  # segundos que un proceso tiene para detenerse antes de terminarlo
+
+
+class JobCancelled(RuntimeError):
+    pass
+
+
+class Job:
+    """Trabajo encolado: estado, progreso, cancelación y resultado."""
+    def __init__(self, target, args=(), kwargs=None, name=None, priority=0, mode="thread",
+                 outputs=(), on_done=None, track=False):
+        self.id = next(_ids)
+        self.name = name or getattr(target, "__name__", "job")
+        self.target, self.args, self.kwargs = target, tuple(args), dict(kwargs or {})
+        self.priority = priority
+        self.mode = mode
+        self.outputs = [o for o in outputs if o]
+        self.on_done = on_done
+        self.track = track
+        self.on_progress = lambda job: None
+        self.status = PENDING
+        self.progress = 0.0
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.created = time.time()
+        self.started = self.finished = None
+        self.cancel_event = threading.Event()
+        self._done = threading.Event()
+        self._snapshot = {}
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.name} {self.status} {self.progress:.0%}>"
+
+    def report(self, done: int, total: int):
+        self.progress = min(1.0, done / total) if total else 0.0
+        self.on_progress(self)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    # ---- Salidas parciales ----
+    def _take_snapshot(self):
+        for out in self.outputs:
+            self._snapshot[out] = set(os.listdir(out)) if os.path.isdir(out) else os.path.exists(out)
+
+    def rollback(self):
+        # Borra solo lo que el trabajo creó: un archivo que ya existía se deja (si el
+        # trabajo falló antes de escribirlo, sigue siendo el del usuario)
+        for out, before in self._snapshot.items():
+            try:
+                if isinstance(before, set):
+                    for name in set(os.listdir(out)) - before:
+                        path = os.path.join(out, name)
+                        shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+                elif os.path.isdir(out) and not before:
+                    shutil.rmtree(out)
+                elif os.path.isfile(out) and not before:
+                    os.remove(out)
+            except OSError:
+                pass
+
+
+class _PipeProgress:
+    """progress() serializable: reenvía el avance del proceso hijo por el pipe."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __call__(self, done, total):
+        self.conn.send(("progress", done, total))
+
+
+def _process_entry(conn, target, args, kwargs, cancel=None):
+    if cancel is not None:
+        kwargs = dict(kwargs, progress=_PipeProgress(conn), cancel=cancel)
+    try:
+        conn.send(("ok", target(*args, **kwargs)))
+    except BaseException as e:
+        conn.send(("error", e))
+    finally:
+        conn.close()
+
+
+class JobScheduler:
+    """Ejecuta trabajos por prioridad (mayor primero) con un límite de concurrencia."""
+    def __init__(self, max_workers: int = 2, on_update: Optional[Callable[[Job], None]] = None):
+        self.max_workers = max(1, int(max_workers))
+        self.on_update = on_update or (lambda job: None)
+        self._heap = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running: List[Job] = []
+        self._closed = False
+        self._mp = multiprocessing.get_context("spawn")
+
+    # ---- API ----
+    def submit(self, target, *args, **opts) -> Job:
+        job = Job(target, args, **opts)
+        job.on_progress = self.on_update
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("El planificador está cerrado")
+            heapq.heappush(self._heap, (-job.priority, next(self._seq), job))
+            if len(self._threads) < self.max_workers:
+                t = threading.Thread(target=self._worker, daemon=True)
+                self._threads.append(t)
+                t.start()
+            self._cv.notify()
+        self.on_update(job)
+        return job
+
+    def jobs(self) -> List[Job]:
+        with self._cv:
+            return list(self._running) + [j for _, _, j in sorted(self._heap)]
+
+    def busy(self) -> bool:
+        with self._cv:
+            return bool(self._running or self._heap)
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None):
+        """Cierra la cola: cancela lo pendiente y espera (o cancela) lo que está corriendo."""
+        with self._cv:
+            self._closed = True
+            pending = [j for _, _, j in self._heap]
+            self._heap.clear()
+            running = list(self._running)
+            self._cv.notify_all()
+        for job in pending:
+            self._finish(job, CANCELLED)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in running:
+            if not wait:
+                job.cancel()
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job.wait(left):
+                job.cancel()
+                job.wait(1.0)
+
+    # ---- Internos ----
+    def _worker(self):
+        while True:
+            with self._cv:
+                while not self._heap and not self._closed:
+                    self._cv.wait()
+                if not self._heap:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                cancelled = job.cancel_event.is_set()
+                if not cancelled:
+                    self._running.append(job)
+            if cancelled:
+                self._finish(job, CANCELLED)
+                continue
+            try:
+                self._run(job)
+            finally:
+                with self._cv:
+                    self._running.remove(job)
+
+    def _run(self, job: Job):
+        job.status, job.started = RUNNING, time.time()
+        job._take_snapshot()
+        self.on_update(job)
+        status = FAILED
+        try:
+            if job.mode == "process":
+                result = self._run_in_process(job)
+            else:
+                kwargs = job.kwargs
+                if job.track:
+                    kwargs = dict(kwargs, progress=job.report, cancel=job.cancel_event)
+                result = job.target(*job.args, **kwargs)
+            if job.cancel_event.is_set():
+                raise JobCancelled("Cancelado")
+            job.result, job.progress, status = result, 1.0, DONE
+        except Exception as e:
+            # Cualquier error tras pedir la cancelación (p. ej. OperationCancelled) cuenta como cancelado
+            job.error = e
+            status = CANCELLED if job.cancel_event.is_set() else FAILED
+        if status != DONE:
+            job.rollback()
+        self._finish(job, status)
+
+    def _run_in_process(self, job: Job):
+        parent, child = self._mp.Pipe(duplex=False)
+        cancel = self._mp.Event() if job.track else None
+        proc = self._mp.Process(target=_process_entry, args=(child, job.target, job.args, job.kwargs, cancel), daemon=True)
+        proc.start()
+        child.close()
+        cancel_deadline = None
+        try:
+            while True:
+                if parent.poll(0.1):
+                    msg = parent.recv()
+                    if msg[0] == "progress":
+                        job.report(msg[1], msg[2])
+                        continue
+                    status, value = msg
+                    break
+                if job.cancel_event.is_set():
+                    # Primero cancelación cooperativa; si no responde, se termina el proceso
+                    if cancel is not None and cancel_deadline is None:
+                        cancel.set()
+                        cancel_deadline = time.monotonic() + CANCEL_GRACE
+                    elif cancel_deadline is None or time.monotonic() > cancel_deadline:
+                        proc.terminate()
+                        raise JobCancelled("Cancelado")
+                if not proc.is_alive() and not parent.poll(0):
+                    raise RuntimeError(f"El proceso terminó inesperadamente (código {proc.exitcode})")
+        finally:
+            proc.join(1.0)
+            parent.close()
+        if status == "error":
+            raise value
+        return value
+
+    def _finish(self, job: Job, status: str):
+        job.status, job.finished = status, time.time()
+        try:
+            self.on_update(job)
+            if job.on_done:
+                job.on_done(job)
+        finally:
+            job._done.set()
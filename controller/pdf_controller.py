@@ -1,36 +1,112 @@
 # -*- coding: utf-8 -*-
+import functools
 import os
 import threading
-from tkinter import filedialog, messagebox
 from model import pdf_ops as ops
+from model import batch, largefile, pipeline, telemetry
+from model.result_cache import ResultCache, cached_call
+from model.server import ServerClient
+from model.thumbnails import ThumbnailCache
+from controller.job_queue import JobScheduler, FAILED, CANCELLED
+
+# tkinter es opcional: el controlador también se importa en servidores sin GUI
+try:
+    from tkinter import filedialog
+except Exception:
+    filedialog = None
 
 APP_NAME = "PDF Toolbox"
+# pypdf es Python puro (limitado por el GIL): esas operaciones van en un proceso aparte.
+# PyMuPDF y Pillow trabajan en código nativo y corren en hilos.
+PROCESS_OPS = {"rotate_pdf", "remove_password", "rotate_pdf_large", "split_pdf_large", "merge_pdfs_large",
+               "remove_password_large"}
+# A partir de este tamaño de entrada se usa el modo de memoria acotada (model/largefile.py)
+LARGE_FILE_BYTES = 1024 ** 3
+
+def _input_paths(args, outputs=()):
+    """Archivos existentes entre los argumentos (rutas sueltas o listas de rutas) que no son salidas."""
+    found = []
+    for a in args:
+        for p in (a if isinstance(a, (list, tuple)) else [a]):
+            if isinstance(p, str) and p not in outputs and os.path.isfile(p):
+                found.append(p)
+    return found
+
+def _is_large(paths):
+    return sum(os.path.getsize(p) for p in paths if os.path.isfile(p)) >= LARGE_FILE_BYTES
 
 class PDFController:
     """Orquesta llamadas del UI hacia el modelo y maneja diálogos."""
-    def __init__(self, logger=None, error_handler=None, on_success_action=None):
+    def __init__(self, logger=None, error_handler=None, on_success_action=None, max_jobs=2, server=None):
         self.log = logger or (lambda msg: None)
         self.error_handler = error_handler or (lambda title, msg: print(f"{title}: {msg}"))
         self.on_success_action = on_success_action or (lambda path: None)
+        self.on_job_update = lambda job: None
+        self.jobs = JobScheduler(max_workers=max_jobs, on_update=lambda job: self.on_job_update(job))
+        self.thumbs = ThumbnailCache()
+        self.results = ResultCache()
+        self.profile = False  # cProfile por trabajo (panel Rendimiento)
+        # Servidor local de trabajos (model/server.py): los lotes se ejecutan en su pool ya caliente
+        self.server = ServerClient(server) if server else None
+        threading.Thread(target=self.thumbs.prune_disk, daemon=True).start()
 
-    def _run_async(self, target, *args, success_msg=None, callback=None):
-        def wrapper():
+    def _run_async(self, target, *args, success_msg=None, callback=None, on_result=None, outputs=(), priority=0):
+        def on_done(job):
+            if job.status == CANCELLED:
+                self.log(f"Cancelado: {job.name}")
+                return
+            if job.status == FAILED:
+                self.error_handler("Error", str(job.error))
+                return
             try:
-                result = target(*args)
+                if on_result:
+                    on_result(job.result)
                 if success_msg:
                     # Si el mensaje depende del resultado (ej. ruta de salida)
-                    msg = success_msg
+                    msg = success_msg(job.result) if callable(success_msg) else success_msg
                     if "{}" in msg or "{out}" in msg:
-                        msg = msg.format(out=result)
+                        msg = msg.format(out=job.result)
                     self.log(msg)
                 
                 if callback:
                     callback()
             except Exception as e:
                 self.error_handler("Error", str(e))
-        
-        t = threading.Thread(target=wrapper, daemon=True)
-        t.start()
+
+        # Las llamadas con caché (partial) no se serializan: siempre en hilo
+        process = getattr(target, "__name__", "") in PROCESS_OPS and not isinstance(target, functools.partial)
+        mode = "process" if process else "thread"
+        # Tiempos, bytes y memoria del trabajo al log de telemetría (en el proceso que lo ejecuta)
+        target = telemetry.Instrumented(target, inputs=_input_paths(args, outputs), outputs=outputs, profile=self.profile)
+        return self.jobs.submit(target, *args, mode=mode, outputs=outputs, priority=priority, on_done=on_done, track=True)
+
+    def _cached(self, op, inputs, output, params, fn):
+        """fn detrás de la caché de resultados; se llama con los mismos argumentos."""
+        call = functools.partial(cached_call, self.results, op, list(inputs), output, params, fn,
+                                 on_hit=lambda: self.log("Resultado reutilizado de la caché"))
+        call.__name__ = fn.__name__  # nombre del trabajo en la cola y en la telemetría
+        return call
+
+    def last_jobs(self, n=20):
+        """Registros de telemetría más recientes."""
+        return telemetry.last_jobs(n)
+
+    def cancel_all(self):
+        for job in self.jobs.jobs():
+            job.cancel()
+
+    def shutdown(self, wait=True, timeout=None):
+        """Termina los trabajos en curso (o los cancela y descarta salidas parciales)."""
+        self.jobs.shutdown(wait=wait, timeout=timeout)
+        self.thumbs.close()
+
+    # ---------- Archivos ----------
+    def collect_pdfs(self, paths):
+        """Rutas soltadas (archivos o carpetas) → PDFs."""
+        return batch.collect_inputs(paths)
+
+    def pdf_info(self, path):
+        return ops.pdf_info(path)
 
     # ---------- Fusionar ----------
     def merge_pdfs(self, paths):
@@ -46,31 +122,53 @@ class PDFController:
             return
         
         self.log("Iniciando fusión...")
+        large = _is_large(paths)
+        if large:
+            self.log("Archivos grandes: modo de memoria acotada")
         self._run_async(
-            ops.merge_pdfs, paths, out, 
+            largefile.merge_pdfs_large if large else ops.merge_pdfs, paths, out, 
             success_msg=f"Fusionado correctamente → {out}",
+            outputs=[out],
             callback=lambda: self.on_success_action(out)
         )
 
     # ---------- Dividir ----------
-    def split_pdf(self, src_path, ranges, merge=False):
+    def split_pdf(self, src_path, ranges, merge=False, mode="range", value=None):
+        """mode: range (rangos), pages (cada N páginas), bookmarks (por marcadores) o size (MB máximos)."""
         if not src_path or not os.path.isfile(src_path):
             self.error_handler(APP_NAME, "Selecciona un PDF válido")
             return
+        try:
+            value = float(value) if value not in (None, "") else None
+        except ValueError:
+            self.error_handler(APP_NAME, "Valor inválido para el modo de división")
+            return
         out_dir = filedialog.askdirectory(title="Elige carpeta de salida")
         if not out_dir:
             return
         
         self.log("Iniciando división...")
+        if mode == "range" and _is_large([src_path]):
+            self.log("Archivo grande: modo de memoria acotada")
+            target, args = largefile.split_pdf_large, (src_path, ranges, out_dir, merge)
+        elif mode == "range":
+            target, args = ops.split_pdf, (src_path, ranges, out_dir, merge)
+        elif mode == "pages":
+            target, args = ops.split_pdf_by, (src_path, out_dir, "pages", int(value or 1))
+        elif mode == "bookmarks":
+            target, args = ops.split_pdf_by, (src_path, out_dir, "bookmarks", 1, int(value or 1))
+        else:
+            target, args = ops.split_pdf_by, (src_path, out_dir, "size", 1, 1, int((value or 10) * 1024 * 1024))
         self._run_async(
-            ops.split_pdf, src_path, ranges, out_dir, merge, 
-            success_msg=f"Dividido correctamente en {out_dir}",
+            target, *args,
+            success_msg=lambda r: f"Dividido correctamente en {len(r['outputs'] if isinstance(r, dict) else r)} archivos → {out_dir}",
+            outputs=[out_dir],
             callback=lambda: self.on_success_action(out_dir)
         )
         
 
     # ---------- Comprimir ----------
-    def compress_pdf(self, src_path, method="lossless", dpi=150):
+    def compress_pdf(self, src_path, method="lossless", dpi=150, codec="auto"):
         if not src_path or not os.path.isfile(src_path):
             self.error_handler(APP_NAME, "Selecciona un PDF válido")
             return
@@ -85,33 +183,55 @@ class PDFController:
         self.log("Iniciando compresión (esto puede tardar)...")
         if method == "lossless":
             self._run_async(
-                ops.compress_pdf_lossless, src_path, out, 
+                self._cached("compress_lossless", [src_path], out, {}, ops.compress_pdf_lossless), src_path, out, 
                 success_msg=f"Comprimido → {out}",
+                outputs=[out],
+                callback=lambda: self.on_success_action(out)
+            )
+        elif method == "images":
+            dpi = max(72, int(dpi))
+            self._run_async(
+                self._cached("compress_images", [src_path], out, {"dpi": dpi}, ops.compress_pdf_images), src_path, out, dpi,
+                success_msg=lambda r: f"Comprimido ({r['downsampled']} de {r['images']} imágenes reducidas) → {out}",
+                outputs=[out],
                 callback=lambda: self.on_success_action(out)
             )
         else:
             dpi = max(72, int(dpi))
             self._run_async(
-                ops.compress_pdf_rasterize, src_path, out, dpi, 
-                success_msg=f"Comprimido (Raster) → {out}",
+                self._cached("compress_raster", [src_path], out, {"dpi": dpi, "codec": codec}, ops.compress_pdf_rasterize),
+                src_path, out, dpi, codec,
+                success_msg=lambda r: (f"Rasterizar no reduce el tamaño: se conservó el original → {out}"
+                                       if r.get("kept_original") else
+                                       f"Comprimido (Raster) → {out} ({r['output_bytes'] // 1024} KB, {r['ratio']:.0%} del original)"),
+                outputs=[out],
                 callback=lambda: self.on_success_action(out)
             )
 
     # ---------- PDF → Imágenes ----------
-    def pdf_to_images(self, src_path, dpi=150):
+    def pdf_to_images(self, src_path, dpi=150, fmt="png", container="files"):
+        """container: files (carpeta), zip o tiff (un solo archivo)."""
         if not src_path or not os.path.isfile(src_path):
             self.error_handler(APP_NAME, "Selecciona un PDF válido")
             return
-        out_dir = filedialog.askdirectory(title="Elige carpeta de salida")
-        if not out_dir:
+        if container == "files":
+            out = filedialog.askdirectory(title="Elige carpeta de salida")
+        else:
+            ext = ".zip" if container == "zip" else ".tif"
+            out = filedialog.asksaveasfilename(defaultextension=ext, filetypes=[(container.upper(), "*" + ext)],
+                                               title="Guardar imágenes")
+        if not out:
             return
         
         self.log("Exportando páginas a imágenes...")
         dpi = max(72, int(dpi))
+        params = {"dpi": dpi, "fmt": fmt, "container": container}
         self._run_async(
-            ops.pdf_to_images, src_path, out_dir, dpi, "png", 
-            success_msg=f"Imágenes guardadas en {out_dir}",
-            callback=lambda: self.on_success_action(out_dir)
+            self._cached("pdf_to_images", [src_path], out, params, ops.export_images),
+            src_path, out, dpi, fmt, container,
+            success_msg=f"Imágenes guardadas en {out}",
+            outputs=[out],
+            callback=lambda: self.on_success_action(out)
         )
 
     # ---------- Imágenes → PDF ----------
@@ -129,13 +249,14 @@ class PDFController:
         
         self.log("Creando PDF de imágenes...")
         self._run_async(
-            ops.images_to_pdf, paths, out, 
+            self._cached("images_to_pdf", paths, out, {}, ops.images_to_pdf), paths, out, 
             success_msg=f"PDF Creado → {out}",
+            outputs=[out],
             callback=lambda: self.on_success_action(out)
         )
 
     # ---------- Rotar ----------
-    def rotate_pdf(self, src_path, angle):
+    def rotate_pdf(self, src_path, angle, pages="1-"):
         if not src_path or not os.path.isfile(src_path):
             self.error_handler(APP_NAME, "Selecciona un PDF válido")
             return
@@ -148,9 +269,17 @@ class PDFController:
             return
 
         self.log(f"Rotando {angle} grados...")
+        spec = f"{pages or '1-'}:{int(angle)}"
+        # Por defecto se agrega una revisión incremental; los cifrados se reescriben
+        if not ops.pdf_info(src_path)["encrypted"]:
+            target = ops.rotate_pdf_incremental
+        else:
+            target = largefile.rotate_pdf_large if _is_large([src_path]) else ops.rotate_pdf
         self._run_async(
-            ops.rotate_pdf, src_path, out, int(angle), 
+            target, src_path, out, spec, 
             success_msg=f"Rotado correctamente → {out}",
+            # Sobre el mismo archivo la revisión se agrega en su lugar: nunca borrarlo al deshacer
+            outputs=[out] if os.path.abspath(out) != os.path.abspath(src_path) else [],
             callback=lambda: self.on_success_action(out)
         )
 
@@ -167,12 +296,92 @@ class PDFController:
         if not out:
             return
 
-        def task():
-            success = ops.remove_password(src_path, out, password)
+        def done(success):
             if success:
                 self.log(f"Contraseña removida → {out}")
                 self.on_success_action(out)
             else:
                 self.error_handler(APP_NAME, "Contraseña incorrecta o error al desencriptar")
 
-        threading.Thread(target=task, daemon=True).start()
+        # En modo grande una contraseña incorrecta llega como error del trabajo
+        target = largefile.remove_password_large if _is_large([src_path]) else ops.remove_password
+        self._run_async(target, src_path, out, password, on_result=done, outputs=[out])
+
+    def unlock_batch(self, source=None):
+        """Desbloquea una carpeta de PDFs probando una lista de contraseñas candidatas."""
+        source = source or filedialog.askdirectory(title="Carpeta con PDFs protegidos")
+        if not source:
+            return
+        pw_file = filedialog.askopenfilename(title="Lista de contraseñas (una por línea)",
+                                             filetypes=[("Texto", "*.txt"), ("Todos", "*.*")])
+        if not pw_file:
+            return
+        try:
+            passwords = batch.read_passwords(pw_file)
+        except (OSError, UnicodeDecodeError) as e:
+            self.error_handler(APP_NAME, f"No se pudo leer la lista de contraseñas: {e}")
+            return
+        if not passwords:
+            self.error_handler(APP_NAME, "La lista de contraseñas está vacía")
+            return
+        self.batch(source, "unlock", {"passwords": passwords})
+
+    # ---------- Recetas ----------
+    def describe_recipe(self, recipe_path):
+        """Etapas de la receta (una línea cada una) o None si no es válida."""
+        try:
+            return pipeline.describe(recipe_path)
+        except (OSError, ValueError, RuntimeError) as e:
+            self.error_handler(APP_NAME, f"Receta inválida: {e}")
+            return None
+
+    def run_pipeline(self, src_path, recipe_path):
+        """Aplica una receta (model/pipeline.py) a un PDF: todas las etapas en memoria, un solo guardado."""
+        if not src_path or not os.path.isfile(src_path):
+            self.error_handler(APP_NAME, "Selecciona un PDF válido")
+            return
+        if self.describe_recipe(recipe_path) is None:
+            return
+        out = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF", "*.pdf")],
+            title="Guardar PDF procesado"
+        )
+        if not out:
+            return
+
+        self.log("Aplicando receta...")
+        self._run_async(
+            pipeline.run_pipeline, src_path, out, recipe_path,
+            success_msg=lambda r: ("Receta aplicada (" + " · ".join(f"{s['op']} {s['seconds']:.2f}s" for s in r["stages"])
+                                   + f") → {out}"),
+            outputs=[out] if os.path.abspath(out) != os.path.abspath(src_path) else [],
+            callback=lambda: self.on_success_action(out)
+        )
+
+    def pipeline_batch(self, source, recipe_path):
+        """La misma receta sobre cada PDF de un lote."""
+        if self.describe_recipe(recipe_path) is None:
+            return
+        self.batch(source, "pipeline", {"recipe": os.path.abspath(recipe_path)})
+
+    # ---------- Lote ----------
+    def batch(self, source, op, params=None):
+        inputs = batch.collect_inputs(source)
+        if not inputs:
+            self.error_handler(APP_NAME, "No se encontraron PDFs para el lote")
+            return
+        out_dir = filedialog.askdirectory(title="Elige carpeta de salida del lote")
+        if not out_dir:
+            return
+
+        self.log(f"Procesando lote de {len(inputs)} archivos..." + (" (servidor local)" if self.server else ""))
+        run = functools.partial(batch.run_batch, server=self.server)
+        run.__name__ = "run_batch"
+        # Sin rollback: los archivos ya terminados de un lote cancelado son válidos
+        self._run_async(
+            run, op, inputs, out_dir, params or {},
+            success_msg=lambda s: (f"Lote: {s['ok']} correctos, {s['failed']} con error · "
+                                   f"{s['files_per_s']} archivos/s, {s['mb_per_s']} MB/s"),
+            callback=lambda: self.on_success_action(os.path.join(out_dir, batch.REPORT_NAME))
+        )
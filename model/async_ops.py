@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# Fachada asyncio de pdf_ops para servicios web: el trabajo de CPU corre en
+# executors (hilos; procesos para lo que es pypdf puro) y toda la E/S de
+# archivos también, así que el event loop nunca se bloquea. Cada grupo de
+# operaciones tiene su semáforo (rasterizar usa mucha memoria por página).
+#
+# Entradas: ruta, bytes/bytearray/memoryview, archivo (read) o flujo asíncrono
+# (await read(), p. ej. asyncio.StreamReader). Salidas: ruta, archivo, flujo
+# asíncrono (write + drain, o await write) o None para recibir los bytes. Los
+# buffers pasan tal cual a pdf_ops (sin archivos temporales); solo los flujos
+# asíncronos se leen/escriben en el loop.
+#
+#   ops = AsyncPDFOps()
+#   data = (await ops.compress_pdf_rasterize(await request.body(), dpi=120))["data"]
+#   await ops.merge_pdfs([cover_bytes, "/datos/a.pdf"], writer)
+import asyncio
+import functools
+import inspect
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+
+from model import pdf_ops as ops
+from model.pdf_ops import Progress, cpu_count
+
+CHUNK = 1024 * 1024
+IO_THREADS = 4  # E/S de archivos: aparte, para no esperar detrás de las operaciones
+# Trabajos simultáneos por grupo; el resto espera su turno sin ocupar hilos
+LIMITS = {"raster": 2, "images": 2, "default": max(2, cpu_count())}
+GROUPS = {
+    "compress_pdf_rasterize": "raster",
+    "export_images": "raster",
+    "compress_pdf_images": "images",
+    "images_to_pdf": "images",
+}
+# pypdf es Python puro (limitado por el GIL): en procesos, como en el controlador.
+# Ahí no hay progreso ni cancelación a mitad de la operación.
+PROCESS_OPS = {"rotate_pdf", "remove_password"}
+
+
+def _is_path(x) -> bool:
+    return isinstance(x, (str, os.PathLike))
+
+def _is_async_writer(output) -> bool:
+    write = getattr(output, "write", None)
+    return inspect.iscoroutinefunction(write) or hasattr(output, "drain")
+
+def _read_all(fp) -> bytes:
+    return fp.read()
+
+def _write_all(fp, data):
+    fp.write(data)
+
+def _take_data(value):
+    """Separa los bytes producidos (output=None) del resto del resultado de pdf_ops."""
+    if isinstance(value, dict) and "data" in value:
+        return value.pop("data"), value
+    if isinstance(value, (bytes, bytearray)):
+        return value, None
+    return None, value
+
+
+class AsyncPDFOps:
+    """Operaciones de pdf_ops como corrutinas.
+
+    executor: hilos para PyMuPDF/Pillow (por defecto, uno propio); processes: pool para
+    las operaciones de pypdf (None = se crea al primer uso; False = también en hilos).
+    limits: trabajos simultáneos por grupo ("raster", "images", "default").
+    """
+    def __init__(self, executor: Optional[Executor] = None, processes=None, limits: Optional[dict] = None):
+        self.limits = dict(LIMITS, **(limits or {}))
+        self.executor = executor or ThreadPoolExecutor(max_workers=sum(self.limits.values()),
+                                                       thread_name_prefix="pdf_ops")
+        self._own_executor = executor is None
+        self._processes, self._own_processes = processes, processes is None
+        self._io_pool = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="pdf_io")
+        self._sems = {name: asyncio.Semaphore(n) for name, n in self.limits.items()}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        pools = [self._io_pool] + ([self.executor] if self._own_executor else [])
+        if self._own_processes and self._processes:
+            pools.append(self._processes)
+        for pool in pools:
+            await loop.run_in_executor(None, functools.partial(pool.shutdown, wait=True))
+
+    def _process_pool(self):
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=max(1, cpu_count() // 2))
+        return self._processes or None
+
+    # ---------- E/S sin bloquear el loop ----------
+    async def _io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._io_pool, fn, *args)
+
+    async def _source(self, src, process: bool = False):
+        """Entrada para pdf_ops: rutas y buffers tal cual; los flujos asíncronos se leen aquí.
+
+        Hacia otro proceso solo viajan rutas o bytes (ni vistas ni archivos abiertos).
+        """
+        if _is_path(src):
+            return src
+        if isinstance(src, (bytes, bytearray, memoryview)):
+            return bytes(src) if process and not isinstance(src, bytes) else src
+        if inspect.iscoroutinefunction(getattr(src, "read", None)):
+            buf = bytearray()
+            while True:
+                chunk = await src.read(CHUNK)
+                if not chunk:
+                    break
+                buf += chunk
+            return bytes(buf) if process else buf
+        if hasattr(src, "read"):
+            return await self._io(_read_all, src) if process else src
+        raise TypeError(f"Entrada no soportada: {type(src).__name__}")
+
+    async def _deliver(self, data, output):
+        """Escribe en output los bytes de una salida en memoria."""
+        write = output.write
+        if not _is_async_writer(output):
+            return await self._io(_write_all, output, data)
+        view = memoryview(data)
+        for i in range(0, len(view), CHUNK):
+            if inspect.iscoroutinefunction(write):
+                await write(view[i:i + CHUNK])
+            else:
+                write(view[i:i + CHUNK])
+                await output.drain()
+
+    # ---------- Ejecución ----------
+    async def _call(self, name: str, *args, progress: Progress = None, **kwargs):
+        fn = getattr(ops, name)
+        loop = asyncio.get_running_loop()
+        pool = self._process_pool() if name in PROCESS_OPS else None
+        cancel = threading.Event()
+        if pool is None:
+            kwargs["cancel"] = cancel
+            if progress:
+                kwargs["progress"] = lambda done, total: loop.call_soon_threadsafe(progress, done, total)
+        async with self._sems[GROUPS.get(name, "default")]:
+            fut = loop.run_in_executor(pool or self.executor, functools.partial(fn, *args, **kwargs))
+            try:
+                return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                # El semáforo se libera cuando la operación de verdad se detiene (memoria)
+                cancel.set()
+                try:
+                    await fut
+                except BaseException:
+                    pass
+                raise
+
+    async def _run(self, name: str, inputs: list, output, args, progress: Progress = None, many: bool = False):
+        """Ejecuta pdf_ops.name(*args(entradas, salida)); los flujos asíncronos reciben los bytes al final.
+
+        many: la salida son varios archivos (una carpeta o None).
+        """
+        process = name in PROCESS_OPS and self._process_pool() is not None
+        srcs = [await self._source(src, process) for src in inputs]
+        if output is None or _is_path(output):
+            return await self._call(name, *args(srcs, output), progress=progress)
+        if many:
+            raise TypeError("La salida son varios archivos: usa una carpeta o None")
+        if not hasattr(output, "write"):
+            raise TypeError(f"Salida no soportada: {type(output).__name__}")
+        if not process and not _is_async_writer(output):
+            return await self._call(name, *args(srcs, output), progress=progress)
+        data, value = _take_data(await self._call(name, *args(srcs, None), progress=progress))
+        if data is None:
+            return value
+        await self._deliver(data, output)
+        # Como pdf_ops con un stream: remove_password devuelve True
+        return True if name == "remove_password" else value
+
+    # ---------- Operaciones ----------
+    # Devuelven lo mismo que pdf_ops: con output=None, los bytes (o "data" en los
+    # resultados dict; un dict nombre → bytes si son varios archivos).
+    async def merge_pdfs(self, inputs: list, output=None, progress: Progress = None):
+        return await self._run("merge_pdfs", inputs, output, lambda p, out: (p, out), progress)
+
+    async def split_pdf(self, input_pdf, ranges: str, out_dir=None, merge_output: bool = False,
+                        progress: Progress = None):
+        return await self._run("split_pdf", [input_pdf], out_dir,
+                               lambda p, out: (p[0], ranges, out, merge_output), progress, many=True)
+
+    async def rotate_pdf(self, input_pdf, output=None, angle=90, progress: Progress = None):
+        return await self._run("rotate_pdf", [input_pdf], output, lambda p, out: (p[0], out, angle), progress)
+
+    async def remove_password(self, input_pdf, output=None, password: str = "", progress: Progress = None):
+        return await self._run("remove_password", [input_pdf], output,
+                               lambda p, out: (p[0], out, password), progress)
+
+    async def unlock_with_candidates(self, input_pdf, passwords: List[str], output=None, progress: Progress = None):
+        return await self._run("unlock_with_candidates", [input_pdf], output,
+                               lambda p, out: (p[0], out, passwords), progress)
+
+    async def compress_pdf_lossless(self, input_pdf, output=None, progress: Progress = None):
+        return await self._run("compress_pdf_lossless", [input_pdf], output, lambda p, out: (p[0], out),
+                               progress)
+
+    async def compress_pdf_images(self, input_pdf, output=None, dpi: int = 150, quality: int = 75,
+                                  progress: Progress = None):
+        return await self._run("compress_pdf_images", [input_pdf], output,
+                               lambda p, out: (p[0], out, dpi, quality), progress)
+
+    async def compress_pdf_rasterize(self, input_pdf, output=None, dpi: int = 150, codec: str = "auto",
+                                     quality: int = 75, progress: Progress = None):
+        return await self._run("compress_pdf_rasterize", [input_pdf], output,
+                               lambda p, out: (p[0], out, dpi, codec, quality), progress)
+
+    async def export_images(self, inputs: list, output=None, dpi: int = 150, fmt: str = "png",
+                            container: str = "zip", png_level: int = 3, quality: int = 85,
+                            progress: Progress = None):
+        return await self._run("export_images", inputs, output,
+                               lambda p, out: (p, out, dpi, fmt, container, png_level, quality), progress,
+                               many=container == "files")
+
+    async def images_to_pdf(self, images: list, output=None, max_side: Optional[int] = None, quality: int = 85,
+                            progress: Progress = None):
+        return await self._run("images_to_pdf", images, output,
+                               lambda p, out: (p, out, max_side, quality), progress)
+
+    async def probe(self, input_pdf, images: bool = False) -> dict:
+        src = await self._source(input_pdf)
+        async with self._sems["default"]:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, functools.partial(ops.probe, src, images))
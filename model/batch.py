@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Lotes: una misma operación sobre cientos de archivos con un pool de procesos
+# compartido. Los fallos por archivo no detienen el lote y al final se escribe
+# un reporte JSON con el rendimiento agregado.
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Union
+
+from model import jobs as jobs_mod
+from model.pdf_ops import OperationCancelled, Progress, cpu_count
+
+REPORT_NAME = "batch_report.json"
+# No se escriben en el reporte: en desbloqueos basta con el índice de la contraseña que sirvió
+SECRET_PARAMS = {"password", "passwords"}
+CANCEL_POLL = 0.2  # s entre revisiones de cancel mientras se espera a los trabajos
+
+
+def collect_inputs(source: Union[str, Iterable[str]], exts=(".pdf",)) -> List[str]:
+    """Carpetas (recursivas), rutas, globs o @listas → archivos con las extensiones dadas."""
+    found = []
+    for item in [source] if isinstance(source, str) else source:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                found.extend(sorted(os.path.join(root, f) for f in files if f.lower().endswith(exts)))
+        elif os.path.isfile(item):
+            # Ruta existente: sin glob (rápido con miles de archivos y seguro con "[" en el nombre)
+            if item.lower().endswith(exts):
+                found.append(item)
+        else:
+            found.extend(p for p in jobs_mod.expand_inputs([item]) if p.lower().endswith(exts))
+    return found
+
+def read_passwords(path: str) -> List[str]:
+    """Contraseñas candidatas, una por línea (sin recortar espacios: pueden ser parte de la clave)."""
+    with open(path, encoding="utf-8") as fp:
+        return [l.rstrip("\r\n") for l in fp if l.rstrip("\r\n")]
+
+def summarize(results: List[Dict], seconds: float) -> Dict:
+    ok = [r for r in results if r["ok"]]
+    mb = sum(r.get("bytes_in", 0) for r in results) / (1024 * 1024)
+    return {
+        "files": len(results),
+        "ok": len(ok),
+        "failed": len(results) - len(ok),
+        "seconds": round(seconds, 4),
+        "files_per_s": round(len(results) / seconds, 3) if seconds else 0.0,
+        "mb_per_s": round(mb / seconds, 3) if seconds else 0.0,
+        "mb_in": round(mb, 3),
+    }
+
+# Cancelación compartida con los workers: los trabajos en curso se detienen en su próxima página
+_cancel_event = None
+
+def _init_worker(event):
+    global _cancel_event
+    _cancel_event = event
+
+def _run_job(job: dict) -> dict:
+    return jobs_mod.run_job(job, cancel=_cancel_event)
+
+def _local(jobs: List[dict], workers: int, cancel=None):
+    # (índice, resultado) según terminan; con cancel (o al cerrar el generador) los
+    # pendientes no arrancan y los que corren se detienen sin esperar a que terminen
+    stop = multiprocessing.Event()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(stop,)) as pool:
+        futures = {pool.submit(_run_job, job): i for i, job in enumerate(jobs)}
+        pending = set(futures)
+        try:
+            while pending:
+                finished, pending = wait(pending, timeout=CANCEL_POLL, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    yield futures[fut], fut.result()
+                if cancel is not None and cancel.is_set():
+                    raise OperationCancelled("Lote cancelado")
+        finally:
+            stop.set()
+            for fut in pending:
+                fut.cancel()
+
+def run_batch(op: str, inputs: List[str], out_dir: str, params: Optional[dict] = None,
+              workers: Optional[int] = None, report: bool = True,
+              progress: Progress = None, cancel=None, server=None) -> Dict:
+    """Aplica op a cada archivo en paralelo; devuelve (y guarda) el resumen del lote.
+
+    Con server (model.server.ServerClient) los trabajos van al pool ya caliente del servidor local.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    # Un trabajo por archivo; cada uno renderiza en serie para no sobresuscribir núcleos
+    # Ninguna salida puede ser una entrada del lote (out_dir = carpeta de origen)
+    jobs, used = [], {os.path.realpath(src) for src in inputs}
+    for src in inputs:
+        job = jobs_mod.file_job(op, src, out_dir, **dict(params or {}, workers=1))
+        key = "out_dir" if "out_dir" in job else "output"
+        # Mismo nombre desde carpetas distintas: se agrega un sufijo
+        base, ext = os.path.splitext(job[key]) if key == "output" else (job[key], "")
+        n = 1
+        while os.path.realpath(job[key]) in used:
+            n += 1
+            job[key] = f"{base}_{n}{ext}"
+        used.add(os.path.realpath(job[key]))
+        jobs.append(job)
+    workers = max(1, min(workers or cpu_count(), len(jobs) or 1))
+    results = [None] * len(jobs)
+    start = time.perf_counter()
+    done = 0
+    completed = server.run_many(jobs, cancel=cancel) if server is not None else _local(jobs, workers, cancel)
+    try:
+        for i, res in completed:
+            results[i] = res
+            done += 1
+            if cancel is not None and cancel.is_set():
+                raise OperationCancelled("Lote cancelado")
+            if progress:
+                progress(done, len(jobs))
+    finally:
+        completed.close()
+    if server is not None:
+        workers = server.health()["workers"]
+    summary = summarize(results, time.perf_counter() - start)
+    summary.update(op=op, params={k: "***" if k in SECRET_PARAMS else v for k, v in (params or {}).items()},
+                   workers=workers)
+    if report:
+        summary["report"] = os.path.join(out_dir, REPORT_NAME)
+        with open(summary["report"], "w", encoding="utf-8") as fp:
+            json.dump(dict(summary, results=results), fp, ensure_ascii=False, indent=2)
+    return summary
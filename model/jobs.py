@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# Trabajos descritos como diccionarios (serializables a JSON) sobre pdf_ops.
+# Los usa la línea de comandos y cualquier proceso sin interfaz gráfica.
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List
+
+from model import largefile, pdf_ops as ops, pipeline, telemetry
+from model.pdf_ops import Progress
+from model.result_cache import MAX_BYTES, ResultCache
+
+
+# Cada manejador recibe el trabajo y, en kw, progress/cancel opcionales para la operación
+def _compress(job: dict, **kw):
+    method = job.get("method", "lossless")
+    if method == "lossless":
+        return ops.compress_pdf_lossless(job["input"], job["output"], **kw)
+    if method == "images":
+        return ops.compress_pdf_images(job["input"], job["output"], int(job.get("dpi", 150)), int(job.get("quality", 75)),
+                                       **kw)
+    if method == "raster":
+        return ops.compress_pdf_rasterize(job["input"], job["output"], int(job.get("dpi", 150)), job.get("codec", "auto"),
+                                          int(job.get("quality", 75)), workers=job.get("workers"), **kw)
+    raise ValueError(f"Método de compresión desconocido: {method}")
+
+def _memory(job: dict) -> int:
+    return int(job.get("memory_mb", largefile.MEMORY_MB))
+
+def _split(job: dict, **kw):
+    mode = job.get("mode", "range")
+    if mode == "range" and job.get("large"):
+        return largefile.split_pdf_large(job["input"], job.get("ranges", "1-"), job["out_dir"], bool(job.get("merge", False)),
+                                         memory_mb=_memory(job), **kw)
+    if mode == "range":
+        return ops.split_pdf(job["input"], job.get("ranges", "1-"), job["out_dir"], bool(job.get("merge", False)),
+                             workers=job.get("workers"), **kw)
+    return ops.split_pdf_by(job["input"], job["out_dir"], mode, int(job.get("every", 1)), int(job.get("level", 1)),
+                            int(float(job.get("max_mb", 10)) * 1024 * 1024), workers=job.get("workers"), **kw)
+
+def _merge(job: dict, **kw):
+    # "large": true usa el modo de memoria acotada (largefile) con techo "memory_mb"
+    if job.get("large"):
+        return largefile.merge_pdfs_large(job["inputs"], job["output"], _memory(job), **kw)
+    return ops.merge_pdfs(job["inputs"], job["output"], **kw)
+
+def _rotate(job: dict, **kw):
+    # "spec" admite ángulos por rango: "1-3:90; 7-:180"
+    angle = job.get("spec") or int(job.get("angle", 90))
+    if job.get("incremental"):
+        return ops.rotate_pdf_incremental(job["input"], job["output"], angle, **kw)
+    if job.get("large"):
+        return largefile.rotate_pdf_large(job["input"], job["output"], angle, _memory(job), **kw)
+    return ops.rotate_pdf(job["input"], job["output"], angle, **kw)
+
+def _unlock(job: dict, **kw):
+    if job.get("passwords"):
+        # Lista de candidatas (con "password" delante, si viene): la salida se escribe solo si alguna sirve
+        candidates = ([job["password"]] if job.get("password") else []) + list(job["passwords"])
+        res = ops.unlock_with_candidates(job["input"], job["output"], candidates, **kw)
+        if res["status"] == "no_match":
+            raise RuntimeError(f"Ninguna de las {res['attempts']} contraseñas candidatas sirve")
+        return res
+    if job.get("large"):
+        return largefile.remove_password_large(job["input"], job["output"], job.get("password", ""), _memory(job), **kw)
+    if not ops.remove_password(job["input"], job["output"], job.get("password", ""), **kw):
+        raise RuntimeError("Contraseña incorrecta o error al desencriptar")
+    return True
+
+def _images(job: dict, **kw):
+    # container "files" escribe en out_dir; "zip" y "tiff" en output (un archivo para todas las entradas)
+    container = job.get("container", "files")
+    output = (job.get("out_dir") or job.get("output")) if container == "files" else job["output"]
+    return ops.export_images(job_inputs(job), output, int(job.get("dpi", 150)), job.get("fmt", "png"), container,
+                             int(job.get("png_level", 3)), int(job.get("quality", 85)), workers=job.get("workers"), **kw)
+
+def _pipeline(job: dict, **kw):
+    # "recipe": ruta a una receta .json/.yaml o la receta misma; o directamente "stages"
+    return pipeline.run_pipeline(job["input"], job["output"], job.get("recipe") or job.get("stages"), **kw)
+
+OPERATIONS = {
+    "merge": _merge,
+    "split": _split,
+    "compress": _compress,
+    "pdf_to_images": _images,
+    "images_to_pdf": lambda j, **kw: ops.images_to_pdf(j["inputs"], j["output"], j.get("max_side"),
+                                                       int(j.get("quality", 85)), **kw),
+    "rotate": _rotate,
+    "unlock": _unlock,
+    "pipeline": _pipeline,
+}
+
+def expand_inputs(patterns: Iterable[str]) -> List[str]:
+    """Expande globs y listas "@archivo.txt" (una ruta o glob por línea)."""
+    paths = []
+    for pat in patterns:
+        if pat.startswith("@"):
+            with open(pat[1:], encoding="utf-8") as fp:
+                lines = [l.strip() for l in fp if l.strip() and not l.startswith("#")]
+            paths.extend(expand_inputs(lines))
+            continue
+        matches = sorted(glob.glob(pat, recursive=True))
+        paths.extend(matches if matches else [pat])
+    return paths
+
+def job_inputs(job: dict) -> List[str]:
+    return list(job.get("inputs") or [job["input"]])
+
+# Operaciones cuya salida es una carpeta (una por archivo de entrada en lotes)
+DIR_OUTPUT_OPS = {"split", "pdf_to_images"}
+OUTPUT_SUFFIX = "_salida"  # cuando la salida caería sobre la propia entrada
+
+def file_job(op: str, src: str, out_dir: str, **params) -> dict:
+    """Trabajo de un solo archivo con la salida dentro de out_dir."""
+    job = dict(params, op=op, input=src)
+    if op in DIR_OUTPUT_OPS:
+        job["out_dir"] = output_for(src, out_dir)
+    else:
+        job["output"] = output_for(src, out_dir, ".pdf")
+    return job
+
+def _size(path) -> int:
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+def _uses_large(job: dict) -> bool:
+    # Los casos en que los manejadores de arriba van de verdad a largefile
+    op = job.get("op")
+    return bool(job.get("large")) and (op == "merge" or (op == "split" and job.get("mode", "range") == "range")
+                                       or (op == "rotate" and not job.get("incremental"))
+                                       or (op == "unlock" and not job.get("passwords")))
+
+def cache_params(job: dict) -> dict:
+    """Parámetros del trabajo que cuentan para la clave de caché.
+
+    "large" solo cuenta donde cambia la salida (largefile no conserva marcadores ni formularios).
+    """
+    return job if _uses_large(job) else {k: v for k, v in job.items() if k != "large"}
+
+def run_job(job: dict, progress: Progress = None, cancel=None) -> Dict:
+    """Ejecuta un trabajo y devuelve un resultado serializable con tiempos; nunca lanza."""
+    op = job.get("op")
+    res = {"op": op, "inputs": job.get("inputs") or [job.get("input")],
+           "output": job.get("output") or job.get("out_dir"), "ok": False}
+    res["bytes_in"] = sum(_size(p) for p in res["inputs"])
+    start = time.perf_counter()
+    t = None
+    kw = {k: v for k, v in (("progress", progress), ("cancel", cancel)) if v is not None}
+    try:
+        if op not in OPERATIONS:
+            raise ValueError(f"Operación desconocida: {op}")
+        with telemetry.trace(op, job_inputs(job), [res["output"]], profile=bool(job.get("profile"))) as t:
+            if job.get("cache"):
+                # "cache": true (carpeta por defecto) o ruta; misma entrada + parámetros = misma salida
+                cache = ResultCache(None if job["cache"] is True else job["cache"],
+                                    int(job.get("cache_mb", MAX_BYTES // (1024 * 1024))) * 1024 * 1024)
+                value, res["cached"] = cache.run(op, job_inputs(job), res["output"], cache_params(job),
+                                                 lambda: OPERATIONS[op](job, **kw))
+            else:
+                value = OPERATIONS[op](job, **kw)
+        res["ok"] = True
+        if value is not None:
+            res["result"] = value
+    except Exception as e:
+        res["error"] = f"{type(e).__name__}: {e}"
+    res["seconds"] = round(time.perf_counter() - start, 4)
+    if t is not None:
+        res["phases"], res["peak_rss_mb"] = t.record["phases"], t.record["peak_rss_mb"]
+        if "profile" in t.record:
+            res["profile"] = t.record["profile"].get("file")
+    return res
+
+def run_jobs(jobs: List[dict], parallel: int = 1) -> Iterator[Dict]:
+    """Ejecuta varios trabajos; con parallel > 1 usa un proceso por trabajo. Resultados en orden."""
+    if parallel <= 1 or len(jobs) <= 1:
+        yield from map(run_job, jobs)
+        return
+    # Evita sobresuscribir núcleos: cada trabajo renderiza en serie
+    jobs = [dict(j, workers=j.get("workers", 1)) for j in jobs]
+    with ProcessPoolExecutor(max_workers=parallel) as pool:
+        yield from pool.map(run_job, jobs)
+
+def same_file(a: str, b: str) -> bool:
+    return os.path.realpath(a) == os.path.realpath(b)
+
+def output_for(src: str, out_dir: str, ext: str = "") -> str:
+    # out_dir/<nombre sin extensión><ext>; sin ext sirve como carpeta de salida por archivo.
+    # Si out_dir es la carpeta de la entrada, la salida lleva sufijo para no pisar el original
+    stem = os.path.splitext(os.path.basename(src))[0]
+    path = os.path.join(out_dir, stem + ext)
+    return os.path.join(out_dir, f"{stem}{OUTPUT_SUFFIX}{ext}") if same_file(path, src) else path
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+# Modo para archivos muy grandes: la entrada se lee con pypdf sobre un mmap
+# (el sistema carga y libera páginas del archivo según se necesitan) y la
+# salida se escribe objeto por objeto con StreamingPDFWriter. Las páginas se
+# leen por referencia y se sueltan al escribirlas; si el proceso supera el
+# techo de memoria se vacía la caché de objetos del lector. Se copian páginas, recursos y /Info;
+# marcadores y formularios a nivel de documento no se conservan.
+import gc
+import io
+import mmap
+import os
+from typing import List, Optional
+
+from model.ops_base import Progress, require, tick
+from model.pdf_ops import PdfReader, parse_rotation, split_ranges
+from model.pdf_writer import StreamingPDFWriter
+from model.probe import probe_many
+from model.telemetry import rss_mb
+
+from model.lazy import lazy
+
+ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject = (
+    lazy("pypdf.generic", attr=name)
+    for name in ("ArrayObject", "DictionaryObject", "IndirectObject", "NameObject", "StreamObject"))
+
+MEMORY_MB = 512
+# Atributos que una página puede heredar de sus nodos /Pages
+_INHERITED = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+class _Source:
+    """PdfReader sobre un mmap del archivo, con control del techo de memoria."""
+    def __init__(self, path: str, memory_mb: int, password: Optional[str] = None):
+        require(PdfReader, "pypdf no instalado")
+        self.fp = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # archivo vacío
+            self.map = io.BytesIO(b"")
+        self.reader = PdfReader(self.map)
+        if self.reader.is_encrypted:
+            require(password is not None and self.reader.decrypt(password), "Contraseña incorrecta o error al desencriptar")
+        # Solo las referencias, calculadas una vez: la lista aplanada de pypdf guarda una copia de cada
+        # página y se suelta ya; cada página queda solo en la caché de objetos que vacía check_memory
+        self.page_refs = [p.indirect_reference for p in self.reader.pages]
+        self.page_ids = {ref.idnum for ref in self.page_refs}
+        self.reader.flattened_pages = None
+        self.memory_mb = memory_mb
+        self.peak_mb = rss_mb()
+        self.flushes = 0
+
+    def page(self, index: int):
+        return self.page_refs[index].get_object()
+
+    def check_memory(self):
+        now = rss_mb()
+        self.peak_mb = max(self.peak_mb, now)
+        if now > self.memory_mb:
+            self.reader.resolved_objects.clear()
+            gc.collect()
+            # Las páginas del mmap ya leídas cuentan como residentes: se sueltan (se releen del disco si hace falta)
+            if hasattr(mmap, "MADV_DONTNEED") and isinstance(self.map, mmap.mmap):
+                self.map.madvise(mmap.MADV_DONTNEED)
+            self.flushes += 1
+
+    def close(self):
+        self.reader = None
+        self.map.close()
+        self.fp.close()
+
+
+def _atom(obj) -> bytes:
+    buf = io.BytesIO()
+    obj.write_to_stream(buf)
+    return buf.getvalue()
+
+
+class _Copier:
+    """Copia páginas de un lector a un StreamingPDFWriter, cada objeto una sola vez.
+
+    Las referencias a páginas que no van en la salida se escriben como null
+    (evita arrastrar el documento entero a través de enlaces internos).
+    """
+    def __init__(self, src: _Source, writer: StreamingPDFWriter):
+        self.src, self.reader, self.w = src, src.reader, writer
+        self.map = {}     # idnum de origen -> número en la salida
+        self.queue = []
+
+    def reserve_pages(self, pages: List[int]) -> List[int]:
+        nums = []
+        for p in pages:
+            idnum = self.src.page_refs[p].idnum
+            self.map.setdefault(idnum, self.w.reserve())
+            nums.append(self.map[idnum])
+        return nums
+
+    def _ref(self, ref) -> bytes:
+        num = self.map.get(ref.idnum)
+        if num is None:
+            if ref.idnum in self.src.page_ids:
+                return b"null"
+            num = self.map[ref.idnum] = self.w.reserve()
+            self.queue.append((ref, num))
+        return b"%d 0 R" % num
+
+    def _ser(self, obj, skip=()) -> bytes:
+        if isinstance(obj, IndirectObject):
+            return self._ref(obj)
+        if isinstance(obj, DictionaryObject):
+            parts = [b"<<"]
+            for k, v in obj.items():
+                if k in skip or (isinstance(obj, StreamObject) and k == "/Length"):
+                    continue
+                parts.append(_atom(k))
+                parts.append(self._ser(v))
+            if isinstance(obj, StreamObject):
+                parts.append(b"/Length %d" % len(obj._data))
+            parts.append(b">>")
+            return b" ".join(parts)
+        if isinstance(obj, ArrayObject):
+            return b"[" + b" ".join(self._ser(v) for v in obj) + b"]"
+        return _atom(obj)
+
+    def _body(self, obj, skip=(), extra: bytes = b"") -> bytes:
+        body = self._ser(obj, skip)
+        if extra:
+            body = b"<< " + extra + body[2:]
+        if isinstance(obj, StreamObject):
+            body += b"\nstream\n" + obj._data + b"\nendstream"
+        return body
+
+    def drain(self):
+        while self.queue:
+            ref, num = self.queue.pop()
+            obj = ref.get_object()
+            # /P en anotaciones apunta de vuelta a la página: no hace falta
+            skip = ("/P",) if isinstance(obj, DictionaryObject) and obj.get("/Type") == "/Annot" else ()
+            self.w.write_object(num, self._body(obj, skip))
+
+    def copy_page(self, index: int, num: int, parent: int, angle: int = 0):
+        page = self.src.page(index)
+        inherited = DictionaryObject()
+        for key in _INHERITED:
+            if key not in page:
+                node = page.get("/Parent")
+                while node is not None:
+                    node = node.get_object()
+                    if key in node:
+                        inherited[NameObject(key)] = node[key]
+                        break
+                    node = node.get("/Parent")
+        merged = DictionaryObject(page)
+        merged.update(inherited)
+        skip = ("/Parent", "/Rotate") if angle else ("/Parent",)
+        extra = b"/Parent %d 0 R" % parent
+        if angle:
+            extra += b" /Rotate %d" % ((int(merged.get("/Rotate", 0)) + angle) % 360)
+        self.w.write_object(num, self._body(merged, skip, extra))
+        self.drain()
+
+
+class _Output:
+    """Archivo de salida con su árbol de páginas plano (vía .tmp: si falla, el destino no se toca)."""
+    def __init__(self, path: str):
+        self.path = path
+        self.fp = open(path + ".tmp", "wb")
+        self.w = StreamingPDFWriter(self.fp, "1.7")
+        self.pages_num = self.w.reserve()
+        self.kids: List[int] = []
+
+    def close(self, info: Optional[int] = None):
+        kids = " ".join(f"{k} 0 R" for k in self.kids)
+        self.w.add_object(f"<< /Type /Pages /Kids [{kids}] /Count {len(self.kids)} >>".encode("ascii"), self.pages_num)
+        root = self.w.add_object(f"<< /Type /Catalog /Pages {self.pages_num} 0 R >>".encode("ascii"))
+        self.w.close(root, info)
+        self.fp.close()
+        os.replace(self.path + ".tmp", self.path)
+
+    def abort(self):
+        self.fp.close()
+        os.remove(self.path + ".tmp")
+
+
+def _copy_info(copier: _Copier) -> Optional[int]:
+    info = copier.reader.trailer.get("/Info")
+    if info is None:
+        return None
+    info = info.get_object()
+    num = copier.w.add_object(copier._body(info))
+    copier.drain()
+    return num
+
+def _copy_pages(src: _Source, out: _Output, pages: List[int], angles=None, info=False,
+                progress: Progress = None, cancel=None, done: int = 0, total: int = 0) -> int:
+    copier = _Copier(src, out.w)
+    nums = copier.reserve_pages(pages)
+    for p, num in zip(pages, nums):
+        tick(progress, cancel, done, total)
+        copier.copy_page(p, num, out.pages_num, angles.get(p, 0) if angles is not None else 0)
+        out.kids.append(num)
+        src.check_memory()
+        done += 1
+    return _copy_info(copier) if info else None
+
+def _stats(src_list, pages: int, outputs: List[str]) -> dict:
+    return {"pages": pages, "outputs": outputs, "peak_rss_mb": round(max(s.peak_mb for s in src_list), 1),
+            "cache_flushes": sum(s.flushes for s in src_list)}
+
+def _run(path: str, memory_mb: int, password, body):
+    src = _Source(path, memory_mb, password)
+    try:
+        return body(src)
+    finally:
+        src.close()
+
+def _write(output: str, src: _Source, pages: List[int], **kw) -> None:
+    out = _Output(output)
+    try:
+        out.close(_copy_pages(src, out, pages, **kw))
+    except BaseException:
+        out.abort()
+        raise
+
+
+# ---------- Operaciones ----------
+def rotate_pdf_large(input_pdf: str, output_pdf: str, angle, memory_mb: int = MEMORY_MB,
+                     progress: Progress = None, cancel=None) -> dict:
+    def body(src):
+        n = len(src.page_refs)
+        _write(output_pdf, src, list(range(n)), angles=parse_rotation(angle, n), info=True,
+               progress=progress, cancel=cancel, total=n)
+        return _stats([src], n, [output_pdf])
+    return _run(input_pdf, memory_mb, None, body)
+
+def remove_password_large(input_pdf: str, output_pdf: str, password: str, memory_mb: int = MEMORY_MB,
+                          progress: Progress = None, cancel=None) -> dict:
+    def body(src):
+        n = len(src.page_refs)
+        _write(output_pdf, src, list(range(n)), info=True, progress=progress, cancel=cancel, total=n)
+        return _stats([src], n, [output_pdf])
+    return _run(input_pdf, memory_mb, password, body)
+
+def split_pdf_large(input_pdf: str, ranges: str, out_dir: str, merge_output: bool = False,
+                    output_filename: str = "split_merged.pdf", memory_mb: int = MEMORY_MB,
+                    progress: Progress = None, cancel=None) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+
+    def body(src):
+        pages = split_ranges(ranges, len(src.page_refs))
+        require(bool(pages), "Los rangos no seleccionaron ninguna página")
+        if merge_output:
+            groups = [(os.path.join(out_dir, output_filename), pages)]
+        else:
+            groups = [(os.path.join(out_dir, f"page_{p+1:04d}.pdf"), [p]) for p in pages]
+        done = 0
+        for path, group in groups:
+            _write(path, src, group, progress=progress, cancel=cancel, done=done, total=len(pages))
+            done += len(group)
+        return _stats([src], len(pages), [g[0] for g in groups])
+    return _run(input_pdf, memory_mb, None, body)
+
+def merge_pdfs_large(inputs: List[str], output: str, memory_mb: int = MEMORY_MB,
+                     progress: Progress = None, cancel=None) -> dict:
+    require(bool(inputs), "No hay archivos para unir")
+    # Una entrada abierta a la vez; los objetos de cada una se numeran aparte.
+    # El total de páginas sale de probe (solo trailer y xref) para avanzar página a página
+    total = sum(info["pages"] or 0 for info in probe_many(inputs))
+    out = _Output(output)
+    sources, done = [], 0
+    try:
+        for path in inputs:
+            src = _Source(path, memory_mb)
+            try:
+                n = len(src.page_refs)
+                _copy_pages(src, out, list(range(n)), progress=progress, cancel=cancel, done=done, total=total)
+                done += n
+                sources.append(src)
+            finally:
+                src.close()
+        tick(progress, cancel, done, max(done, total))
+        out.close()
+    except BaseException:
+        out.abort()
+        raise
+    return _stats(sources, done, [output])
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# Importación diferida de las bibliotecas pesadas (PyMuPDF, pypdf, Pillow):
+# el módulo real se carga la primera vez que se usa, no al importar pdf_ops.
+# Así la ventana aparece sin esperar ~0.4 s de imports; prewarm() los adelanta
+# en segundo plano una vez dibujada.
+import importlib
+import threading
+from typing import Iterable, Optional
+
+_MISSING = object()
+
+
+class LazyModule:
+    """Módulo (o atributo de módulo) que se importa al primer uso.
+
+    lazy("pymupdf", "fitz") prueba los nombres en orden; attr toma un objeto
+    del módulo (p. ej. PdfReader de pypdf). Si no está instalado el proxy es
+    falso en contexto booleano: require(fitz, ...) sustituye a "is not None".
+    """
+    def __init__(self, *names: str, attr: Optional[str] = None):
+        self._names, self._attr = names, attr
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    target = _MISSING
+                    for name in self._names:
+                        try:
+                            module = importlib.import_module(name)
+                            target = getattr(module, self._attr) if self._attr else module
+                            break
+                        except Exception:
+                            continue
+                    self._target = target
+        return None if self._target is _MISSING else self._target
+
+    @property
+    def loaded(self) -> bool:
+        return self._target is not None
+
+    def __bool__(self):
+        return self._load() is not None
+
+    def __getattr__(self, name):
+        target = self._load()
+        if target is None:
+            raise RuntimeError(f"{self._attr or self._names[0]} no instalado")
+        return getattr(target, name)
+
+    def __call__(self, *args, **kwargs):
+        target = self._load()
+        if target is None:
+            raise RuntimeError(f"{self._attr or self._names[0]} no instalado")
+        return target(*args, **kwargs)
+
+    # isinstance(obj, proxy) busca __instancecheck__ en el tipo del proxy
+    def __instancecheck__(self, obj):
+        target = self._load()
+        return target is not None and isinstance(obj, target)
+
+    def __repr__(self):
+        state = "cargado" if self.loaded else "sin cargar"
+        return f"<lazy {'.'.join(filter(None, (self._names[0], self._attr)))} ({state})>"
+
+
+def lazy(*names: str, attr: Optional[str] = None) -> LazyModule:
+    return LazyModule(*names, attr=attr)
+
+PREWARM = ("pymupdf", "pypdf", "PIL.Image")
+
+def warm(modules: Iterable[str] = PREWARM):
+    """Importa ya los módulos (los que no estén instalados se ignoran)."""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+def prewarm(modules: Iterable[str] = PREWARM) -> threading.Thread:
+    """Importa los módulos en un hilo de fondo (el primer uso ya no espera)."""
+    t = threading.Thread(target=warm, args=(tuple(modules),), name="prewarm", daemon=True)
+    t.start()
+    return t
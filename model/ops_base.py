@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Piezas comunes de las operaciones (pdf_ops, largefile, pipeline): progreso,
+# cancelación y errores para el usuario.
+from typing import Callable, Optional
+
+# progress(hechas, total); cancel es cualquier objeto con is_set(), p. ej. threading.Event
+Progress = Optional[Callable[[int, int], None]]
+
+
+class OperationCancelled(RuntimeError):
+    pass
+
+
+def require(cond, msg):
+    """RuntimeError con msg (mensaje para el usuario) si cond es falso."""
+    if not cond:
+        raise RuntimeError(msg)
+
+def tick(progress: Progress, cancel, done: int, total: int):
+    """Punto de control por página: cancela si se pidió y reporta el avance."""
+    if cancel is not None and cancel.is_set():
+        raise OperationCancelled("Operación cancelada")
+    if progress:
+        progress(done, total)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# Entradas y salidas de las operaciones de pdf_ops sin pasar por el disco.
+# Entrada: ruta, bytes/bytearray/memoryview o archivo binario (read). Salida:
+# ruta, stream con write() o None (la operación devuelve los bytes). PyMuPDF
+# abre bytes y vistas sin copiarlos; pypdf lee de un BytesIO que comparte el
+# bytes o de un lector sobre la vista.
+import io
+import os
+from typing import BinaryIO, List, Optional, Union
+
+from model.lazy import lazy
+
+fitz = lazy("pymupdf", "fitz")
+PdfReader = lazy("pypdf", attr="PdfReader")
+
+Source = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+Target = Union[str, os.PathLike, BinaryIO, None]
+
+
+def is_path(x) -> bool:
+    return isinstance(x, (str, os.PathLike))
+
+def is_source(x) -> bool:
+    """Una sola entrada (no una lista de entradas)."""
+    return is_path(x) or isinstance(x, (bytes, bytearray, memoryview)) or hasattr(x, "read")
+
+def source(src: Source):
+    """Ruta (str) o buffer (bytes/memoryview) que se puede abrir las veces que haga falta.
+
+    bytes, memoryview, bytearray y BytesIO no se copian; otros archivos se leen una vez.
+    """
+    if is_path(src):
+        return os.fspath(src)
+    if isinstance(src, bytes):
+        return src
+    if isinstance(src, (bytearray, memoryview)):
+        view = memoryview(src)  # fitz.open copia un bytearray, una vista no
+        return view if view.format == "B" and view.ndim == 1 else view.cast("B")
+    if isinstance(src, io.BytesIO):
+        return src.getbuffer()[src.tell():]
+    if hasattr(src, "read"):
+        return src.read()
+    raise TypeError(f"Entrada no soportada: {type(src).__name__}")
+
+def source_size(src) -> int:
+    return os.path.getsize(src) if isinstance(src, str) else len(src)
+
+def source_name(src, index: int = 0) -> str:
+    """Nombre sin extensión para salidas derivadas (los buffers no tienen)."""
+    return os.path.splitext(os.path.basename(src))[0] if isinstance(src, str) else f"documento_{index + 1}"
+
+class _MemoryRaw(io.RawIOBase):
+    # Lectura aleatoria sobre una vista: BytesIO copiaría el buffer entero
+    def __init__(self, buf):
+        self._buf, self._pos = buf, 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self._buf[self._pos:self._pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._buf)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+def open_stream(src) -> BinaryIO:
+    """Archivo binario de lectura sobre la entrada (ya pasada por source())."""
+    if isinstance(src, str):
+        return open(src, "rb")
+    if isinstance(src, bytes):
+        return io.BytesIO(src)  # comparte el bytes mientras no se escriba
+    return io.BufferedReader(_MemoryRaw(src))
+
+def open_doc(src):
+    """Documento de PyMuPDF desde una ruta o un buffer."""
+    return fitz.open(src) if isinstance(src, str) else fitz.open(stream=src, filetype="pdf")
+
+def pdf_reader(src):
+    return PdfReader(src if isinstance(src, str) else open_stream(src))
+
+
+class Output:
+    """Destino de una operación: ruta, stream del llamador o None (los bytes quedan en data).
+
+    Se usa como archivo (write/tell, posiciones desde el inicio del PDF aunque el
+    stream ya tenga datos) o con save(doc) para documentos de PyMuPDF. atomic
+    escribe una ruta vía .tmp y la reemplaza al cerrar sin errores.
+    """
+    def __init__(self, target: Target, atomic: bool = False):
+        if not (target is None or is_path(target) or hasattr(target, "write")):
+            raise TypeError(f"Salida no soportada: {type(target).__name__}")
+        self.target = os.fspath(target) if is_path(target) else target
+        self.path = self.target + ".tmp" if atomic and self.path_target else self.target
+        self.pos = 0
+        self._fp = None
+        self._chunks: List[bytes] = []
+        self._written = False
+
+    @property
+    def path_target(self) -> bool:
+        return isinstance(self.target, str)
+
+    def write(self, data) -> int:
+        n = len(data)
+        if self.target is None:
+            self._chunks.append(bytes(data))
+        else:
+            if self._fp is None:
+                self._fp = open(self.path, "wb") if self.path_target else self.target
+            self._fp.write(data)
+        self.pos += n
+        self._written = True
+        return n
+
+    def tell(self) -> int:
+        return self.pos
+
+    def flush(self):
+        if self._fp is not None and hasattr(self._fp, "flush"):
+            self._fp.flush()
+
+    def save(self, doc, **options):
+        """Guarda un documento de PyMuPDF: directo a la ruta; si no, vía tobytes().
+
+        (Document.save con un objeto que tenga .name escribiría en ese nombre.)
+        """
+        if self.path_target and not self._written:
+            doc.save(self.path, **options)
+            self.pos = os.path.getsize(self.path)
+            self._written = True
+        else:
+            self.write(doc.tobytes(**options))
+
+    def rewind(self) -> bool:
+        """Descarta lo escrito para empezar de nuevo; False si el stream no permite volver atrás."""
+        if self.target is None:
+            self._chunks.clear()
+        elif self.path_target:
+            if self._fp is not None:
+                self._fp.seek(0)
+                self._fp.truncate()
+            elif self._written:
+                open(self.path, "wb").close()
+        else:
+            fp = self.target
+            if not (hasattr(fp, "seekable") and fp.seekable()):
+                return False
+            fp.seek(fp.tell() - self.pos)
+            fp.truncate()
+        self.pos = 0
+        return True
+
+    @property
+    def size(self) -> int:
+        return self.pos
+
+    @property
+    def data(self) -> Optional[bytes]:
+        """Los bytes escritos si la salida era None."""
+        return b"".join(self._chunks) if self.target is None else None
+
+    def close(self, ok: bool = True):
+        if self.path_target:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+            if self.path != self.target and self._written:
+                if ok:
+                    os.replace(self.path, self.target)
+                elif os.path.exists(self.path):
+                    os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(exc_type is None)
+
+    def result(self, res: Optional[dict] = None):
+        """Valor de retorno: res con "data" (si hay bytes) o, sin res, los bytes/None."""
+        if res is None:
+            return self.data
+        if self.target is None:
+            res["data"] = self.data
+        return res
@@ -1,30 +1,46 @@
 # -*- coding: utf-8 -*-
-import os, shutil, difflib, subprocess
-from typing import List
-
-# Core libs
-try:
-    from pypdf import PdfReader, PdfWriter
-except Exception:
-    PdfReader = None
-    PdfWriter = None
-try:
-    import fitz  # PyMuPDF
-except Exception:
-    fitz = None
-try:
-    from PIL import Image
-except Exception:
-    Image = None
+import hashlib, io, math, os, queue, re, shutil, difflib, subprocess, threading, time, zipfile, zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 
-# ---------- Utils ----------
-def _require(cond, msg):
-    if not cond:
-        raise RuntimeError(msg)
+# Core libs: se importan al primer uso (model/lazy.py), no al cargar el módulo
+from model.lazy import lazy
+
+PdfReader = lazy("pypdf", attr="PdfReader")
+PdfWriter = lazy("pypdf", attr="PdfWriter")
+NameObject = lazy("pypdf.generic", attr="NameObject")
+fitz = lazy("pymupdf", "fitz")  # PyMuPDF >= 1.24.3 (el alias "fitz" imprime un aviso en stdout)
+Image = lazy("PIL.Image")
+ImageChops = lazy("PIL.ImageChops")
+TiffImagePlugin = lazy("PIL.TiffImagePlugin")
 
+from model.pdf_io import (Output, Source, Target, is_path, is_source, open_doc, open_stream, pdf_reader, source,
+                          source_name, source_size)
+from model.ops_base import OperationCancelled, Progress, require, tick
+from model.pdf_writer import StreamingPDFWriter, ImagePageWriter
+from model.probe import page_count, probe
+from model.telemetry import add_phase, phase
+
+# ---------- Utils ----------
+# Todas las operaciones aceptan progress(hechas, total) y cancel (cualquier
+# objeto con is_set(), p. ej. threading.Event); se revisan por página con
+# tick() (model/ops_base.py).
+# Entradas: ruta, bytes/bytearray/memoryview o archivo binario; salidas: ruta,
+# stream con write() o None. Con None devuelven los bytes (las que devuelven un
+# dict los traen en "data"; las de varios archivos, un dict nombre → bytes).
+# Ver model/pdf_io.py.
 def ensure_ext(path: str, ext: str) -> str:
     return path if path.lower().endswith(ext) else path + ext
 
+def _write_source(src, out: Output):
+    """Copia la entrada tal cual a la salida."""
+    if isinstance(src, str):
+        with open(src, "rb") as fp:
+            shutil.copyfileobj(fp, out)
+    else:
+        out.write(src)
+
 def split_ranges(ranges_str: str, max_pages: int) -> List[int]:
     result = set()
     for part in ranges_str.replace(" ", "").split(","):
@@ -40,104 +56,1069 @@ def split_ranges(ranges_str: str, max_pages: int) -> List[int]:
             if 1 <= p <= max_pages: result.add(p - 1)
     return sorted(result)
 
+def pdf_info(path: str) -> dict:
+    """Páginas, tamaño, cifrado, versión... de un PDF (para listas y totales); ver model/probe.py."""
+    return probe(path)
+
+# ---------- Render paralelo ----------
+# Cada worker abre su propio documento fitz y procesa un rango contiguo de
+# páginas; los resultados se devuelven en orden de página. Con workers=1 se
+# ejecuta exactamente el mismo código en el proceso actual.
+PAGES_PER_WORKER_MIN = 4
+
+def cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def default_workers(page_count: int) -> int:
+    cpus = cpu_count()
+    return max(1, min(cpus, page_count // PAGES_PER_WORKER_MIN))
+
+def _page_chunks(pages: List[int], workers: int) -> List[List[int]]:
+    # Varios trozos por worker para repartir bien la carga
+    n = max(1, min(len(pages), workers * 4))
+    size = -(-len(pages) // n)
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+# Las entradas en memoria viajan una vez por worker (initializer), no con cada tarea
+_WORKER_SOURCES: tuple = ()
+
+def _init_worker_sources(sources: tuple):
+    global _WORKER_SOURCES
+    _WORKER_SOURCES = sources
+
+def _source_pool(workers: int, sources: list):
+    """Pool de procesos y una referencia enviable (ruta o índice) por entrada."""
+    memory = [bytes(s) for s in sources if not isinstance(s, str)]
+    refs, k = [], 0
+    for s in sources:
+        refs.append(s if isinstance(s, str) else k)
+        k += not isinstance(s, str)
+    if not memory:
+        return ProcessPoolExecutor(max_workers=workers), refs
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_sources, initargs=(tuple(memory),)), refs
+
+def _open_ref(ref):
+    return open_doc(_WORKER_SOURCES[ref] if isinstance(ref, int) else ref)
+
+def _run_page_chunk(task, opener=open_doc):
+    input_pdf, fn, pages, args = task
+    doc = opener(input_pdf)
+    try:
+        return [fn(doc[p], p, *args) for p in pages]
+    finally:
+        doc.close()
+
+def _run_page_chunk_ref(task):
+    return _run_page_chunk(task, _open_ref)
+
+def map_pages(input_pdf: Source, fn, args: tuple = (), pages: Optional[List[int]] = None, workers: Optional[int] = None,
+              cancel=None):
+    """Aplica fn(page, index, *args) a cada página y devuelve los resultados en orden.
+
+    fn debe ser una función a nivel de módulo (se envía a otros procesos).
+    cancel se revisa entre páginas (en serie) o entre trozos (en paralelo).
+    """
+    require(fitz, "PyMuPDF no instalado")
+    src = source(input_pdf)
+    if pages is None:
+        with open_doc(src) as doc:
+            pages = list(range(doc.page_count))
+    if workers is None:
+        workers = default_workers(len(pages))
+    chunks = _page_chunks(pages, workers)
+    if workers <= 1 or len(chunks) <= 1:
+        with open_doc(src) as doc:
+            for p in pages:
+                tick(None, cancel, 0, 0)
+                yield fn(doc[p], p, *args)
+        return
+    pool, (ref,) = _source_pool(workers, [src])
+    todo, pending = iter(chunks), deque()
+
+    def submit():
+        chunk = next(todo, None)
+        if chunk is not None:
+            pending.append(pool.submit(_run_page_chunk_ref, (ref, fn, chunk, args)))
+    try:
+        # Ventana acotada: a lo sumo dos trozos en vuelo por worker, así los
+        # resultados no se acumulan en memoria si el consumidor va más lento
+        for _ in range(workers * 2):
+            submit()
+        while pending:
+            tick(None, cancel, 0, 0)
+            result = pending.popleft().result()
+            submit()
+            yield from result
+    finally:
+        # Si el consumidor se detiene (p. ej. cancelación) no se arrancan más trozos
+        pool.shutdown(wait=True, cancel_futures=True)
+
+# ---------- Códecs raster ----------
+_JPEG_COLORSPACES = {"L": "/DeviceGray", "RGB": "/DeviceRGB", "CMYK": "/DeviceCMYK"}
+RASTER_CODECS = ("auto", "jpeg", "gray", "bilevel")
+# Fracción máxima de tonos intermedios para tratar una página como blanco y negro
+BILEVEL_MAX_MIDTONES = 0.01
+
+def _image_entries(img, colorspace: str, filt: Optional[str] = None, bpc: int = 8) -> str:
+    entries = f"/Width {img.width} /Height {img.height} /ColorSpace {colorspace} /BitsPerComponent {bpc}"
+    if filt:
+        entries += f" /Filter {filt}"
+    if colorspace == "/DeviceCMYK" and "adobe" in img.info:
+        entries += " /Decode [1 0 1 0 1 0 1 0]"
+    return entries
+
+def _is_gray(img) -> bool:
+    r, g, b = img.split()
+    return ImageChops.difference(r, g).getbbox() is None and ImageChops.difference(g, b).getbbox() is None
+
+def _is_bilevel(gray) -> bool:
+    hist = gray.histogram()
+    midtones = sum(hist[32:224])
+    return midtones <= BILEVEL_MAX_MIDTONES * gray.width * gray.height
+
+def _encode_jpeg(img, quality: int):
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=quality)
+    return _image_entries(img, _JPEG_COLORSPACES[img.mode], "/DCTDecode"), buf.getvalue()
+
+def _encode_bilevel(gray):
+    # 1 bit por píxel + Flate; en modo "1" de Pillow 1 = blanco, igual que DeviceGray
+    bw = gray.convert("1", dither=Image.Dither.NONE)
+    return _image_entries(bw, "/DeviceGray", "/FlateDecode", bpc=1), zlib.compress(bw.tobytes(), 9)
+
+def encode_page(page, index: int, zoom: float, codec: str, quality: int):
+    """Página como imagen para ImagePageWriter: (ancho, alto, códec usado, entradas, datos)."""
+    # Las fases solo se registran en el proceso del trabajo (workers=1)
+    with phase("render"):
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        del pix
+    candidates = {}
+    if codec in ("auto", "jpeg"):
+        candidates["jpeg"] = lambda: _encode_jpeg(img, quality)
+    gray = None
+    if codec in ("gray", "bilevel") or (codec == "auto" and _is_gray(img)):
+        gray = img.convert("L")
+        candidates["gray"] = lambda: _encode_jpeg(gray, quality)
+    if codec == "bilevel" or (codec == "auto" and gray is not None and _is_bilevel(gray)):
+        candidates["bilevel"] = lambda: _encode_bilevel(gray)
+    if codec != "auto":
+        candidates = {codec: candidates[codec]}
+    # Se queda con la codificación más pequeña
+    best = None
+    with phase("encode"):
+        for name, encode in candidates.items():
+            entries, data = encode()
+            if best is None or len(data) < len(best[2]):
+                best = (name, entries, data)
+    rect = page.rect
+    return (rect.width, rect.height) + best
+
+# ---------- Fusión rápida (PyMuPDF) ----------
+# Cada entrada se copia en bloque con insert_pdf y se cierra enseguida (un solo
+# archivo de origen abierto a la vez). Los objetos recién copiados se comparan
+# por hash con los de entradas anteriores: fuentes, imágenes y recursos
+# idénticos quedan una sola vez en la salida.
+_REF = re.compile(r"\b(\d+) 0 R\b")
+# Objetos ligados a su posición en el documento: nunca se fusionan
+_NO_DEDUPE = re.compile(r"/(Parent|P|Rect|Annots)\b|/Type\s*/(Page|Pages|Catalog|Outlines)\b")
+def _remap_refs(text: str, remap: dict) -> str:
+    return _REF.sub(lambda m: f"{remap.get(int(m.group(1)), int(m.group(1)))} 0 R", text)
+
+def dedupe_new_objects(doc, start: int, seen: dict) -> int:
+    """Unifica los objetos desde start con los idénticos ya vistos (seen: hash → xref); devuelve cuántos."""
+    end = doc.xref_length()
+    canon = {}
+
+    def visit(xref: int) -> int:
+        # Post-orden: primero se unifican los objetos referenciados, así un
+        # FontDescriptor cuyo FontFile ya existía queda idéntico al anterior
+        if xref in canon:
+            return canon[xref]
+        canon[xref] = xref  # evita ciclos
+        text = doc.xref_object(xref, compressed=True)
+        if _NO_DEDUPE.search(text):
+            return xref
+        for m in _REF.finditer(text):
+            ref = int(m.group(1))
+            if start <= ref < end:
+                visit(ref)
+        h = hashlib.blake2b(_remap_refs(text, canon).encode("utf-8", "surrogateescape"), digest_size=20)
+        if doc.xref_is_stream(xref):
+            h.update(doc.xref_stream_raw(xref))
+        canon[xref] = seen.setdefault(h.digest(), xref)
+        return canon[xref]
+
+    for xref in range(start, end):
+        visit(xref)
+    remap = {x: c for x, c in canon.items() if c != x}
+    if remap:
+        # Los objetos nuevos que quedan apuntan a las copias canónicas
+        for xref in range(start, end):
+            if xref in remap:
+                continue
+            for key in doc.xref_get_keys(xref):
+                kind, value = doc.xref_get_key(xref, key)
+                if kind in ("xref", "array", "dict") and _REF.search(value):
+                    new = _remap_refs(value, remap)
+                    if new != value:
+                        doc.xref_set_key(xref, key, new)
+    return len(remap)
+
+def shift_toc(toc: list, offset: int) -> list:
+    """Marcadores (get_toc(simple=False)) desplazados offset páginas."""
+    shifted = []
+    for lvl, title, page, *dest in toc:
+        if dest and isinstance(dest[0], dict) and "page" in dest[0]:
+            dest = [dict(dest[0], page=dest[0]["page"] + offset)]
+        shifted.append([lvl, title, page + offset if page > 0 else page] + dest)
+    return shifted
+
+def _merge_pdfs_fitz(inputs: List[Source], output: Target, progress: Progress, cancel) -> dict:
+    dst = fitz.open()
+    toc, seen, merged = [], {}, 0
+    for i, f in enumerate(inputs):
+        tick(progress, cancel, i, len(inputs))
+        f = source(f)
+        with open_doc(f) as src:
+            require(not src.needs_pass, f"PDF protegido con contraseña: {source_name(f, i)}")
+            offset, start = dst.page_count, dst.xref_length()
+            toc.extend(shift_toc(src.get_toc(simple=False), offset))
+            with phase("copy"):
+                dst.insert_pdf(src)
+        with phase("dedupe"):
+            merged += dedupe_new_objects(dst, start, seen)
+    if toc:
+        dst.set_toc(toc)
+    # garbage=2 descarta los duplicados ya sin referencias; 3+ compara todo contra todo (cuadrático)
+    with phase("save"), Output(output) as out:
+        out.save(dst, garbage=2, deflate=True, use_objstms=True)
+    pages = dst.page_count
+    dst.close()
+    return out.result({"pages": pages, "deduplicated": merged})
+
+# ---------- División en una pasada (PyMuPDF) ----------
+# El origen se abre una vez por worker y cada salida recibe solo los objetos
+# que sus páginas alcanzan (insert_pdf copia el grafo de la página) sin los
+# recursos que el contenido no usa.
+SPLIT_MODES = ("pages", "bookmarks", "size")
+_RES_CATEGORIES = ("Font", "XObject", "ExtGState", "Pattern", "Shading", "ColorSpace", "Properties")
+_RES_ENTRY = re.compile(r"/([^\s/<>\[\]()]+)\s*(\d+ 0 R)")
+_CONTENT_NAME = re.compile(rb"/([^\s/<>\[\]()%{}]+)")
+_BACK_REFS = re.compile(r"/(Parent|P)\s*\d+ 0 R")
+Group = Tuple[str, List[int]]
+
+def _runs(pages: List[int]) -> List[Tuple[int, int]]:
+    runs = []
+    for p in pages:
+        if runs and runs[-1][1] == p - 1:
+            runs[-1][1] = p
+        else:
+            runs.append([p, p])
+    return [tuple(r) for r in runs]
+
+def _prune_resources(doc):
+    # Nombres usados por el contenido de todas las páginas que comparten cada diccionario /Resources
+    used = {}
+    for page in doc:
+        kind, value = doc.xref_get_key(page.xref, "Resources")
+        owner = int(value.split()[0]) if kind == "xref" else page.xref
+        names = used.setdefault((owner, kind == "xref"), set())
+        names.update(n.decode("latin-1") for n in _CONTENT_NAME.findall(page.read_contents()))
+    for (owner, indirect), names in used.items():
+        for cat in _RES_CATEGORIES:
+            path = cat if indirect else f"Resources/{cat}"
+            kind, value = doc.xref_get_key(owner, path)
+            if kind != "dict":
+                continue
+            entries = _RES_ENTRY.findall(value)
+            # Solo se tocan diccionarios formados por referencias indirectas simples
+            if len(entries) != value.count(" 0 R"):
+                continue
+            kept = [(n, r) for n, r in entries if n in names]
+            if len(kept) < len(entries):
+                doc.xref_set_key(owner, path, "<<" + "".join(f"/{n} {r}" for n, r in kept) + ">>")
+
+def _write_group(src, path: Optional[str], pages: List[int]):
+    # Sin ruta devuelve los bytes de la parte
+    out = fitz.open()
+    runs = _runs(pages)
+    for i, (a, b) in enumerate(runs):
+        # final=False conserva el mapa de objetos copiados entre tramos del mismo origen
+        out.insert_pdf(src, from_page=a, to_page=b, final=(i == len(runs) - 1))
+    _prune_resources(out)
+    options = dict(garbage=2, deflate=True, use_objstms=True)
+    if path is None:
+        data = out.tobytes(**options)
+    else:
+        out.save(path, **options)
+    out.close()
+    return data if path is None else path
+
+def _write_groups_chunk(task):
+    ref, groups = task
+    with _open_ref(ref) as src:
+        return [_write_group(src, path, pages) for path, pages in groups]
+
+def _write_page_groups(input_pdf, groups: List[Group], out_dir: Optional[str], workers: Optional[int],
+                       progress: Progress, cancel) -> Union[List[str], Dict[str, bytes]]:
+    """Escribe cada grupo (nombre, páginas) en out_dir; con out_dir=None devuelve {nombre: bytes}."""
+    targets = [(None if out_dir is None else os.path.join(out_dir, name), pages) for name, pages in groups]
+    if workers is None:
+        workers = default_workers(len(groups))
+    outputs = []
+    if workers <= 1 or len(groups) <= 1:
+        with open_doc(input_pdf) as src:
+            for i, (path, pages) in enumerate(targets):
+                tick(progress, cancel, i, len(groups))
+                outputs.append(_write_group(src, path, pages))
+    else:
+        pool, (ref,) = _source_pool(workers, [input_pdf])
+        try:
+            for parts in pool.map(_write_groups_chunk, [(ref, chunk) for chunk in _page_chunks(targets, workers)]):
+                tick(progress, cancel, len(outputs), len(groups))
+                outputs.extend(parts)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    return outputs if out_dir is not None else {name: data for (name, _), data in zip(groups, outputs)}
+
+def _safe_name(title: str) -> str:
+    name = re.sub(r'[\\/:*?"<>|\s]+', "_", title).strip("._")
+    return name[:60] or "sin_titulo"
+
+def _plan_bookmarks(doc, level: int) -> List[Tuple[str, int, int]]:
+    # Un corte por página: gana el primer marcador (el de nivel superior)
+    starts = {}
+    for lvl, title, page in doc.get_toc():
+        if lvl <= level and page > 0:
+            starts.setdefault(page - 1, title)
+    marks = sorted(starts.items())
+    require(bool(marks), "El PDF no tiene marcadores en ese nivel")
+    plan = []
+    if marks[0][0] > 0:
+        plan.append(("inicio", 0, marks[0][0] - 1))
+    for i, (start, title) in enumerate(marks):
+        end = marks[i + 1][0] - 1 if i + 1 < len(marks) else doc.page_count - 1
+        if end >= start:
+            plan.append((title, start, end))
+    return plan
+
+def _plan_size(doc, max_bytes: int) -> List[List[int]]:
+    # Estima el tamaño de cada salida sumando los objetos que alcanza cada página;
+    # los recursos compartidos dentro del mismo grupo cuentan una vez
+    sizes, reach_cache = {}, {}
+
+    def obj_size(xref):
+        if xref not in sizes:
+            text = doc.xref_object(xref, compressed=True)
+            length = 0
+            if doc.xref_is_stream(xref):
+                kind, value = doc.xref_get_key(xref, "Length")
+                length = int(value) if kind == "int" else len(doc.xref_stream_raw(xref))
+            sizes[xref] = len(text) + length
+        return sizes[xref]
+
+    def reach(page_xref):
+        seen, stack = set(), [page_xref]
+        while stack:
+            x = stack.pop()
+            if x in seen:
+                continue
+            seen.add(x)
+            text = _BACK_REFS.sub("", doc.xref_object(x, compressed=True))
+            for m in _REF.finditer(text):
+                ref = int(m.group(1))
+                if ref not in seen and 0 < ref < doc.xref_length() and doc.xref_get_key(ref, "Type")[1] != "/Page":
+                    stack.append(ref)
+        return seen
+
+    groups, current, objs, total = [], [], set(), 0
+    for pno in range(doc.page_count):
+        new = reach(doc[pno].xref) - objs
+        added = sum(obj_size(x) for x in new)
+        if current and total + added > max_bytes:
+            groups.append(current)
+            current, objs, total = [], set(), 0
+            new = reach(doc[pno].xref)
+            added = sum(obj_size(x) for x in new)
+        current.append(pno)
+        objs |= new
+        total += added
+    if current:
+        groups.append(current)
+    return groups
+
+def split_pdf_by(input_pdf: Source, out_dir: Optional[str], mode: str = "pages", every: int = 1, level: int = 1,
+                 max_bytes: int = 10 * 1024 * 1024, workers: Optional[int] = None,
+                 progress: Progress = None, cancel=None) -> Union[List[str], Dict[str, bytes]]:
+    """Divide en bloques de N páginas, por marcadores o por tamaño máximo de archivo.
+
+    Devuelve las rutas creadas en out_dir o, con out_dir=None, {nombre: bytes}.
+    """
+    require(fitz, "PyMuPDF no instalado")
+    require(mode in SPLIT_MODES, f"Modo de división desconocido: {mode}")
+    src = source(input_pdf)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    with phase("plan"), open_doc(src) as doc:
+        n = doc.page_count
+        if mode == "pages":
+            every = max(1, int(every))
+            groups = [(f"paginas_{a + 1:04d}-{min(a + every, n):04d}.pdf", list(range(a, min(a + every, n))))
+                      for a in range(0, n, every)]
+        elif mode == "bookmarks":
+            groups = [(f"{i + 1:03d}_{_safe_name(title)}.pdf", list(range(a, b + 1)))
+                      for i, (title, a, b) in enumerate(_plan_bookmarks(doc, level))]
+        else:
+            groups = [(f"parte_{i + 1:04d}.pdf", pages) for i, pages in enumerate(_plan_size(doc, int(max_bytes)))]
+    with phase("write"):
+        return _write_page_groups(src, groups, out_dir, workers, progress, cancel)
+
 # ---------- Ops principales ----------
-def merge_pdfs(inputs: List[str], output: str) -> None:
-    _require(PdfWriter is not None, "pypdf no instalado")
-    _require(len(inputs) >= 2, "Se requieren al menos 2 PDFs")
+def merge_pdfs(inputs: List[Source], output: Target, progress: Progress = None, cancel=None) -> dict:
+    require(len(inputs) >= 2, "Se requieren al menos 2 PDFs")
+    if fitz:
+        return _merge_pdfs_fitz(inputs, output, progress, cancel)
+    require(PdfWriter, "pypdf no instalado")
     writer = PdfWriter()
-    for f in inputs:
-        reader = PdfReader(f)
+    readers = [pdf_reader(source(f)) for f in inputs]
+    total = sum(len(r.pages) for r in readers)
+    done = 0
+    for reader in readers:
         for page in reader.pages:
+            tick(progress, cancel, done, total)
             writer.add_page(page)
-    with open(output, "wb") as fp:
-        writer.write(fp)
+            done += 1
+    with Output(output) as out:
+        writer.write(out)
+    return out.result({"pages": total, "deduplicated": 0})
 
-def split_pdf(input_pdf: str, ranges: str, out_dir: str, merge_output: bool = False, output_filename: str = "split_merged.pdf") -> List[str]:
-    _require(PdfReader is not None and PdfWriter is not None, "pypdf no instalado")
-    os.makedirs(out_dir, exist_ok=True)
-    reader = PdfReader(input_pdf)
+def split_pdf(input_pdf: Source, ranges: str, out_dir: Optional[str], merge_output: bool = False,
+              output_filename: str = "split_merged.pdf", progress: Progress = None, cancel=None,
+              workers: Optional[int] = None) -> Union[List[str], Dict[str, bytes]]:
+    """Páginas de los rangos, sueltas o en un solo PDF; con out_dir=None devuelve {nombre: bytes}."""
+    src = source(input_pdf)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    if fitz:
+        pages = split_ranges(ranges, page_count(src))
+        require(bool(pages), "Los rangos no seleccionaron ninguna página")
+        if merge_output:
+            groups = [(output_filename, pages)]
+        else:
+            groups = [(f"page_{p+1:04d}.pdf", [p]) for p in pages]
+        with phase("write"):
+            return _write_page_groups(src, groups, out_dir, workers, progress, cancel)
+    require(PdfReader and PdfWriter, "pypdf no instalado")
+    reader = pdf_reader(src)
     pages = split_ranges(ranges, len(reader.pages))
-    _require(bool(pages), "Los rangos no seleccionaron ninguna página")
-    outputs = []
-    
-    if merge_output:
+    require(bool(pages), "Los rangos no seleccionaron ninguna página")
+    groups = [(output_filename, pages)] if merge_output else [(f"page_{p+1:04d}.pdf", [p]) for p in pages]
+    outputs, done = {}, 0
+    for name, group in groups:
         writer = PdfWriter()
-        for p in pages:
+        for p in group:
+            tick(progress, cancel, done, len(pages))
             writer.add_page(reader.pages[p])
-        out = os.path.join(out_dir, output_filename)
-        with open(out, "wb") as fp:
-            writer.write(fp)
-        outputs.append(out)
-    else:
-        for p in pages:
-            writer = PdfWriter()
-            writer.add_page(reader.pages[p])
-            out = os.path.join(out_dir, f"page_{p+1:04d}.pdf")
-            with open(out, "wb") as fp:
-                writer.write(fp)
-            outputs.append(out)
-    return outputs
-
-def rotate_pdf(input_pdf: str, output_pdf: str, angle: int) -> None:
-    _require(PdfReader is not None and PdfWriter is not None, "pypdf no instalado")
-    reader = PdfReader(input_pdf)
+            done += 1
+        path = None if out_dir is None else os.path.join(out_dir, name)
+        with Output(path) as out:
+            writer.write(out)
+        outputs[name] = out.data if path is None else path
+    return outputs if out_dir is None else list(outputs.values())
+
+def parse_rotation(spec, max_pages: int) -> dict:
+    """Ángulo por página (índice base 0) desde 90 o "1-3,5:90; 7-:180" (rangos como split_ranges)."""
+    if isinstance(spec, int) or str(spec).strip().lstrip("-").isdigit():
+        spec = f"1-:{int(spec)}"
+    angles = {}
+    for part in str(spec).split(";"):
+        if not part.strip():
+            continue
+        require(":" in part, f"Falta el ángulo en '{part.strip()}' (ej. 1-3:90)")
+        ranges, angle = part.rsplit(":", 1)
+        angle = int(angle)
+        require(angle % 90 == 0, f"El ángulo debe ser múltiplo de 90: {angle}")
+        for p in split_ranges(ranges, max_pages):
+            angles[p] = angle % 360
+    return angles
+
+def rotate_pdf(input_pdf: Source, output_pdf: Target, angle, progress: Progress = None, cancel=None) -> Optional[bytes]:
+    require(PdfReader and PdfWriter, "pypdf no instalado")
+    with phase("open"):
+        reader = pdf_reader(source(input_pdf))
+        total = len(reader.pages)
     writer = PdfWriter()
-    for page in reader.pages:
-        page.rotate(angle)
-        writer.add_page(page)
-    with open(output_pdf, "wb") as fp:
-        writer.write(fp)
-
-def remove_password(input_pdf: str, output_pdf: str, password: str) -> bool:
-    _require(PdfReader is not None and PdfWriter is not None, "pypdf no instalado")
-    reader = PdfReader(input_pdf)
-    if reader.is_encrypted:
-        success = reader.decrypt(password)
-        if not success:
-            return False
+    angles = parse_rotation(angle, total)
+    with phase("pages"):
+        for i, page in enumerate(reader.pages):
+            tick(progress, cancel, i, total)
+            if angles.get(i):
+                page.rotate(angles[i])
+            writer.add_page(page)
+    # pypdf lee la entrada a medida que escribe: vía .tmp, la salida puede ser la entrada
+    with phase("save"), Output(output_pdf, atomic=True) as out:
+        writer.write(out)
+    return out.result()
+
+# Rotación como actualización incremental: se agregan al final solo los
+# diccionarios de página modificados y una sección xref nueva (tabla clásica
+# o xref stream, igual que la última revisión). El costo depende de las
+# páginas tocadas y no del tamaño del archivo; con output == input no se
+# copia nada. La revisión se arma en memoria y se agrega tras una copia del
+# original (archivo, stream o bytes).
+_STARTXREF = re.compile(rb"startxref\s+(\d+)\s+%%EOF")
+
+def _last_startxref(fp) -> int:
+    fp.seek(0, os.SEEK_END)
+    size = fp.tell()
+    fp.seek(max(0, size - 4096))
+    found = _STARTXREF.findall(fp.read())
+    require(bool(found), "No se encontró startxref al final del PDF")
+    return int(found[-1])
+
+def _uses_xref_stream(fp, startxref: int) -> bool:
+    fp.seek(startxref)
+    return not fp.read(32).lstrip().startswith(b"xref")
+
+def _pdf_value(obj) -> bytes:
+    buf = io.BytesIO()
+    obj.write_to_stream(buf)
+    return buf.getvalue()
+
+def rotate_pdf_incremental(input_pdf: Source, output_pdf: Target, angle, progress: Progress = None, cancel=None) -> dict:
+    """Rota páginas agregando una revisión al final del archivo. angle: 90 o "1-3:90; 5-:180"."""
+    require(PdfReader, "pypdf no instalado")
+    src = source(input_pdf)
+    with phase("read"), open_stream(src) as fp:
+        reader = PdfReader(fp)
+        require(not reader.is_encrypted, "La actualización incremental no admite PDFs cifrados")
+        total = len(reader.pages)
+        angles = parse_rotation(angle, total)
+        prev = _last_startxref(fp)
+        xref_stream = _uses_xref_stream(fp, prev)
+        changed = []
+        for i, (p, a) in enumerate(sorted(angles.items())):
+            tick(progress, cancel, i, len(angles))
+            if not a:
+                continue
+            page = reader.pages[p]
+            ref = page.indirect_reference
+            body = dict(page)
+            body["/Rotate"] = (page.rotation + a) % 360
+            changed.append((ref.idnum, ref.generation, body))
+        trailer = reader.trailer
+        size = int(trailer["/Size"])
+        keep = {k: _pdf_value(trailer.raw_get(k)) for k in ("/Root", "/Info", "/ID") if k in trailer}  # referencias, sin resolver
+        fp.seek(-1, os.SEEK_END)
+        last = fp.read(1)
+    out = io.BytesIO()
+    if changed:
+        # Las posiciones cuentan desde el inicio del archivo: el original va delante
+        base = source_size(src)
+        if last not in b"\r\n":
+            out.write(b"\n")
+        offsets = []
+        for num, gen, body in changed:
+            offsets.append((num, base + out.tell(), gen))
+            entries = b" ".join(_pdf_value(NameObject(k)) + b" " + (b"%d" % v if isinstance(v, int) else _pdf_value(v))
+                                for k, v in body.items())
+            out.write(b"%d %d obj\n<< %s >>\nendobj\n" % (num, gen, entries))
+        extra = b"".join(k.encode("ascii") + b" " + v + b" " for k, v in keep.items())
+        xref_pos = base + out.tell()
+        if xref_stream:
+            # El propio xref stream ocupa el siguiente número libre
+            offsets.append((size, xref_pos, 0))
+            offsets.sort()  # las subsecciones de /Index van en orden de número de objeto
+            rows = b"".join(b"\x01" + off.to_bytes(5, "big") + gen.to_bytes(2, "big") for _, off, gen in offsets)
+            data = zlib.compress(rows)
+            index = b" ".join(b"%d 1" % num for num, _, _ in offsets)
+            out.write(b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 5 2] /Index [%s] /Prev %d %s/Filter /FlateDecode /Length %d >>\nstream\n"
+                      % (size, size + 1, index, prev, extra, len(data)) + data + b"\nendstream\nendobj\n")
+        else:
+            # Con la entrada 0 (cabeza de la lista de libres) como hacen la mayoría de los escritores
+            lines = [b"xref\n0 1\n0000000000 65535 f \n"]
+            for num, off, gen in sorted(offsets):
+                lines.append(b"%d 1\n%010d %05d n \n" % (num, off, gen))
+            out.write(b"".join(lines) + b"trailer\n<< /Size %d /Prev %d %s>>\n" % (size, prev, extra))
+        out.write(b"startxref\n%d\n%%%%EOF\n" % xref_pos)
+    revision = out.getvalue()
+    res = {"pages": len(changed), "appended_bytes": len(revision)}
+    if isinstance(src, str) and is_path(output_pdf) and os.path.abspath(output_pdf) == os.path.abspath(src):
+        # En el mismo archivo solo se agrega la revisión
+        if revision:
+            with open(output_pdf, "ab") as fp:
+                fp.write(revision)
+    else:
+        # Original + revisión vía .tmp: si algo falla, el destino no queda a medias
+        with Output(output_pdf, atomic=True) as dst:
+            _write_source(src, dst)
+            dst.write(revision)
+        dst.result(res)
+    tick(progress, None, len(angles), len(angles))
+    return res
+
+def remove_password(input_pdf: Source, output_pdf: Target, password: str, progress: Progress = None,
+                    cancel=None) -> Union[bool, bytes]:
+    """Guarda sin cifrado; False si la contraseña no sirve (con output=None, los bytes si sirve)."""
+    require(PdfReader and PdfWriter, "pypdf no instalado")
+    with phase("open"):
+        reader = pdf_reader(source(input_pdf))
+        if reader.is_encrypted:
+            success = reader.decrypt(password)
+            if not success:
+                return False
     writer = PdfWriter()
-    for page in reader.pages:
-        writer.add_page(page)
-    with open(output_pdf, "wb") as fp:
-        writer.write(fp)
-    return True
+    total = len(reader.pages)
+    with phase("pages"):
+        for i, page in enumerate(reader.pages):
+            tick(progress, cancel, i, total)
+            writer.add_page(page)
+    # pypdf lee la entrada a medida que escribe: vía .tmp, la salida puede ser la entrada
+    with phase("save"), Output(output_pdf, atomic=True) as out:
+        writer.write(out)
+    return out.result() if output_pdf is None else True
+
+def unlock_with_candidates(input_pdf: Source, output_pdf: Target, passwords: List[str],
+                           progress: Progress = None, cancel=None) -> dict:
+    """Prueba contraseñas candidatas y guarda sin cifrado con la primera que sirve.
+
+    El archivo se abre una vez; cada intento solo verifica la clave contra el
+    diccionario de cifrado. Devuelve {"status", "password_index", "access", "attempts"}
+    con status "unlocked", "unrestricted" (solo tenía contraseña de propietario),
+    "not_encrypted" o "no_match"; solo se escribe output_pdf en los dos primeros
+    (con output_pdf=None, los bytes van en "data").
+    """
+    require(fitz, "PyMuPDF no instalado")
+    with Output(output_pdf, atomic=True) as out, open_doc(source(input_pdf)) as doc:
+        res = {"status": "unrestricted", "password_index": None, "access": None, "attempts": 0}
+        if doc.needs_pass:
+            res["status"] = "no_match"
+            for i, password in enumerate(passwords):
+                tick(progress, cancel, i, len(passwords))
+                res["attempts"] += 1
+                # 2 = usuario, 4 = propietario, 6 = ambas
+                with phase("authenticate"):
+                    access = doc.authenticate(password)
+                if access:
+                    res.update(status="unlocked", password_index=i, access="owner" if access & 4 else "user")
+                    break
+            if res["status"] == "no_match":
+                return res
+        elif not (doc.metadata or {}).get("encryption"):
+            res["status"] = "not_encrypted"
+            return res
+        with phase("save"):
+            out.save(doc, encryption=fitz.PDF_ENCRYPT_NONE, garbage=1)
+    return out.result(res)
 
-def compress_pdf_lossless(input_pdf: str, output_pdf: str):
-    _require(fitz is not None, "PyMuPDF no instalado")
-    doc = fitz.open(input_pdf)
-    doc.save(output_pdf, deflate=True, clean=True, garbage=4, use_objstm=True, linear=True)
+def compress_pdf_lossless(input_pdf: Source, output_pdf: Target, progress: Progress = None,
+                          cancel=None) -> Optional[bytes]:
+    require(fitz, "PyMuPDF no instalado")
+    # Un solo guardado de MuPDF: no hay bucle por página que revisar
+    tick(progress, cancel, 0, 1)
+    with phase("open"):
+        doc = open_doc(source(input_pdf))
+    with phase("save"), Output(output_pdf) as out:
+        out.save(doc, deflate=True, clean=True, garbage=4, use_objstms=True)
     doc.close()
+    tick(progress, None, 1, 1)
+    return out.result()
 
-def compress_pdf_rasterize(input_pdf: str, output_pdf: str, dpi: int = 150):
-    _require(fitz is not None, "PyMuPDF no instalado")
-    src = fitz.open(input_pdf)
-    dst = fitz.open()
-    zoom = dpi / 72.0
-    mat = fitz.Matrix(zoom, zoom)
-    for page in src:
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        img_pdf = fitz.open("pdf", fitz.Image(pix.samples, pix.width, pix.height, pix.stride, pix.n).pdf_bytes())
-        dst.insert_pdf(img_pdf)
-    dst.save(output_pdf, deflate=True, clean=True, garbage=4, linear=True)
-    src.close(); dst.close()
-
-def pdf_to_images(input_pdf: str, out_dir: str, dpi: int = 150, fmt: str = "png") -> List[str]:
-    _require(fitz is not None, "PyMuPDF no instalado")
-    os.makedirs(out_dir, exist_ok=True)
-    doc = fitz.open(input_pdf)
-    paths = []
+def compress_pdf_rasterize(input_pdf: Source, output_pdf: Target, dpi: int = 150, codec: str = "auto",
+                           quality: int = 75, workers: Optional[int] = None, progress: Progress = None, cancel=None) -> dict:
+    require(fitz, "PyMuPDF no instalado")
+    require(Image, "Pillow no instalado")
+    require(codec in RASTER_CODECS, f"Códec desconocido: {codec}")
     zoom = dpi / 72.0
-    mat = fitz.Matrix(zoom, zoom)
-    for i, page in enumerate(doc, start=1):
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        out = os.path.join(out_dir, f"page_{i:04d}.{fmt}")
-        pix.save(out); paths.append(out)
+    src = source(input_pdf)
+    with open_doc(src) as doc:
+        total = doc.page_count
+    used = {}
+    # Cada página se codifica en los workers y se escribe tal cual: sin recompresión al guardar
+    with Output(output_pdf) as out:
+        pages = ImagePageWriter(StreamingPDFWriter(out))
+        encoded = map_pages(src, encode_page, (zoom, codec, quality), workers=workers, cancel=cancel)
+        for i, (width, height, name, entries, data) in enumerate(encoded):
+            tick(progress, cancel, i, total)
+            with phase("write"):
+                pages.add_image_page(width, height, entries, data)
+            used[name] = used.get(name, 0) + 1
+        pages.close()
+        size_in = source_size(src)
+        # auto busca el archivo más chico: si rasterizar no reduce (p. ej. un PDF de texto), queda el original
+        kept = codec == "auto" and out.size >= size_in
+        if kept:
+            require(out.rewind(), "Rasterizar no reduce el tamaño y la salida no permite reescribirse; elija un códec")
+            _write_source(src, out)
+            used = {}
+    size_out = out.size
+    return out.result({"input_bytes": size_in, "output_bytes": size_out, "ratio": size_out / size_in if size_in else 0.0,
+                       "codecs": used, "kept_original": kept})
+
+# ---------- Reducción selectiva de imágenes ----------
+# Solo se recomprimen las imágenes cuya resolución efectiva supera el objetivo;
+# texto, fuentes y vectores quedan intactos.
+DPI_TOLERANCE = 1.1
+
+def _placement_dpi(info: dict) -> float:
+    a, b, c, d = info["transform"][:4]
+    shown_w, shown_h = math.hypot(a, b) / 72.0, math.hypot(c, d) / 72.0
+    if not shown_w or not shown_h:
+        return 0.0
+    return min(info["width"] / shown_w, info["height"] / shown_h)
+
+def image_dpis(doc, progress: Progress = None, cancel=None) -> dict:
+    # xref -> DPI efectivo más bajo entre todas sus apariciones (la más grande manda)
+    dpis = {}
+    total = doc.page_count
+    for i, page in enumerate(doc):
+        # El recorrido cuenta como la primera mitad del progreso
+        tick(progress, cancel, i, 2 * total)
+        for info in page.get_image_info(xrefs=True):
+            xref = info.get("xref")
+            if not xref:
+                continue
+            dpi = _placement_dpi(info)
+            dpis[xref] = min(dpis.get(xref, dpi), dpi)
+    return dpis
+
+def downsample_image(doc, xref: int, scale: float, quality: int) -> bool:
+    """Reemplaza la imagen xref por una reducida a scale; False si no se toca (máscaras, 1 bit)."""
+    if doc.xref_get_key(xref, "ImageMask")[1] == "true" or doc.xref_get_key(xref, "BitsPerComponent")[1] == "1":
+        return False
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    mode = "L" if pix.n == 1 else "RGB"
+    img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+    del pix
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    img = img.resize(size, Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=quality)
+    data = buf.getvalue()
+    if len(data) >= len(doc.xref_stream_raw(xref)):
+        return False
+    doc.update_stream(xref, data, compress=False)
+    for key, value in (("Filter", "/DCTDecode"), ("DecodeParms", "null"), ("Decode", "null"),
+                       ("Width", str(size[0])), ("Height", str(size[1])), ("BitsPerComponent", "8"),
+                       ("ColorSpace", "/DeviceGray" if mode == "L" else "/DeviceRGB")):
+        doc.xref_set_key(xref, key, value)
+    return True
+
+def compress_pdf_images(input_pdf: Source, output_pdf: Target, dpi: int = 150, quality: int = 75,
+                        progress: Progress = None, cancel=None) -> dict:
+    require(fitz, "PyMuPDF no instalado")
+    require(Image, "Pillow no instalado")
+    src = source(input_pdf)
+    with phase("open"):
+        doc = open_doc(src)
+    n = doc.page_count
+    with phase("analyze"):
+        dpis = image_dpis(doc, progress, cancel)
+    done = {}  # por xref: una imagen compartida entre páginas se procesa una sola vez
+    for k, (xref, eff_dpi) in enumerate(dpis.items()):
+        tick(progress, cancel, n + n * k // len(dpis), 2 * n)
+        with phase("downsample"):
+            done[xref] = eff_dpi > dpi * DPI_TOLERANCE and downsample_image(doc, xref, dpi / eff_dpi, quality)
+    with phase("save"), Output(output_pdf) as out:
+        out.save(doc, deflate=True, clean=True, garbage=4, use_objstms=True)
     doc.close()
-    return paths
-
-def images_to_pdf(images: List[str], output_pdf: str):
-    _require(Image is not None, "Pillow no instalado")
-    imgs = [Image.open(p).convert("RGB") for p in images]
-    _require(len(imgs) > 0, "No hay imágenes")
-    first, rest = imgs[0], imgs[1:]
-    first.save(output_pdf, save_all=True, append_images=rest)
+    size_in, size_out = source_size(src), out.size
+    return out.result({"input_bytes": size_in, "output_bytes": size_out, "ratio": size_out / size_in if size_in else 0.0,
+                       "images": len(done), "downsampled": sum(1 for v in done.values() if v)})
+
+# ---------- PDF → imágenes en tubería ----------
+# Tres etapas que se solapan: render (PyMuPDF; con workers > 1, un proceso por
+# worker que además codifica), codificación (Pillow en un pool de hilos: libera
+# el GIL) y escritura (un hilo). Entre etapas hay a lo sumo QUEUE_PAGES páginas,
+# así que la memoria no crece con el documento. La salida puede ser un archivo
+# por página, un ZIP o un TIFF multipágina.
+IMAGE_FORMATS = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG", "webp": "WEBP", "tif": "TIFF", "tiff": "TIFF"}
+IMAGE_CONTAINERS = ("files", "zip", "tiff")
+QUEUE_PAGES = 8
+
+def _encode_image(mode: str, size, samples: bytes, fmt: str, png_level: int, quality: int) -> Tuple[bytes, float]:
+    start = time.thread_time()  # tiempo de CPU: con varios hilos el reloj de pared se solapa
+    img = Image.frombytes(mode, size, samples)
+    buf = io.BytesIO()
+    kind = IMAGE_FORMATS[fmt]
+    if kind == "PNG":
+        img.save(buf, kind, compress_level=png_level)
+    elif kind == "TIFF":
+        img.save(buf, kind, compression="tiff_deflate")
+    else:
+        img.save(buf, kind, quality=quality)
+    return buf.getvalue(), time.thread_time() - start
+
+def _render_samples(page, zoom: float):
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    return ("L" if pix.n == 1 else "RGB"), (pix.width, pix.height), pix.samples
+
+def _render_encode_chunk(task):
+    # Worker de proceso: render y codificación de un trozo de páginas de un archivo
+    ref, items, zoom, opts = task
+    out = []
+    with _open_ref(ref) as doc:
+        for pno, name in items:
+            start = time.thread_time()
+            mode, size, samples = _render_samples(doc[pno], zoom)
+            rendered = time.thread_time() - start
+            data, encoded = _encode_image(mode, size, samples, *opts)
+            out.append((name, data, rendered, encoded))
+    return out
+
+def _pages_serial(sources, zoom, opts, timings, cancel):
+    # Render en este hilo, codificación en paralelo; se entrega en orden
+    encoders = ThreadPoolExecutor(max(2, cpu_count()))
+    pending = deque()
+    try:
+        for input_pdf, items in sources:
+            with open_doc(input_pdf) as doc:
+                for pno, name in items:
+                    if cancel is not None and cancel.is_set():
+                        raise OperationCancelled("Operación cancelada")
+                    start = time.thread_time()
+                    mode, size, samples = _render_samples(doc[pno], zoom)
+                    timings["render"] += time.thread_time() - start
+                    pending.append((name, encoders.submit(_encode_image, mode, size, samples, *opts)))
+                    while len(pending) >= QUEUE_PAGES:
+                        name_, fut = pending.popleft()
+                        yield (name_,) + fut.result()
+        while pending:
+            name_, fut = pending.popleft()
+            yield (name_,) + fut.result()
+    finally:
+        encoders.shutdown(wait=True, cancel_futures=True)
+
+def _pages_parallel(sources, zoom, opts, workers, timings, cancel):
+    pool, refs = _source_pool(workers, [input_pdf for input_pdf, _ in sources])
+    tasks = [(ref, chunk, zoom, opts) for ref, (_, items) in zip(refs, sources) for chunk in _page_chunks(items, workers)]
+    window = deque()
+    try:
+        for task in tasks:
+            # Pocos trozos en vuelo: el render no se adelanta sin límite a la escritura
+            window.append(pool.submit(_render_encode_chunk, task))
+            while len(window) > 2 * workers:
+                yield from _chunk_results(window.popleft(), timings, cancel)
+        while window:
+            yield from _chunk_results(window.popleft(), timings, cancel)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _chunk_results(fut, timings, cancel):
+    for name, data, rendered, encoded in fut.result():
+        if cancel is not None and cancel.is_set():
+            raise OperationCancelled("Operación cancelada")
+        timings["render"] += rendered
+        yield name, data, encoded
+
+class _ImageSink:
+    """Hilo escritor: archivos sueltos, un ZIP o un TIFF multipágina.
+
+    Sin ruta: "files" junta {nombre: bytes} en memoria (output=None); ZIP y TIFF
+    van a un Output (stream del llamador o bytes).
+    """
+    def __init__(self, container: str, output: Target):
+        self.container = container
+        self.output = os.fspath(output) if is_path(output) else None
+        self.paths: List[str] = []
+        self.files: Dict[str, bytes] = {}
+        self.seconds = 0.0
+        self.error = None
+        self._queue = queue.Queue(QUEUE_PAGES)
+        self._out = None if self.output else Output(output)
+        if container == "files":
+            require(self.output or output is None, "Con container \"files\" la salida es una carpeta o None")
+            if self.output:
+                os.makedirs(self.output, exist_ok=True)
+        elif self.output:
+            os.makedirs(os.path.dirname(os.path.abspath(self.output)), exist_ok=True)
+        if container == "zip":
+            # Las imágenes ya vienen comprimidas: se guardan tal cual
+            self._zip = zipfile.ZipFile(self.output or self._out, "w", zipfile.ZIP_STORED)
+        elif container == "tiff":
+            # AppendingTiffWriter vuelve atrás para enlazar páginas: sin ruta, en memoria
+            self._fp = open(self.output, "w+b") if self.output else io.BytesIO()
+            self._tiff = TiffImagePlugin.AppendingTiffWriter(self._fp, new=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, name: str, data: bytes):
+        if self.error is not None:
+            raise self.error
+        self._queue.put((name, data))
+
+    def _write(self, name: str, data: bytes):
+        if self.container == "zip":
+            self._zip.writestr(name, data)
+        elif self.container == "tiff":
+            self._tiff.write(data)
+            self._tiff.newFrame()
+        elif self.output is None:
+            self.files[name] = data
+        else:
+            path = os.path.join(self.output, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fp:
+                fp.write(data)
+            self.paths.append(path)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # se vacía la cola para no bloquear al productor
+            start = time.perf_counter()
+            try:
+                self._write(*item)
+            except BaseException as e:
+                self.error = e
+            self.seconds += time.perf_counter() - start
+
+    def close(self) -> List[str]:
+        self._queue.put(None)
+        self._thread.join()
+        start = time.perf_counter()
+        if self.container == "zip":
+            self._zip.close()
+        elif self.container == "tiff":
+            self._tiff.close()
+            if self._out is not None and self.error is None:
+                self._out.write(self._fp.getbuffer())
+            self._fp.close()
+        self.seconds += time.perf_counter() - start
+        if self.error is not None:
+            raise self.error
+        if self.container == "files":
+            return self.paths if self.output else list(self.files)
+        return [self.output] if self.output else []
+
+    @property
+    def data(self):
+        """Sin ruta: {nombre: bytes} ("files") o los bytes del ZIP/TIFF (None si fue a un stream)."""
+        if self.output:
+            return None
+        return self.files if self.container == "files" else self._out.data
+
+def export_images(inputs, output: Target, dpi: int = 150, fmt: str = "png", container: str = "files",
+                  png_level: int = 3, quality: int = 85, workers: Optional[int] = None,
+                  progress: Progress = None, cancel=None) -> dict:
+    """Páginas de uno o varios PDFs como imágenes.
+
+    container: "files" (output es una carpeta), "zip" o "tiff" (output es un archivo o
+    stream; "tiff" fuerza el formato). Con varios PDFs cada uno va en su subcarpeta <nombre>/.
+    Con output=None el resultado trae "data": bytes del ZIP/TIFF o {nombre: bytes}.
+    png_level: 0-9 (3 rinde como el PNG de PyMuPDF; más alto, poco menos tamaño y más lento).
+    Devuelve {"outputs", "pages", "format", "container", "timings"}: render y codificación
+    en segundos de CPU sumados entre workers, escritura y total en reloj de pared.
+    """
+    require(fitz, "PyMuPDF no instalado")
+    require(Image, "Pillow no instalado")
+    inputs = [inputs] if is_source(inputs) else list(inputs)
+    require(bool(inputs), "No hay PDFs para exportar")
+    require(container in IMAGE_CONTAINERS, f"Contenedor desconocido: {container}")
+    fmt = "tiff" if container == "tiff" else fmt.lower()
+    require(fmt in IMAGE_FORMATS, f"Formato de imagen no soportado: {fmt}")
+    start = time.perf_counter()
+    sources, total = [], 0
+    for i, input_pdf in enumerate(inputs):
+        input_pdf = source(input_pdf)
+        n = page_count(input_pdf)
+        prefix = source_name(input_pdf, i) + "/" if len(inputs) > 1 else ""
+        sources.append((input_pdf, [(p, f"{prefix}page_{p + 1:04d}.{fmt}") for p in range(n)]))
+        total += n
+    if workers is None:
+        workers = default_workers(total)
+    opts = (fmt, png_level, quality)
+    timings = {"render": 0.0, "encode": 0.0}
+    if workers > 1:
+        pages = _pages_parallel(sources, dpi / 72.0, opts, workers, timings, cancel)
+    else:
+        pages = _pages_serial(sources, dpi / 72.0, opts, timings, cancel)
+    sink = _ImageSink(container, output)
+    done = 0
+    try:
+        for name, data, encoded in pages:
+            tick(progress, cancel, done, total)
+            timings["encode"] += encoded
+            sink.put(name, data)
+            done += 1
+    except BaseException:
+        pages.close()
+        try:
+            sink.close()
+        except Exception:
+            pass
+        raise
+    outputs = sink.close()
+    timings["write"] = sink.seconds
+    timings["wall"] = time.perf_counter() - start
+    for stage in ("render", "encode", "write"):
+        add_phase(stage, timings[stage], total)
+    res = {"outputs": outputs, "pages": total, "format": fmt, "container": container,
+           "timings": {k: round(v, 4) for k, v in timings.items()}}
+    if output is None:
+        res["data"] = sink.data
+    return res
+
+def pdf_to_images(input_pdf: Source, out_dir: str, dpi: int = 150, fmt: str = "png", workers: Optional[int] = None,
+                  progress: Progress = None, cancel=None) -> List[str]:
+    return export_images(input_pdf, out_dir, dpi, fmt, workers=workers, progress=progress, cancel=cancel)["outputs"]
+
+# ---------- Imágenes → PDF (streaming) ----------
+def _image_page_size(img):
+    # Igual que Pillow al guardar PDF: 1 px = 1 pt (72 ppp)
+    return float(img.width), float(img.height)
+
+def _add_image_file(pages: ImagePageWriter, image: Source, max_side: Optional[int], quality: int):
+    src = source(image)
+    with open_stream(src) as fp, Image.open(fp) as img:
+        width_pt, height_pt = _image_page_size(img)
+        is_jpeg = img.format == "JPEG"
+        too_big = bool(max_side) and max(img.size) > max_side
+        if is_jpeg and img.mode in _JPEG_COLORSPACES and not too_big:
+            # DCT passthrough: se incrustan los bytes JPEG sin decodificar
+            if isinstance(src, str):
+                fp.seek(0)
+                data = fp.read()
+            else:
+                data = src
+            pages.add_image_page(width_pt, height_pt, _image_entries(img, _JPEG_COLORSPACES[img.mode], "/DCTDecode"), data)
+            return
+        if too_big:
+            if is_jpeg:
+                # Decodifica directamente a una escala reducida
+                img.draft(img.mode, (max_side, max_side))
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+        img = img.convert("L" if img.mode in ("1", "L", "LA") else "RGB")
+        cs = _JPEG_COLORSPACES[img.mode]
+        if is_jpeg:
+            # Fuente con pérdida reducida: se vuelve a codificar como JPEG
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=quality)
+            pages.add_image_page(width_pt, height_pt, _image_entries(img, cs, "/DCTDecode"), buf.getvalue())
+        else:
+            pages.add_image_page(width_pt, height_pt, _image_entries(img, cs), img.tobytes(), deflate=True)
+
+def images_to_pdf(images: List[Source], output_pdf: Target, max_side: Optional[int] = None, quality: int = 85,
+                  progress: Progress = None, cancel=None) -> Optional[bytes]:
+    require(Image, "Pillow no instalado")
+    require(len(images) > 0, "No hay imágenes")
+    # Una imagen a la vez: memoria acotada sin importar cuántas haya
+    with Output(output_pdf) as out:
+        pages = ImagePageWriter(StreamingPDFWriter(out))
+        for i, p in enumerate(images):
+            tick(progress, cancel, i, len(images))
+            with phase("page"):
+                _add_image_file(pages, p, max_side, quality)
+        pages.close()
+    return out.result()
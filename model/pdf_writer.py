@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Escritor PDF de bajo nivel: cada objeto se escribe al archivo en cuanto se
+# agrega, así que la memoria usada no depende del tamaño del documento.
+import zlib
+from typing import Dict, List, Optional
+
+
+def pdf_num(x: float) -> str:
+    return f"{x:.3f}".rstrip("0").rstrip(".")
+
+
+class StreamingPDFWriter:
+    """Escribe un PDF objeto por objeto sobre un stream binario."""
+    def __init__(self, fp, version: str = "1.4"):
+        self.fp = fp
+        self.pos = 0
+        self.offsets: Dict[int, int] = {}
+        self.next_num = 1
+        self._write(f"%PDF-{version}\n".encode("ascii") + b"%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data: bytes):
+        self.fp.write(data)
+        self.pos += len(data)
+
+    def reserve(self) -> int:
+        num = self.next_num
+        self.next_num += 1
+        return num
+
+    def write_object(self, num: int, body: bytes):
+        self.offsets[num] = self.pos
+        self._write(b"%d 0 obj\n" % num + body + b"\nendobj\n")
+
+    def add_object(self, body: bytes, num: Optional[int] = None) -> int:
+        num = num or self.reserve()
+        self.write_object(num, body)
+        return num
+
+    def add_stream(self, entries: str, data: bytes, num: Optional[int] = None, deflate: bool = False) -> int:
+        if deflate:
+            data = zlib.compress(data)
+            entries += " /Filter /FlateDecode"
+        body = f"<< {entries} /Length {len(data)} >>\nstream\n".encode("latin-1") + data + b"\nendstream"
+        return self.add_object(body, num)
+
+    def close(self, root: int, info: Optional[int] = None):
+        xref_pos = self.pos
+        size = self.next_num
+        lines = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for num in range(1, size):
+            off = self.offsets.get(num)
+            lines.append(b"%010d 00000 n \n" % off if off is not None else b"0000000000 00000 f \n")
+        self._write(b"".join(lines))
+        trailer = f"trailer\n<< /Size {size} /Root {root} 0 R"
+        if info:
+            trailer += f" /Info {info} 0 R"
+        self._write(f"{trailer} >>\nstartxref\n{xref_pos}\n%%EOF\n".encode("ascii"))
+
+
+class ImagePageWriter:
+    """Agrega páginas de una sola imagen a un StreamingPDFWriter."""
+    def __init__(self, writer: StreamingPDFWriter):
+        self.w = writer
+        self.pages_num = writer.reserve()
+        self.kids: List[int] = []
+
+    def add_image_page(self, width_pt: float, height_pt: float, image_entries: str, data: bytes, deflate: bool = False):
+        w = self.w
+        img = w.add_stream(f"/Type /XObject /Subtype /Image {image_entries}", data, deflate=deflate)
+        content = f"q {pdf_num(width_pt)} 0 0 {pdf_num(height_pt)} 0 0 cm /Im0 Do Q".encode("ascii")
+        cont = w.add_stream("", content)
+        page = (
+            f"<< /Type /Page /Parent {self.pages_num} 0 R /MediaBox [0 0 {pdf_num(width_pt)} {pdf_num(height_pt)}]"
+            f" /Resources << /XObject << /Im0 {img} 0 R >> >> /Contents {cont} 0 R >>"
+        )
+        self.kids.append(w.add_object(page.encode("ascii")))
+
+    def close(self):
+        kids = " ".join(f"{k} 0 R" for k in self.kids)
+        self.w.add_object(f"<< /Type /Pages /Kids [{kids}] /Count {len(self.kids)} >>".encode("ascii"), self.pages_num)
+        root = self.w.add_object(f"<< /Type /Catalog /Pages {self.pages_num} 0 R >>".encode("ascii"))
+        self.w.close(root)
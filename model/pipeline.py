@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# Recetas: varias operaciones encadenadas sobre un solo documento de PyMuPDF
+# en memoria. Se abre una vez, cada etapa lo modifica y se guarda una sola vez
+# al final (sin archivos intermedios ni volver a analizar el PDF). Las recetas
+# son JSON, o YAML si PyYAML está instalado:
+#
+#   {"stages": [{"op": "unlock", "password": "..."},
+#               {"op": "rotate", "spec": "3-5:90"},
+#               {"op": "merge", "inputs": ["portada.pdf"], "position": "start"},
+#               {"op": "compress", "method": "lossless"}]}
+#
+# Las rutas de "inputs" en un archivo de receta son relativas a la receta.
+import io
+import json
+import os
+import time
+from typing import List, Optional
+
+from model.lazy import lazy
+from model.pdf_io import Output, Source, Target, is_source, open_doc, source, source_name
+from model.ops_base import Progress, require, tick
+from model.pdf_ops import (DPI_TOLERANCE, RASTER_CODECS, dedupe_new_objects, downsample_image, encode_page,
+                           image_dpis, parse_rotation, shift_toc, split_ranges)
+from model.pdf_writer import ImagePageWriter, StreamingPDFWriter
+from model.telemetry import phase
+
+fitz = lazy("pymupdf", "fitz")
+yaml = lazy("yaml")  # opcional: solo para recetas .yaml/.yml
+
+YAML_EXTS = (".yaml", ".yml")
+MERGE_POSITIONS = ("end", "start")
+COMPRESS_METHODS = ("lossless", "images", "raster")
+
+
+class RecipeError(ValueError):
+    pass
+
+
+class _State:
+    """Documento en curso y opciones de guardado que van pidiendo las etapas."""
+    def __init__(self, doc):
+        self.doc = doc
+        self.save = {"garbage": 1}
+        self.seen: Optional[dict] = None  # hashes de objetos para deduplicar entre fusiones
+        self.raw: Optional[bytes] = None  # PDF ya serializado por la última etapa (raster)
+
+    def want(self, garbage: int = 0, **options):
+        self.save["garbage"] = max(self.save["garbage"], garbage)
+        self.save.update(options)
+
+
+# ---------- Etapas ----------
+# Cada etapa recibe el estado, su diccionario de la receta y cancel; devuelve datos para el reporte
+def _unlock(state: _State, stage: dict, cancel) -> dict:
+    doc = state.doc
+    candidates = ([stage["password"]] if stage.get("password") else []) + list(stage.get("passwords") or [])
+    index = None
+    # is_encrypted: todavía bloqueado (needs_pass sigue en 1 tras autenticar)
+    if doc.is_encrypted:
+        for i, password in enumerate(candidates):
+            tick(None, cancel, i, len(candidates))
+            if doc.authenticate(password):
+                index = i
+                break
+        else:
+            raise RuntimeError("Contraseña incorrecta o error al desencriptar" if len(candidates) <= 1
+                               else f"Ninguna de las {len(candidates)} contraseñas candidatas sirve")
+    if (doc.metadata or {}).get("encryption"):
+        state.want(encryption=fitz.PDF_ENCRYPT_NONE)
+    return {"password_index": index}
+
+def _rotate(state: _State, stage: dict, cancel) -> dict:
+    doc = state.doc
+    angles = parse_rotation(stage.get("spec") or int(stage.get("angle", 90)), doc.page_count)
+    rotated = 0
+    for i, (p, a) in enumerate(sorted(angles.items())):
+        tick(None, cancel, i, len(angles))
+        if a:
+            page = doc[p]
+            page.set_rotation((page.rotation + a) % 360)
+            rotated += 1
+    return {"rotated": rotated}
+
+def _merge(state: _State, stage: dict, cancel) -> dict:
+    # Como merge_pdfs: marcadores desplazados y objetos idénticos una sola vez
+    doc = state.doc
+    inputs = stage["inputs"]
+    inputs = [inputs] if is_source(inputs) else list(inputs)
+    at_start = stage.get("position", "end") == "start"
+    if state.seen is None:
+        state.seen = {}
+        dedupe_new_objects(doc, 1, state.seen)
+    toc, added, merged = doc.get_toc(simple=False), [], 0
+    pos = 0 if at_start else doc.page_count
+    for i, f in enumerate(inputs):
+        tick(None, cancel, i, len(inputs))
+        f = source(f)
+        with open_doc(f) as src:
+            require(not src.needs_pass, f"PDF protegido con contraseña: {source_name(f, i)}")
+            start = doc.xref_length()
+            added.extend(shift_toc(src.get_toc(simple=False), pos))
+            doc.insert_pdf(src, start_at=pos)
+            pos += src.page_count
+        merged += dedupe_new_objects(doc, start, state.seen)
+    toc = added + shift_toc(toc, pos) if at_start else toc + added
+    if toc:
+        doc.set_toc(toc)
+    state.want(garbage=2, deflate=True, use_objstms=True)
+    return {"inputs": len(inputs), "deduplicated": merged}
+
+def _select(state: _State, stage: dict, cancel) -> dict:
+    pages = split_ranges(str(stage.get("ranges", "1-")), state.doc.page_count)
+    require(bool(pages), "Los rangos no seleccionaron ninguna página")
+    state.doc.select(pages)
+    state.want(garbage=2)  # descarta lo que solo usaban las páginas quitadas
+    return {}
+
+def _compress(state: _State, stage: dict, cancel) -> dict:
+    method = stage.get("method", "lossless")
+    doc = state.doc
+    dpi, quality = int(stage.get("dpi", 150)), int(stage.get("quality", 75))
+    if method == "raster":
+        return _rasterize(state, dpi, stage.get("codec", "auto"), quality, cancel)
+    info = {}
+    if method == "images":
+        dpis = image_dpis(doc, None, cancel)
+        downsampled = 0
+        for k, (xref, eff_dpi) in enumerate(dpis.items()):
+            tick(None, cancel, k, len(dpis))
+            downsampled += eff_dpi > dpi * DPI_TOLERANCE and downsample_image(doc, xref, dpi / eff_dpi, quality)
+        info = {"images": len(dpis), "downsampled": downsampled}
+    state.want(garbage=4, deflate=True, clean=True, use_objstms=True)
+    return info
+
+def _rasterize(state: _State, dpi: int, codec: str, quality: int, cancel) -> dict:
+    # Páginas nuevas (una imagen cada una) escritas en memoria: el documento se reemplaza
+    doc, zoom, used = state.doc, dpi / 72.0, {}
+    buf = io.BytesIO()
+    pages = ImagePageWriter(StreamingPDFWriter(buf))
+    for i, page in enumerate(doc):
+        tick(None, cancel, i, doc.page_count)
+        width, height, name, entries, data = encode_page(page, i, zoom, codec, quality)
+        pages.add_image_page(width, height, entries, data)
+        used[name] = used.get(name, 0) + 1
+    pages.close()
+    doc.close()
+    state.raw = buf.getvalue()
+    state.doc = open_doc(state.raw)
+    state.save, state.seen = {"garbage": 1}, None
+    return {"codecs": used}
+
+STAGES = {
+    "unlock": _unlock,
+    "rotate": _rotate,
+    "merge": _merge,
+    "select": _select,
+    "compress": _compress,
+}
+
+# ---------- Recetas ----------
+def load_recipe(path: str) -> dict:
+    """Lee una receta .json o .yaml/.yml; las rutas relativas de "inputs" se resuelven junto a ella."""
+    with open(path, encoding="utf-8") as fp:
+        if path.lower().endswith(YAML_EXTS):
+            require(yaml, "PyYAML no instalado: usa una receta .json")
+            recipe = yaml.safe_load(fp)
+        else:
+            recipe = json.load(fp)
+    if isinstance(recipe, list):
+        recipe = {"stages": recipe}
+    if not isinstance(recipe, dict):
+        raise RecipeError("La receta debe ser un objeto con \"stages\" o una lista de etapas")
+    base = os.path.dirname(os.path.abspath(path))
+    for stage in recipe.get("stages") or []:
+        if isinstance(stage, dict) and stage.get("inputs"):
+            inputs = [stage["inputs"]] if isinstance(stage["inputs"], str) else stage["inputs"]
+            stage["inputs"] = [os.path.join(base, p) if isinstance(p, str) else p for p in inputs]
+    return recipe
+
+def parse_recipe(recipe) -> List[dict]:
+    """Etapas validadas de una receta: ruta de archivo, dict con "stages" o lista de etapas."""
+    if isinstance(recipe, (str, os.PathLike)):
+        recipe = load_recipe(os.fspath(recipe))
+    stages = recipe.get("stages") if isinstance(recipe, dict) else recipe
+    if not isinstance(stages, list) or not stages:
+        raise RecipeError("La receta no tiene etapas")
+    for i, stage in enumerate(stages, 1):
+        op = stage.get("op") if isinstance(stage, dict) else None
+        if op not in STAGES:
+            raise RecipeError(f"Etapa {i}: operación desconocida {op!r} (válidas: {', '.join(STAGES)})")
+        if op == "merge" and not stage.get("inputs"):
+            raise RecipeError(f"Etapa {i}: merge requiere \"inputs\"")
+        if op == "merge" and stage.get("position", "end") not in MERGE_POSITIONS:
+            raise RecipeError(f"Etapa {i}: position debe ser {' o '.join(MERGE_POSITIONS)}")
+        if op == "compress" and stage.get("method", "lossless") not in COMPRESS_METHODS:
+            raise RecipeError(f"Etapa {i}: método de compresión desconocido {stage.get('method')!r}")
+        if op == "compress" and stage.get("codec", "auto") not in RASTER_CODECS:
+            raise RecipeError(f"Etapa {i}: códec desconocido {stage.get('codec')!r}")
+    return stages
+
+def describe(recipe) -> List[str]:
+    """Una línea por etapa, para mostrar la receta (sin contraseñas)."""
+    lines = []
+    for stage in parse_recipe(recipe):
+        params = ", ".join(f"{k}={'***' if k in ('password', 'passwords') else v}"
+                           for k, v in stage.items() if k != "op")
+        lines.append(f"{stage['op']}({params})")
+    return lines
+
+def run_pipeline(input_pdf: Source, output: Target, recipe, progress: Progress = None, cancel=None) -> dict:
+    """Aplica la receta a un documento en memoria y lo serializa una sola vez.
+
+    output puede ser la misma ruta que la entrada. Devuelve {"stages": [{"op", "seconds",
+    "pages", ...}, ..., {"op": "save", ...}], "pages", "output_bytes", "seconds"} y, con
+    output=None, los bytes en "data".
+    """
+    require(fitz, "PyMuPDF no instalado")
+    stages = parse_recipe(recipe)
+    start = time.perf_counter()
+    total = len(stages) + 1
+    timings = []
+    with phase("open"):
+        state = _State(open_doc(source(input_pdf)))
+    try:
+        for i, stage in enumerate(stages):
+            tick(progress, cancel, i, total)
+            op = stage["op"]
+            require(op == "unlock" or not state.doc.is_encrypted,
+                     "PDF protegido con contraseña: la receta debe empezar por unlock")
+            state.raw = None
+            t = time.perf_counter()
+            with phase(op):
+                info = STAGES[op](state, stage, cancel)
+            timings.append(dict(op=op, seconds=round(time.perf_counter() - t, 4), pages=state.doc.page_count, **info))
+        tick(progress, cancel, len(stages), total)
+        t = time.perf_counter()
+        pages = state.doc.page_count
+        # Se guarda a .tmp y se reemplaza: la salida puede ser la propia entrada
+        with phase("save"), Output(output, atomic=True) as out:
+            if state.raw is not None:
+                out.write(state.raw)  # la última etapa ya dejó el PDF serializado
+            else:
+                out.save(state.doc, **state.save)
+            state.doc.close()
+        timings.append({"op": "save", "seconds": round(time.perf_counter() - t, 4), "pages": pages})
+    finally:
+        if not state.doc.is_closed:
+            state.doc.close()
+    tick(progress, None, total, total)
+    return out.result({"stages": timings, "pages": pages, "output_bytes": out.size,
+                       "seconds": round(time.perf_counter() - start, 4)})
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+# Sondeo rápido de PDFs: páginas, cifrado, versión y linealización leyendo
+# solo la cabecera, el trailer, las entradas de xref necesarias y dos o tres
+# objetos (catálogo y raíz del árbol de páginas). No construye el documento,
+# así que cuesta lo mismo para 10 páginas que para 10.000. Si el archivo no
+# se deja leer así (dañado, xref irregular, catálogo cifrado dentro de un
+# flujo de objetos...) se recurre a PyMuPDF y luego a pypdf. La entrada puede
+# ser una ruta o un PDF en memoria (ver model/pdf_io.py).
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from model.lazy import lazy
+from model.pdf_io import open_doc, open_stream, pdf_reader, source, source_size
+
+# Solo para el camino lento; el rápido no necesita ninguna biblioteca
+fitz = lazy("pymupdf", "fitz")
+PdfReader = lazy("pypdf", attr="PdfReader")
+
+HEAD = 1024
+TAIL = 4096
+OBJ_READ = 4096
+OBJ_MAX = 256 * 1024   # un diccionario más grande que esto no es el que buscamos
+MAX_SECTIONS = 64      # revisiones encadenadas por /Prev antes de rendirse
+WORKERS = 8            # hilos de probe_many (el trabajo es casi todo espera de disco)
+
+_VERSION = re.compile(rb"%PDF-(\d\.\d)")
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+_OBJ_HEAD = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj")
+_LINEARIZED = re.compile(rb"<<[^>]*?/Linearized\s+[\d.]+[^>]*>>")
+
+
+class ProbeError(ValueError):
+    pass
+
+
+# ---------- Lectura mínima de diccionarios ----------
+def _ref(body: bytes, key: bytes) -> Optional[int]:
+    m = re.search(re.escape(key) + rb"\s+(\d+)\s+\d+\s+R", body)
+    return int(m.group(1)) if m else None
+
+def _int(body: bytes, key: bytes) -> Optional[int]:
+    m = re.search(re.escape(key) + rb"\s+(\d+)(?![\d.])(?!\s+\d+\s+R)", body)
+    return int(m.group(1)) if m else None
+
+def _name(body: bytes, key: bytes) -> Optional[str]:
+    m = re.search(re.escape(key) + rb"\s*/([^\s/<>\[\]()]+)", body)
+    return m.group(1).decode("latin-1") if m else None
+
+def _ints(body: bytes, key: bytes) -> Optional[List[int]]:
+    m = re.search(re.escape(key) + rb"\s*\[([\d\s]*)\]", body)
+    return [int(v) for v in m.group(1).split()] if m else None
+
+def _inflate(body: bytes, data: bytes) -> bytes:
+    if b"/Filter" not in body:
+        return data
+    if _name(body, b"/Filter") != "FlateDecode":
+        raise ProbeError("filtro no soportado")
+    return zlib.decompress(data)
+
+def _rows(body: bytes, data: bytes, width: int) -> Callable[[int], bytes]:
+    """Acceso a la fila k de un flujo xref, deshaciendo el predictor PNG si lo hay."""
+    data = _inflate(body, data)
+    predictor = _int(body, b"/Predictor") or 1
+    if predictor == 1:
+        return lambda k: data[k * width:(k + 1) * width]
+    if predictor < 10 or (_int(body, b"/Columns") or 1) != width:
+        raise ProbeError("predictor no soportado")
+    stride = width + 1
+    filters = set(data[::stride])
+    if filters <= {0}:
+        return lambda k: data[k * stride + 1:(k + 1) * stride]
+    if filters <= {2}:
+        # Todo "Up": el byte j de la fila k es la suma de la columna j hasta k (mod 256)
+        cols = [data[j + 1::stride] for j in range(width)]
+        return lambda k: bytes(sum(col[:k + 1]) & 0xFF for col in cols)
+    # Mezcla de filtros: se decodifica entero (None, Sub y Up)
+    out, prev = [], bytes(width)
+    for i in range(0, len(data), stride):
+        f, row = data[i], bytearray(data[i + 1:i + stride])
+        if f == 1:
+            for j in range(1, width):
+                row[j] = (row[j] + row[j - 1]) & 0xFF
+        elif f == 2:
+            for j in range(width):
+                row[j] = (row[j] + prev[j]) & 0xFF
+        elif f != 0:
+            raise ProbeError("predictor no soportado")
+        prev = bytes(row)
+        out.append(prev)
+    return lambda k: out[k]
+
+
+class _Reader:
+    """Xref mínimo: resuelve un número de objeto a su diccionario leyendo solo lo necesario."""
+    def __init__(self, fp, size: int):
+        self.fp, self.size = fp, size
+        # Secciones del más nuevo al más viejo: (subsecciones, trailer)
+        self.sections: List[Tuple[list, bytes]] = []
+        self._objstms: Dict[int, Tuple[int, bytes]] = {}
+
+    def read(self, offset: int, n: int) -> bytes:
+        self.fp.seek(offset)
+        return self.fp.read(n)
+
+    # ---- xref ----
+    def load_xref(self, offset: Optional[int]) -> bytes:
+        """Carga la cadena de secciones xref siguiendo /Prev; devuelve el trailer más reciente."""
+        seen = set()
+        while offset is not None and offset not in seen:
+            if len(seen) >= MAX_SECTIONS or not 0 <= offset < self.size:
+                raise ProbeError("cadena de xref inválida")
+            seen.add(offset)
+            if self.read(offset, 16).lstrip().startswith(b"xref"):
+                subs, trailer = self._xref_table(offset)
+                self.sections.append((subs, trailer))
+                # Archivos híbridos: tabla clásica más un flujo /XRefStm
+                stm = _int(trailer, b"/XRefStm")
+                if stm is not None:
+                    self.sections.append(self._xref_stream(stm))
+            else:
+                subs, trailer = self._xref_stream(offset)
+                self.sections.append((subs, trailer))
+            offset = _int(trailer, b"/Prev")
+        if not self.sections:
+            raise ProbeError("sin xref")
+        return self.sections[0][1]
+
+    def _xref_table(self, offset: int):
+        # Las entradas miden 20 bytes: solo se leen las cabeceras de subsección;
+        # la entrada de un objeto se lee cuando se pide
+        subs = []
+        self.fp.seek(offset)
+        line = self.fp.readline().strip()
+        rest = line[4:].strip()
+        while True:
+            head, rest = rest, b""
+            for _ in range(8):  # líneas en blanco entre subsecciones y trailer
+                if head:
+                    break
+                head = self.fp.readline().strip()
+            if head.startswith(b"trailer"):
+                trailer = head[7:] + self.fp.read(OBJ_READ)
+                end = trailer.find(b"startxref")
+                return subs, trailer[:end] if end >= 0 else trailer
+            parts = head.split()
+            if len(parts) != 2 or not all(p.isdigit() for p in parts):
+                raise ProbeError("subsección de xref inválida")
+            start, count = int(parts[0]), int(parts[1])
+            first = self.fp.tell()
+            subs.append(("table", start, count, first))
+            self.fp.seek(first + 20 * count)
+
+    def _xref_stream(self, offset: int):
+        body, data = self._object(offset, stream=True)
+        if _name(body, b"/Type") != "XRef":
+            raise ProbeError("flujo xref esperado")
+        widths, size = _ints(body, b"/W"), _int(body, b"/Size")
+        if not widths or len(widths) != 3 or size is None:
+            raise ProbeError("flujo xref incompleto")
+        index = _ints(body, b"/Index") or [0, size]
+        rows = _rows(body, data, sum(widths))
+        subs, row = [], 0
+        for start, count in zip(index[::2], index[1::2]):
+            subs.append(("stream", start, count, (rows, row, widths)))
+            row += count
+        return subs, body
+
+    def lookup(self, num: int) -> Optional[Tuple[int, int, int]]:
+        """(tipo, a, b) como en un flujo xref: 1 = (offset, gen), 2 = (flujo, índice)."""
+        for subs, _ in self.sections:
+            for kind, start, count, where in subs:
+                if not start <= num < start + count:
+                    continue
+                if kind == "table":
+                    entry = self.read(where + 20 * (num - start), 20)
+                    if len(entry) < 18 or entry[10:11] != b" " or entry[16:17] != b" " or entry[17:18] not in b"nf":
+                        raise ProbeError("entrada de xref irregular")
+                    return (1 if entry[17:18] == b"n" else 0, int(entry[:10]), int(entry[11:16]))
+                rows, first, widths = where
+                row, vals, i = rows(first + num - start), [], 0
+                for w in widths:
+                    vals.append(int.from_bytes(row[i:i + w], "big"))
+                    i += w
+                return (vals[0] if widths[0] else 1, vals[1], vals[2])
+        return None
+
+    # ---- Objetos ----
+    def _object(self, offset: int, stream: bool = False) -> Tuple[bytes, bytes]:
+        n = OBJ_READ
+        while True:
+            raw = self.read(offset, n)
+            m = _OBJ_HEAD.match(raw)
+            if not m:
+                raise ProbeError("objeto no encontrado en su offset")
+            body = raw[m.end():]
+            s, e = body.find(b"stream"), body.find(b"endobj")
+            if s >= 0 and (e < 0 or s < e):
+                if not stream:
+                    return body[:s], b""
+                length = _int(body[:s], b"/Length")
+                if length is None:
+                    ref = _ref(body[:s], b"/Length")
+                    length = self._resolve_int(ref) if ref is not None else None
+                if length is None:
+                    raise ProbeError("/Length desconocido")
+                start = s + 6
+                start += 2 if body[start:start + 2] == b"\r\n" else 1
+                return body[:s], self.read(offset + m.end() + start, length)
+            if e >= 0:
+                return body[:e], b""
+            if n >= OBJ_MAX or len(raw) < n:
+                raise ProbeError("objeto demasiado grande")
+            n *= 4
+
+    def _resolve_int(self, num: int) -> int:
+        body = self.get(num).strip()
+        if not body.isdigit():
+            raise ProbeError("entero indirecto inválido")
+        return int(body)
+
+    def get(self, num: int) -> bytes:
+        entry = self.lookup(num)
+        if entry is None or entry[0] not in (1, 2):
+            raise ProbeError(f"objeto {num} ausente")
+        kind, a, _ = entry
+        if kind == 1:
+            return self._object(a)[0]
+        # Dentro de un flujo de objetos: se descomprime una vez
+        if a not in self._objstms:
+            stm = self.lookup(a)
+            if stm is None or stm[0] != 1:
+                raise ProbeError(f"flujo de objetos {a} ausente")
+            body, data = self._object(stm[1], stream=True)
+            first = _int(body, b"/First")
+            if first is None or b"/DecodeParms" in body:
+                raise ProbeError("flujo de objetos no soportado")
+            self._objstms[a] = (first, _inflate(body, data))
+        first, data = self._objstms[a]
+        nums = data[:first].split()
+        for i in range(0, len(nums) - 1, 2):
+            if int(nums[i]) == num:
+                start = first + int(nums[i + 1])
+                end = first + int(nums[i + 3]) if i + 3 < len(nums) else len(data)
+                return data[start:end]
+        raise ProbeError(f"objeto {num} no está en su flujo")
+
+
+# ---------- Sondeo ----------
+def _fast(src, size: int) -> dict:
+    with open_stream(src) as fp:
+        reader = _Reader(fp, size)
+        head = reader.read(0, HEAD)
+        m = _VERSION.search(head)
+        if not m:
+            raise ProbeError("sin cabecera %PDF")
+        version = m.group(1).decode("ascii")
+        # Linealizado solo si /L coincide con el tamaño: una revisión agregada al final lo invalida
+        lin = _LINEARIZED.search(head)
+        linearized = lin is not None and _int(lin.group(0), b"/L") == size
+        found = list(_STARTXREF.finditer(reader.read(max(0, size - TAIL), TAIL)))
+        if not found:
+            raise ProbeError("sin startxref")
+        trailer = reader.load_xref(int(found[-1].group(1)))
+        root = _ref(trailer, b"/Root")
+        if root is None:
+            raise ProbeError("trailer sin /Root")
+        catalog = reader.get(root)
+        # /Version del catálogo prevalece sobre la cabecera si es mayor
+        newer = _name(catalog, b"/Version")
+        if newer and re.fullmatch(r"\d\.\d", newer) and float(newer) > float(version):
+            version = newer
+        if linearized and _int(lin.group(0), b"/N") is not None:
+            pages = _int(lin.group(0), b"/N")
+        else:
+            tree = _ref(catalog, b"/Pages")
+            pages = _int(reader.get(tree), b"/Count") if tree is not None else None
+        if pages is None:
+            raise ProbeError("árbol de páginas sin /Count")
+        return {"pages": pages, "encrypted": b"/Encrypt" in trailer, "version": version,
+                "linearized": linearized, "method": "xref"}
+
+def _slow(src) -> dict:
+    if fitz:
+        with open_doc(src) as doc:
+            fmt = (doc.metadata or {}).get("format") or ""
+            # Con contraseña pendiente PyMuPDF informa 0 páginas: mejor "desconocido"
+            return {"pages": None if doc.needs_pass else doc.page_count, "encrypted": bool(doc.is_encrypted),
+                    "version": fmt.replace("PDF ", "") or None, "linearized": bool(doc.is_fast_webaccess),
+                    "method": "fitz"}
+    if PdfReader:
+        reader = pdf_reader(src)
+        m = _VERSION.search(reader.pdf_header.encode("latin-1"))
+        return {"pages": len(reader.pages) if not reader.is_encrypted else None, "encrypted": reader.is_encrypted,
+                "version": m.group(1).decode("ascii") if m else None, "linearized": None, "method": "pypdf"}
+    raise RuntimeError("PyMuPDF o pypdf no instalado")
+
+def count_images(path) -> Optional[int]:
+    """Imágenes distintas (XObject /Image) del documento; recorre la tabla de objetos, no las páginas."""
+    if not fitz:
+        return None
+    with open_doc(source(path)) as doc:
+        if doc.needs_pass:
+            return None
+        return sum(1 for x in range(1, doc.xref_length()) if doc.xref_get_key(x, "Subtype")[1] == "/Image")
+
+def probe(path, images: bool = False) -> dict:
+    """Metadatos de un PDF sin cargarlo entero.
+
+    Devuelve {"bytes", "pages", "encrypted", "version", "linearized", "images", "method"};
+    images solo se cuenta si se pide (recorre todos los objetos).
+    """
+    src = source(path)
+    size = source_size(src)
+    try:
+        info = _fast(src, size)
+    except (ProbeError, ValueError, IndexError, zlib.error):
+        info = _slow(src)
+    info["bytes"] = size
+    info["images"] = count_images(src) if images else None
+    return info
+
+def page_count(path) -> int:
+    pages = probe(path)["pages"]
+    if pages is None:
+        raise RuntimeError("No se pudo leer el número de páginas (¿PDF protegido?)")
+    return pages
+
+def probe_many(paths: List[str], images: bool = False, workers: Optional[int] = None) -> List[dict]:
+    """probe() de varios archivos en paralelo, en el mismo orden; los fallos traen "error"."""
+    def one(path):
+        try:
+            return {"path": path, **probe(path, images)}
+        except Exception as e:
+            return {"path": path, "error": str(e)}
+    workers = max(1, min(len(paths), workers or WORKERS))
+    if workers == 1:
+        return [one(p) for p in paths]
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(one, paths))
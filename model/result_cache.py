@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# Caché de resultados direccionada por contenido: la clave es el hash de los
+# bytes de las entradas + la operación + sus parámetros, así que el mismo PDF
+# con otro nombre también acierta. Cada entrada es una carpeta con las salidas
+# y meta.json; se escribe en una carpeta temporal y se publica con un rename
+# atómico. Un acierto se entrega con hardlink (o copia si no se puede).
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple
+
+MAX_BYTES = 2 * 1024 ** 3
+# Parámetros que no cambian el resultado (el techo de memoria y el perfilado tampoco)
+_IGNORED_PARAMS = {"op", "input", "inputs", "output", "out_dir", "workers", "cache", "cache_mb",
+                   "memory_mb", "profile"}
+_CHUNK = 1024 * 1024
+HASH_MEMO_SIZE = 4096  # hashes recordados (LRU): el servidor y la interfaz corren por días
+_hash_memo: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_hash_memo_lock = threading.Lock()
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pdf_toolbox", "results")
+
+def content_hash(path: str) -> str:
+    """blake2b del contenido; se recuerda por (ruta, mtime, tamaño) dentro del proceso (LRU)."""
+    st = os.stat(path)
+    memo = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _hash_memo_lock:
+        digest = _hash_memo.get(memo)
+        if digest is not None:
+            _hash_memo.move_to_end(memo)
+            return digest
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(_CHUNK), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _hash_memo_lock:
+        _hash_memo[memo] = digest
+        while len(_hash_memo) > HASH_MEMO_SIZE:
+            _hash_memo.popitem(last=False)
+    return digest
+
+def _relocate(value, old: str, new: str):
+    # Las rutas del resultado apuntan a la salida original; se reescriben para la nueva
+    if isinstance(value, str):
+        return new + value[len(old):] if value == old or value.startswith(old + os.sep) else value
+    if isinstance(value, list):
+        return [_relocate(v, old, new) for v in value]
+    if isinstance(value, dict):
+        return {k: _relocate(v, old, new) for k, v in value.items()}
+    return value
+
+def _link_or_copy(src: str, dst: str):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def _listed_outputs(result, output: str):
+    # Resultado tipo split/pdf_to_images: lista de archivos dentro de la carpeta de salida
+    paths = result.get("outputs") if isinstance(result, dict) else result
+    if isinstance(paths, list) and paths and all(isinstance(p, str) and _relocate(p, output, "") != p for p in paths):
+        return paths
+    return None
+
+def _tree_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+class ResultCache:
+    """Resultados de pdf_ops en disco con desalojo LRU por tamaño total."""
+    def __init__(self, root: Optional[str] = None, max_bytes: int = MAX_BYTES):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.stores = self.evictions = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    # ---- Claves ----
+    def key(self, op: str, inputs: Iterable[str], params: Optional[dict] = None) -> str:
+        params = {k: v for k, v in (params or {}).items() if k not in _IGNORED_PARAMS and v is not None}
+        desc = json.dumps({"op": op, "inputs": [content_hash(p) for p in inputs], "params": params},
+                          sort_keys=True, default=str)
+        return hashlib.blake2b(desc.encode("utf-8"), digest_size=20).hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    # ---- Lectura ----
+    def fetch(self, key: str, output: str):
+        """Restaura la salida en output; devuelve (True, resultado) o (False, None)."""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, "meta.json"), encoding="utf-8") as fp:
+                meta = json.load(fp)
+            data = os.path.join(entry, "data")
+            # Si alguien modificó en su lugar un archivo enlazado, la entrada ya no vale
+            for rel, (size, mtime) in meta["files"].items():
+                st = os.stat(os.path.join(data, rel))
+                if st.st_size != size or st.st_mtime_ns != mtime:
+                    raise ValueError("entrada modificada")
+            if meta["kind"] == "dir":
+                for rel in meta["files"]:
+                    dst = os.path.join(output, rel)
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    _link_or_copy(os.path.join(data, rel), dst)
+            else:
+                parent = os.path.dirname(os.path.abspath(output))
+                os.makedirs(parent, exist_ok=True)
+                _link_or_copy(os.path.join(data, "out"), output)
+            now = time.time_ns()  # reloj fino: el "ahora" del sistema de archivos puede ser grueso
+            os.utime(os.path.join(entry, "meta.json"), ns=(now, now))  # uso reciente para el LRU
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            return False, None
+        self.hits += 1
+        return True, _relocate(meta.get("result"), "\0out", output)
+
+    # ---- Escritura ----
+    def store(self, key: str, output: str, result=None):
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return
+        tmp = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        data = os.path.join(tmp, "data")
+        try:
+            if os.path.isdir(output):
+                kind = "dir"
+                made = _listed_outputs(result, output)
+                if made is None:
+                    shutil.copytree(output, data)
+                else:
+                    # Solo lo que produjo la operación, no lo que ya había en la carpeta
+                    for path in made:
+                        dst = os.path.join(data, os.path.relpath(path, output))
+                        os.makedirs(os.path.dirname(dst), exist_ok=True)
+                        shutil.copy2(path, dst)
+            else:
+                kind = "file"
+                os.makedirs(data)
+                shutil.copy2(output, os.path.join(data, "out"))
+            files = {}
+            for d, _, names in os.walk(data):
+                for n in names:
+                    p = os.path.join(d, n)
+                    st = os.stat(p)
+                    files[os.path.relpath(p, data)] = (st.st_size, st.st_mtime_ns)
+            try:
+                result = json.loads(json.dumps(result))
+            except (TypeError, ValueError):
+                result = None
+            meta = {"kind": kind, "files": files, "created": time.time(),
+                    "bytes": sum(s for s, _ in files.values()), "result": _relocate(result, output, "\0out")}
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fp:
+                json.dump(meta, fp)
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            os.replace(tmp, entry)  # atómico; si otro proceso ganó, se descarta la copia
+            now = time.time_ns()
+            os.utime(os.path.join(entry, "meta.json"), ns=(now, now))
+            self.stores += 1
+        except OSError:
+            pass
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta quedar bajo max_bytes."""
+        entries = []
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_dir):
+                continue
+            for key in os.listdir(shard_dir):
+                path = os.path.join(shard_dir, key)
+                try:
+                    used = os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+                except OSError:
+                    used = 0
+                entries.append((used, _tree_bytes(path), path))
+        total = sum(e[1] for e in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    # ---- Uso ----
+    def run(self, op: str, inputs: Iterable[str], output: str, params: Optional[dict], compute: Callable[[], object]):
+        """Devuelve (resultado, acierto): restaura desde la caché o ejecuta compute() y guarda."""
+        inputs = list(inputs)
+        key = self.key(op, inputs, params)
+        hit, result = self.fetch(key, output)
+        if hit:
+            return result, True
+        # Una salida previa puede ser un hardlink a otra entrada: se suelta para no escribir sobre ella
+        if os.path.isfile(output) and os.stat(output).st_nlink > 1:
+            os.remove(output)
+        result = compute()
+        self.store(key, output, result)
+        return result, False
+
+    def stats(self) -> dict:
+        entries = size = 0
+        for d, _, names in os.walk(self.root):
+            if "meta.json" in names:
+                entries += 1
+            size += sum(os.path.getsize(os.path.join(d, n)) for n in names)
+        return {"hits": self.hits, "misses": self.misses, "stores": self.stores, "evictions": self.evictions,
+                "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+
+def cached_call(cache: Optional[ResultCache], op: str, inputs, output: str, params: Optional[dict], fn, *args,
+                on_hit: Optional[Callable[[], None]] = None, **kwargs):
+    """fn(*args, **kwargs) detrás de la caché (kwargs como progress/cancel pasan tal cual)."""
+    if cache is None:
+        return fn(*args, **kwargs)
+    result, hit = cache.run(op, inputs, output, params, lambda: fn(*args, **kwargs))
+    if hit and on_hit:
+        on_hit()
+    return result
@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+# Servidor local de trabajos: un proceso que queda corriendo con un pool de
+# workers ya calientes (PyMuPDF, pypdf y Pillow importados), para que los
+# scripts que llaman a la herramienta cientos de veces no paguen en cada
+# llamada el arranque del intérprete ni la importación de las bibliotecas.
+# Habla HTTP en localhost o en un socket Unix; los trabajos son los
+# diccionarios de model/jobs.py.
+#
+#   POST   /jobs               {"op": "compress", "input": ..., "output": ...} → {"id": ...}
+#   GET    /jobs               estado de todos los trabajos
+#   GET    /jobs/<id>?wait=30  estado (espera hasta 30 s a que termine)
+#   GET    /jobs/<id>/events   un JSON por línea con estado y progreso hasta que termina
+#   DELETE /jobs/<id>          cancela
+#   GET    /health
+#
+# Siempre exige un token (Authorization: Bearer): si no se indica uno, se genera
+# al arrancar, se imprime y se guarda en un archivo 0600 que leen los clientes
+# del mismo usuario. Las peticiones con Origin (navegadores), los POST que no
+# son application/json y los Host que no son loopback (rebinding de DNS) se
+# rechazan: un trabajo puede leer y escribir cualquier archivo del usuario.
+import hmac
+import http.client
+import itertools
+import json
+import multiprocessing
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from model import lazy
+from model.pdf_ops import OperationCancelled, Progress, cpu_count
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+SERVER_ENV = "PDF_TOOLBOX_SERVER"  # dirección del servidor para la CLI y la interfaz
+TOKEN_ENV = "PDF_TOOLBOX_TOKEN"
+PROGRESS_INTERVAL = 0.1   # s entre eventos de progreso de un trabajo
+CANCEL_POLL = 0.2         # s entre consultas de cancelación desde el worker
+HEARTBEAT = 1.0           # s máximos sin evento en /events (el cliente revisa su cancelación)
+KEEP_FINISHED = 1000      # trabajos terminados que se conservan para consultar
+MAX_BODY = 16 * 1024 * 1024
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+FINAL = ("done", "failed", "cancelled")
+
+
+def default_token_path() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pdf_toolbox", "server_token")
+
+def _write_token(path: str, token: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as fp:
+        fp.write(token)
+    os.chmod(path, 0o600)  # por si ya existía con otros permisos
+
+def _read_token(path: str) -> Optional[str]:
+    try:
+        with open(path) as fp:
+            return fp.read().strip() or None
+    except OSError:
+        return None
+
+def _loopback_host(value: str) -> bool:
+    # "localhost", "localhost:8765", "127.0.0.1:8765", "[::1]:8765"
+    host = value.rsplit("]", 1)[0].lstrip("[") if value.startswith("[") else value.rsplit(":", 1)[0]
+    return host.lower() in LOOPBACK_HOSTS
+
+
+class ServerError(RuntimeError):
+    """Respuesta de error del servidor (status HTTP y mensaje)."""
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+# ---------- Workers (procesos del pool) ----------
+_events = None
+_cancelled = None
+
+def _init_worker(events, cancelled):
+    global _events, _cancelled
+    _events, _cancelled = events, cancelled
+    lazy.warm(lazy.PREWARM + ("model.jobs",))
+
+def _ping() -> int:
+    return os.getpid()
+
+class _RemoteCancel:
+    """cancel.is_set() de un trabajo: consulta el diccionario compartido cada CANCEL_POLL s."""
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._set, self._last = False, 0.0
+
+    def is_set(self) -> bool:
+        now = time.monotonic()
+        if not self._set and now - self._last >= CANCEL_POLL:
+            self._last = now
+            self._set = self.job_id in _cancelled
+        return self._set
+
+def _run(job_id: str, job: dict) -> dict:
+    from model.jobs import run_job
+    last = [0.0]
+
+    def progress(done, total):
+        now = time.monotonic()
+        if done >= total or now - last[0] >= PROGRESS_INTERVAL:
+            last[0] = now
+            _events.put((job_id, done, total))
+
+    _events.put((job_id, 0, 0))  # empezó
+    out = job.get("output")
+    existed = bool(out) and os.path.exists(out)
+    res = run_job(job, progress, _RemoteCancel(job_id))
+    if not res["ok"] and job_id in _cancelled and not existed and out and os.path.isfile(out):
+        os.remove(out)  # salida parcial de un trabajo cancelado
+    return res
+
+
+# ---------- Servidor ----------
+class JobServer:
+    """Cola de trabajos sobre un pool de procesos calientes; seguro entre hilos."""
+    def __init__(self, workers: Optional[int] = None):
+        ctx = multiprocessing.get_context("spawn")
+        self.workers = max(1, workers or cpu_count())
+        self._manager = ctx.Manager()
+        self._cancelled = self._manager.dict()
+        self._events = ctx.Queue()
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=ctx, initializer=_init_worker,
+                                        initargs=(self._events, self._cancelled))
+        self.jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._futures = {}
+        self._seq = itertools.count(1)
+        self._cv = threading.Condition()
+        self.started = time.time()
+        threading.Thread(target=self._pump, name="job-events", daemon=True).start()
+        # Arranca todos los workers ya: el primer trabajo no paga la importación
+        for f in [self.pool.submit(_ping) for _ in range(self.workers)]:
+            f.result()
+
+    def submit(self, job: dict) -> dict:
+        from model.jobs import OPERATIONS
+        if not isinstance(job, dict) or job.get("op") not in OPERATIONS:
+            raise ServerError(400, f"Operación desconocida: {job.get('op') if isinstance(job, dict) else job}")
+        with self._cv:
+            job_id = f"{next(self._seq)}-{os.urandom(3).hex()}"
+            rec = {"id": job_id, "op": job["op"], "status": "queued", "done": 0, "total": 0,
+                   "created": time.time(), "started": None, "finished": None, "result": None, "version": 0}
+            self.jobs[job_id] = rec
+            self._prune()
+            # Dentro del candado (reentrante): _finish no puede adelantarse al registro del future
+            self._futures[job_id] = fut = self.pool.submit(_run, job_id, job)
+            fut.add_done_callback(lambda f, jid=job_id: self._finish(jid, f))
+            return self.view(rec)
+
+    def _update(self, rec: dict, **fields):
+        # Con self._cv tomado
+        rec.update(fields)
+        rec["version"] += 1
+        self._cv.notify_all()
+
+    def _pump(self):
+        # Progreso que envían los workers
+        while True:
+            try:
+                job_id, done, total = self._events.get()
+            except (EOFError, OSError, ValueError):
+                return
+            with self._cv:
+                rec = self.jobs.get(job_id)
+                if rec is None or rec["status"] in FINAL:
+                    continue
+                if rec["status"] == "queued":
+                    self._update(rec, status="running", started=time.time())
+                if total:
+                    self._update(rec, done=done, total=total)
+
+    def _finish(self, job_id: str, fut):
+        if fut.cancelled():
+            status, result = "cancelled", None
+        else:
+            try:
+                result = fut.result()
+                status = "done" if result.get("ok") else "failed"
+            except Exception as e:  # p. ej. un worker murió
+                result, status = {"ok": False, "error": f"{type(e).__name__}: {e}"}, "failed"
+        if status == "failed" and self._cancelled.pop(job_id, None):
+            status = "cancelled"
+        with self._cv:
+            self._futures.pop(job_id, None)
+            rec = self.jobs.get(job_id)
+            if rec is not None:
+                self._update(rec, status=status, result=result, finished=time.time())
+
+    def _prune(self):
+        finished = [k for k, r in self.jobs.items() if r["status"] in FINAL]
+        for k in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del self.jobs[k]
+
+    def cancel(self, job_id: str) -> dict:
+        with self._cv:
+            rec = self._get(job_id)
+            fut = self._futures.get(job_id)
+        if rec["status"] not in FINAL and not (fut is not None and fut.cancel()):
+            # Ya corriendo: el worker lo ve en su próximo tick()
+            self._cancelled[job_id] = True
+        return self.view(rec)
+
+    def _get(self, job_id: str) -> dict:
+        rec = self.jobs.get(job_id)
+        if rec is None:
+            raise ServerError(404, f"Trabajo desconocido: {job_id}")
+        return rec
+
+    @staticmethod
+    def view(rec: dict) -> dict:
+        return {k: v for k, v in rec.items() if k != "version"}
+
+    def status(self, job_id: str, wait: float = 0) -> dict:
+        with self._cv:
+            rec = self._get(job_id)
+            if wait > 0:
+                self._cv.wait_for(lambda: rec["status"] in FINAL, wait)
+            return self.view(rec)
+
+    def events(self, job_id: str) -> Iterator[dict]:
+        """Estado cada vez que cambia (o cada HEARTBEAT s) hasta que el trabajo termina."""
+        seen = -1
+        while True:
+            with self._cv:
+                rec = self._get(job_id)
+                self._cv.wait_for(lambda: rec["version"] != seen, HEARTBEAT)
+                seen, snapshot = rec["version"], self.view(rec)
+            yield snapshot
+            if snapshot["status"] in FINAL:
+                return
+
+    def list(self) -> List[dict]:
+        with self._cv:
+            return [self.view(r) for r in self.jobs.values()]
+
+    def health(self) -> dict:
+        with self._cv:
+            active = sum(1 for r in self.jobs.values() if r["status"] not in FINAL)
+        return {"ok": True, "pid": os.getpid(), "workers": self.workers, "active": active,
+                "uptime_s": round(time.time() - self.started, 1)}
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        for job_id in list(self._futures):
+            self._cancelled[job_id] = True
+        self.pool.shutdown(wait=True)
+        self._manager.shutdown()
+
+
+# ---------- HTTP ----------
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "pdf_toolbox"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def address_string(self):
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def _send(self, status: int, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        app: JobServer = self.server.app
+        try:
+            if "Origin" in self.headers:
+                raise ServerError(403, "No se aceptan peticiones desde navegadores")
+            if not _loopback_host(self.headers.get("Host", "")):
+                raise ServerError(403, "Host no permitido")
+            if not hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {self.server.token}"):
+                raise ServerError(401, "Token inválido")
+            if parts == ["health"] and method == "GET":
+                return self._send(200, app.health())
+            if parts == ["jobs"] and method == "GET":
+                return self._send(200, {"jobs": app.list()})
+            if parts == ["jobs"] and method == "POST":
+                if self.headers.get_content_type() != "application/json":
+                    raise ServerError(415, "El cuerpo debe ser application/json")
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_BODY:
+                    raise ServerError(413, "Cuerpo demasiado grande")
+                try:
+                    job = json.loads(self.rfile.read(length) or b"null")
+                except ValueError:
+                    raise ServerError(400, "JSON inválido")
+                return self._send(202, app.submit(job))
+            if len(parts) == 2 and parts[0] == "jobs" and method == "GET":
+                return self._send(200, app.status(parts[1], float(query.get("wait", ["0"])[0])))
+            if len(parts) == 2 and parts[0] == "jobs" and method == "DELETE":
+                return self._send(200, app.cancel(parts[1]))
+            if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events" and method == "GET":
+                return self._stream(app.events(parts[1]))
+            raise ServerError(404, f"Ruta desconocida: {method} {url.path}")
+        except ServerError as e:
+            self._send(e.status, {"error": str(e).split(": ", 1)[1]})
+        except (ValueError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+
+    def _stream(self, events: Iterator[dict]):
+        first = next(events)  # un 404 sale antes de mandar cabeceras
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for event in itertools.chain([first], events):
+                self.wfile.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # el cliente se fue; el trabajo sigue
+        self.close_connection = True
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+# Cola de conexiones pendientes: run_many abre una por trabajo en espera (el valor por defecto es 5)
+BACKLOG = 128
+
+class _TCPHTTPServer(ThreadingHTTPServer):
+    request_queue_size = BACKLOG
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = BACKLOG
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)  # BaseHTTPRequestHandler espera (host, puerto)
+
+
+def make_server(app: JobServer, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                unix_socket: Optional[str] = None, token: Optional[str] = None, verbose: bool = False):
+    """Servidor HTTP (TCP o socket Unix) sobre app; llamar a serve_forever().
+
+    Sin token se genera uno (httpd.token).
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)  # socket viejo de una ejecución anterior
+        httpd = _UnixHTTPServer(unix_socket, _Handler)
+        os.chmod(unix_socket, 0o600)
+    else:
+        httpd = _TCPHTTPServer((host, port), _Handler)
+    httpd.app, httpd.token, httpd.verbose = app, token or secrets.token_urlsafe(32), verbose
+    return httpd
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_socket: Optional[str] = None,
+          workers: Optional[int] = None, token: Optional[str] = None, verbose: bool = True,
+          token_path: Optional[str] = None):
+    """Corre el servidor hasta Ctrl+C o SIGTERM; el token queda en token_path mientras corre."""
+    app = JobServer(workers)
+    httpd = make_server(app, host, port, unix_socket, token, verbose)
+    token_path = token_path or default_token_path()
+    _write_token(token_path, httpd.token)
+    try:
+        # shutdown() espera a serve_forever: desde otro hilo
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=httpd.shutdown, daemon=True).start())
+    except ValueError:
+        pass  # fuera del hilo principal
+    where = unix_socket or "http://%s:%d" % httpd.server_address[:2]
+    print(f"PDF Toolbox: {app.workers} workers escuchando en {where}", flush=True)
+    if not token:
+        print(f"Token: {httpd.token} (guardado en {token_path})", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        app.close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        if _read_token(token_path) == httpd.token:
+            os.unlink(token_path)  # otro servidor pudo haberlo reemplazado
+
+
+# ---------- Cliente ----------
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+# Claves de un trabajo con rutas: el servidor no comparte el directorio actual del cliente
+_PATH_KEYS = ("input", "output", "out_dir", "recipe")
+
+def absolute_paths(job: dict) -> dict:
+    job = dict(job)
+    for key in _PATH_KEYS:
+        if isinstance(job.get(key), str):
+            job[key] = os.path.abspath(job[key])
+    if job.get("inputs"):
+        job["inputs"] = [os.path.abspath(p) for p in job["inputs"]]
+    if isinstance(job.get("cache"), str):
+        job["cache"] = os.path.abspath(job["cache"])
+    return job
+
+class ServerClient:
+    """Cliente del servidor: "http://host:puerto", "host:puerto" o la ruta del socket Unix.
+
+    Token: el indicado, $PDF_TOOLBOX_TOKEN o el que guardó el servidor al arrancar.
+    """
+    def __init__(self, address: Optional[str] = None, token: Optional[str] = None, timeout: float = 30):
+        address = address or os.environ.get(SERVER_ENV) or f"{DEFAULT_HOST}:{DEFAULT_PORT}"
+        self.token = token or os.environ.get(TOKEN_ENV)
+        self.timeout = timeout
+        if address.startswith("unix:") or (os.sep in address and "://" not in address):
+            self.unix_path, self.host, self.port = address.split("unix:", 1)[-1], None, None
+        else:
+            url = urlsplit(address if "://" in address else f"http://{address}")
+            self.unix_path, self.host, self.port = None, url.hostname, url.port or DEFAULT_PORT
+
+    def _connection(self, timeout):
+        if self.unix_path:
+            return _UnixConnection(self.unix_path, timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _open(self, method: str, path: str, body=None, timeout=None):
+        conn = self._connection(self.timeout if timeout is None else timeout)
+        headers = {"Content-Type": "application/json"}
+        # El archivo se lee en cada petición: el servidor puede arrancar después que el cliente
+        token = self.token or _read_token(default_token_path())
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        conn.request(method, path, json.dumps(body).encode("utf-8") if body is not None else None, headers)
+        resp = conn.getresponse()
+        if resp.status >= 400:
+            try:
+                message = json.loads(resp.read()).get("error", resp.reason)
+            except ValueError:
+                message = resp.reason
+            conn.close()
+            raise ServerError(resp.status, message)
+        return conn, resp
+
+    def _request(self, method: str, path: str, body=None, timeout=None) -> dict:
+        conn, resp = self._open(method, path, body, timeout)
+        try:
+            return json.loads(resp.read())
+        finally:
+            conn.close()
+
+    def health(self) -> dict:
+        return self._request("GET", "/health")
+
+    def submit(self, job: dict) -> str:
+        return self._request("POST", "/jobs", absolute_paths(job))["id"]
+
+    def status(self, job_id: str, wait: float = 0) -> dict:
+        return self._request("GET", f"/jobs/{job_id}?wait={wait}", timeout=self.timeout + wait)
+
+    def cancel(self, job_id: str) -> dict:
+        return self._request("DELETE", f"/jobs/{job_id}")
+
+    def events(self, job_id: str) -> Iterator[dict]:
+        conn, resp = self._open("GET", f"/jobs/{job_id}/events", timeout=self.timeout + HEARTBEAT)
+        try:
+            for line in resp:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+    def run(self, job: dict, progress: Progress = None, cancel=None) -> dict:
+        """Envía el trabajo y espera su resultado (el de jobs.run_job)."""
+        job_id = self.submit(job)
+        state = None
+        for state in self.events(job_id):
+            if progress and state["total"]:
+                progress(state["done"], state["total"])
+            if cancel is not None and cancel.is_set() and state["status"] not in FINAL:
+                self.cancel(job_id)
+        if state is None or state["status"] not in FINAL:
+            state = self.status(job_id, wait=HEARTBEAT)
+        return state["result"] or {"op": job.get("op"), "ok": False, "error": "Cancelado"}
+
+    def run_many(self, jobs: List[dict], wait: float = 60, cancel=None) -> Iterator[Tuple[int, dict]]:
+        """(índice, resultado) de cada trabajo según terminan.
+
+        Con cancel.is_set() (o al cerrar el iterador) cancela en el servidor los que faltan.
+        """
+        ids = [self.submit(job) for job in jobs]
+
+        def result(job_id):
+            while True:
+                state = self.status(job_id, wait=wait)
+                if state["status"] in FINAL:
+                    return state["result"] or {"op": state["op"], "ok": False, "error": "Cancelado"}
+
+        pending = set(ids)
+        with ThreadPoolExecutor(max_workers=min(32, len(ids) or 1)) as waiters:
+            futures = {waiters.submit(result, job_id): i for i, job_id in enumerate(ids)}
+            waiting = set(futures)
+            try:
+                while waiting:
+                    finished, waiting = futures_wait(waiting, timeout=CANCEL_POLL, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        pending.discard(ids[futures[fut]])
+                        yield futures[fut], fut.result()
+                    if cancel is not None and cancel.is_set():
+                        raise OperationCancelled("Lote cancelado")
+            finally:
+                for job_id in pending:
+                    try:
+                        self.cancel(job_id)
+                    except (OSError, ServerError):
+                        pass
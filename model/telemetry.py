@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# Instrumentación de operaciones: cada trabajo deja una línea JSON en un log
+# rotativo local con tiempos por fase (abrir, render, codificar, guardar...),
+# bytes de entrada y salida, pico de memoria y versiones de las bibliotecas.
+# Las fases se marcan con phase() dentro de pdf_ops; fuera de un trace no
+# cuestan nada. Con profile=True el trabajo además se perfila con cProfile.
+import contextvars
+import io
+import json
+import logging
+import logging.handlers
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LOG_ENV = "PDF_TOOLBOX_LOG"   # ruta del log; "0" lo desactiva
+LOG_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+PROFILE_TOP = 15              # funciones del perfil que van en el registro
+
+_current: contextvars.ContextVar = contextvars.ContextVar("pdf_toolbox_trace", default=None)
+_loggers: Dict[str, logging.Logger] = {}
+_loggers_lock = threading.Lock()
+_versions: Optional[dict] = None
+# Trabajos medidos en curso en este proceso: el pico de RSS es del proceso, así
+# que solo se reinicia y se atribuye a un trabajo cuando corre solo
+_active: set = set()
+_active_lock = threading.Lock()
+
+
+def default_log_path() -> Optional[str]:
+    env = os.environ.get(LOG_ENV)
+    if env is not None:
+        return None if env in ("", "0") else env
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pdf_toolbox", "logs", "jobs.jsonl")
+
+def rss_mb() -> float:
+    """Memoria residente actual del proceso en MB (0 si no se puede medir)."""
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # Sin /proc solo hay pico, no valor actual
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return 0.0
+
+def _reset_peak() -> bool:
+    # Linux: "5" en clear_refs reinicia VmHWM de todo el proceso (no solo del hilo)
+    try:
+        with open("/proc/self/clear_refs", "w") as fp:
+            fp.write("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/status") as fp:
+            return next(int(l.split()[1]) for l in fp if l.startswith("VmHWM:")) / 1024
+    except (OSError, StopIteration, ValueError):
+        return None
+
+def versions() -> dict:
+    global _versions
+    if _versions is None:
+        found = {"python": platform.python_version(), "platform": platform.platform()}
+        for name, module, attr in (("pymupdf", "pymupdf", "VersionBind"), ("pypdf", "pypdf", "__version__"),
+                                   ("pillow", "PIL", "__version__")):
+            try:
+                found[name] = getattr(__import__(module), attr)
+            except Exception:
+                found[name] = None
+        _versions = found
+    return _versions
+
+def _bytes(paths: Iterable[str]) -> int:
+    total = 0
+    for p in paths:
+        try:
+            if os.path.isdir(p):
+                total += sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(p) for f in files)
+            else:
+                total += os.path.getsize(p)
+        except (OSError, TypeError):
+            pass
+    return total
+
+
+# ---------- Fases ----------
+class Trace:
+    """Mediciones de un trabajo en curso."""
+    def __init__(self, op: str, inputs=(), outputs=()):
+        self.op = op
+        self.inputs, self.outputs = [p for p in inputs if isinstance(p, str)], [p for p in outputs if p]
+        self.phases: Dict[str, List[float]] = {}
+        self.overlapped = False  # otro trabajo medido corrió a la vez en el proceso
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, count: int = 1):
+        with self._lock:
+            acc = self.phases.setdefault(name, [0.0, 0])
+            acc[0] += seconds
+            acc[1] += count
+
+@contextmanager
+def phase(name: str):
+    """Suma la duración del bloque a la fase name del trabajo actual (si hay uno)."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start)
+
+def add_phase(name: str, seconds: float, count: int = 1):
+    """Fase medida por otra vía (p. ej. en workers); sin trabajo actual no hace nada."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds, count)
+
+
+# ---------- Registro ----------
+def _logger(path: str) -> logging.Logger:
+    with _loggers_lock:
+        log = _loggers.get(path)
+        if log is None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_BYTES, backupCount=LOG_BACKUPS,
+                                                           encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            log = logging.getLogger(f"pdf_toolbox.jobs.{len(_loggers)}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            log.addHandler(handler)
+            _loggers[path] = log
+        return log
+
+def _profile_summary(profiler, path: Optional[str], op: str) -> dict:
+    import pstats
+    stats = pstats.Stats(profiler, stream=io.StringIO()).sort_stats("cumulative")
+    top = []
+    for func in stats.fcn_list[:PROFILE_TOP]:
+        calls, _, own, cum, _ = stats.stats[func]
+        top.append({"function": f"{os.path.basename(func[0])}:{func[1]}({func[2]})", "calls": calls,
+                    "own_s": round(own, 4), "cumulative_s": round(cum, 4)})
+    out = {"top": top}
+    if path:
+        # El perfil completo, para abrirlo con pstats o snakeviz
+        folder = os.path.join(os.path.dirname(os.path.abspath(path)), "profiles")
+        os.makedirs(folder, exist_ok=True)
+        out["file"] = os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}-{op}-{os.getpid()}.prof")
+        stats.dump_stats(out["file"])
+    return out
+
+@contextmanager
+def trace(op: str, inputs=(), outputs=(), profile: bool = False, log_path: Optional[str] = "default"):
+    """Mide el bloque como un trabajo y escribe su registro; devuelve el Trace.
+
+    peak_rss_mb es del trabajo (peak_scope "job") solo si corrió solo en el proceso;
+    si no, es el pico del proceso, que incluye a los otros trabajos (peak_scope "process").
+    """
+    path = default_log_path() if log_path == "default" else log_path
+    t = Trace(op, inputs, outputs)
+    token = _current.set(t)
+    with _active_lock:
+        for other in _active:
+            other.overlapped = t.overlapped = True
+        _active.add(t)
+        # Reiniciar VmHWM con otro trabajo en curso le borraría su pico
+        exact_peak = _reset_peak() if not t.overlapped else _peak_mb() is not None
+    rss_start = rss_mb()
+    if profile:
+        import cProfile  # solo al perfilar: pstats y cProfile no entran en el arranque
+    profiler = cProfile.Profile() if profile else None
+    status, error = "ok", None
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield t
+    except BaseException as e:
+        # OperationCancelled y JobCancelled se reconocen por el nombre: no se importan aquí
+        status = "cancelled" if "Cancel" in type(e).__name__ else "error"
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        seconds = time.perf_counter() - start
+        _current.reset(token)
+        with _active_lock:
+            _active.discard(t)
+        peak = _peak_mb() if exact_peak else None
+        t.record = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "op": op, "status": status, "seconds": round(seconds, 4),
+            "phases": {k: {"seconds": round(v[0], 4), "count": v[1]} for k, v in t.phases.items()},
+            "bytes_in": _bytes(t.inputs), "bytes_out": _bytes(t.outputs),
+            "peak_rss_mb": round(peak if peak is not None else max(rss_start, rss_mb()), 1),
+            "peak_scope": "job" if peak is not None and not t.overlapped else "process",
+            "pid": os.getpid(), "versions": versions(),
+        }
+        if error:
+            t.record["error"] = error
+        if profiler:
+            t.record["profile"] = _profile_summary(profiler, path, op)
+        if path:
+            try:
+                _logger(path).info(json.dumps(t.record, ensure_ascii=False, default=str))
+            except OSError:
+                pass
+
+class Instrumented:
+    """target envuelto en trace(); serializable (sirve para trabajos en otro proceso)."""
+    def __init__(self, target, op: Optional[str] = None, inputs=(), outputs=(), profile: bool = False):
+        self.target = target
+        self.__name__ = op or getattr(target, "__name__", "job")
+        self.inputs, self.outputs, self.profile = list(inputs), list(outputs), profile
+
+    def __call__(self, *args, **kwargs):
+        with trace(self.__name__, self.inputs, self.outputs, self.profile):
+            return self.target(*args, **kwargs)
+
+def last_jobs(n: int = 20, path: Optional[str] = "default") -> List[dict]:
+    """Últimos n registros del log, el más reciente primero."""
+    path = default_log_path() if path == "default" else path
+    if not path or not os.path.isfile(path):
+        return []
+    with open(path, "rb") as fp:
+        fp.seek(0, os.SEEK_END)
+        fp.seek(max(0, fp.tell() - 256 * 1024))
+        lines = fp.read().splitlines()
+    records = []
+    for line in reversed(lines):
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue  # primera línea cortada o escritura a medias
+        if len(records) >= n:
+            break
+    return records
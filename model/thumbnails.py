@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# Miniaturas de página: render a baja resolución en segundo plano, caché en
+# memoria (LRU limitado por bytes) y caché en disco con clave
+# (ruta, mtime, tamaño, página, DPI). No depende de tkinter: entrega PNG en bytes.
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple
+
+from model.lazy import lazy
+
+fitz = lazy("pymupdf", "fitz")
+
+THUMB_DPI = 24
+MEMORY_BYTES = 64 * 1024 * 1024
+DISK_BYTES = 512 * 1024 * 1024
+OPEN_DOCS = 4  # documentos abiertos que conserva el hilo de render
+
+Key = Tuple[str, int, int, int, int]
+OnThumb = Callable[[str, int, bytes], None]
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pdf_toolbox", "thumbs")
+
+
+class ThumbnailCache:
+    """Miniaturas PNG por página con caché en memoria y en disco y un hilo de render."""
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = MEMORY_BYTES,
+                 max_disk_bytes: int = DISK_BYTES, dpi: int = THUMB_DPI):
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.max_bytes, self.max_disk_bytes, self.dpi = max_bytes, max_disk_bytes, dpi
+        self._mem: "OrderedDict[Key, bytes]" = OrderedDict()
+        self._mem_bytes = 0
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()  # fitz no admite render concurrente del mismo documento
+        self._cv = threading.Condition(self._lock)
+        # Pedidos pendientes: el más reciente se atiende primero (lo que el usuario está viendo)
+        self._pending: "OrderedDict[Key, Tuple[str, OnThumb]]" = OrderedDict()
+        self._docs: "OrderedDict[str, object]" = OrderedDict()
+        self._thread = None
+        self._closed = False
+        self.hits = self.misses = self.rendered = 0
+
+    # ---- Claves ----
+    def key(self, path: str, page: int, dpi: Optional[int] = None) -> Key:
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size, page, dpi or self.dpi)
+
+    def _disk_path(self, key: Key) -> str:
+        digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".png")
+
+    # ---- Memoria (LRU) ----
+    def _remember(self, key: Key, data: bytes):
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= len(old)
+            self._mem[key] = data
+            self._mem_bytes += len(data)
+            while self._mem_bytes > self.max_bytes and len(self._mem) > 1:
+                _, evicted = self._mem.popitem(last=False)
+                self._mem_bytes -= len(evicted)
+
+    def get(self, path: str, page: int, dpi: Optional[int] = None) -> Optional[bytes]:
+        """Miniatura si ya está en memoria; nunca bloquea (seguro desde el hilo de Tk)."""
+        try:
+            key = self.key(path, page, dpi)
+        except OSError:
+            return None
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+            return data
+
+    # ---- Disco y render ----
+    def _read_disk(self, key: Key) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as fp:
+                return fp.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: Key, data: bytes):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as fp:
+                fp.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _doc(self, path: str):
+        doc = self._docs.pop(path, None)
+        if doc is None:
+            doc = fitz.open(path)
+            while len(self._docs) >= OPEN_DOCS:
+                self._docs.popitem(last=False)[1].close()
+        self._docs[path] = doc
+        return doc
+
+    def _render(self, key: Key) -> bytes:
+        path, _, _, page, dpi = key
+        doc = self._doc(path)
+        zoom = dpi / 72.0
+        pix = doc[page].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        self.rendered += 1
+        return pix.tobytes("png")
+
+    def load(self, path: str, page: int, dpi: Optional[int] = None) -> bytes:
+        """Miniatura desde memoria, disco o render (bloquea: usar fuera del hilo de Tk)."""
+        key = self.key(path, page, dpi)
+        data = self.get(path, page, dpi)
+        if data is not None:
+            return data
+        self.misses += 1
+        data = self._read_disk(key)
+        if data is None:
+            with self._render_lock:
+                data = self._render(key)
+            self._write_disk(key, data)
+        self._remember(key, data)
+        return data
+
+    def page_count(self, path: str) -> int:
+        with self._render_lock:
+            return self._doc(os.path.abspath(path)).page_count
+
+    # ---- Segundo plano ----
+    def request(self, path: str, pages: Iterable[int], on_thumb: OnThumb, dpi: Optional[int] = None):
+        """Encola miniaturas; on_thumb(path, página, png) se llama desde el hilo de render.
+
+        Las que ya están en memoria se entregan de inmediato en el hilo que llama.
+        """
+        ready = []
+        with self._cv:
+            # Al revés: la primera página pedida queda al final de la pila y sale primero
+            for page in reversed(list(pages)):
+                try:
+                    key = self.key(path, page, dpi)
+                except OSError:
+                    return
+                data = self._mem.get(key)
+                if data is not None:
+                    ready.append((page, data))
+                    continue
+                self._pending.pop(key, None)
+                self._pending[key] = (path, on_thumb)
+            if self._pending and self._thread is None:
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+            self._cv.notify()
+        for page, data in ready:
+            on_thumb(path, page, data)
+
+    def forget_pending(self, path: Optional[str] = None):
+        """Descarta pedidos aún no atendidos (todos o los de un archivo)."""
+        target = os.path.abspath(path) if path else None
+        with self._lock:
+            for key in [k for k in self._pending if target is None or k[0] == target]:
+                del self._pending[key]
+
+    def _worker(self):
+        while True:
+            with self._cv:
+                while not self._pending and not self._closed:
+                    self._cv.wait()
+                if self._closed:
+                    return
+                key, (path, on_thumb) = self._pending.popitem(last=True)
+            try:
+                data = self.load(path, key[3], key[4])
+            except Exception:
+                continue
+            try:
+                on_thumb(path, key[3], data)
+            except Exception:
+                pass
+
+    def prune_disk(self):
+        """Borra las miniaturas más antiguas hasta quedar bajo max_disk_bytes."""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return
+        files = []
+        for d, _, names in os.walk(self.cache_dir):
+            for n in names:
+                p = os.path.join(d, n)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, p))
+        total = sum(f[1] for f in files)
+        for _, size, p in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            self._pending.clear()
+            self._cv.notify_all()
+        with self._render_lock:
+            while self._docs:
+                self._docs.popitem()[1].close()
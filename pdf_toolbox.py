@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Uso sin interfaz gráfica: python -m pdf_toolbox <comando> ...
+# No importa tkinter; imprime los resultados como JSON en stdout.
+import argparse
+import json
+import os
+import sys
+import time
+
+from model import jobs as jobs_mod, pipeline, telemetry
+from model.batch import read_passwords, summarize
+from model.largefile import MEMORY_MB
+from model.probe import probe_many
+from model.server import DEFAULT_HOST, DEFAULT_PORT, SERVER_ENV, TOKEN_ENV, ServerClient, serve
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+
+
+def _single_outputs(args, inputs, ext=".pdf"):
+    # -o para un solo archivo; --out-dir para varios
+    if args.output:
+        if len(inputs) != 1:
+            raise SystemExit("-o solo admite un archivo de entrada; usa --out-dir")
+        return [args.output]
+    if not args.out_dir:
+        raise SystemExit("Indica -o o --out-dir")
+    os.makedirs(args.out_dir, exist_ok=True)
+    return [jobs_mod.output_for(src, args.out_dir, ext) for src in inputs]
+
+LARGE_OPS = {"merge", "split", "rotate", "unlock"}
+
+def build_jobs(args) -> list:
+    jobs = _build_jobs(args)
+    if args.cache:
+        jobs = [dict(j, cache=args.cache, cache_mb=args.cache_mb) for j in jobs]
+    if args.large:
+        jobs = [dict(j, large=True, memory_mb=args.memory_mb) if j.get("op") in LARGE_OPS else j for j in jobs]
+    if args.profile:
+        jobs = [dict(j, profile=True) for j in jobs]
+    return jobs
+
+def _build_jobs(args) -> list:
+    if args.command == "run":
+        with open(args.manifest, encoding="utf-8") as fp:
+            data = json.load(fp)
+        return data["jobs"] if isinstance(data, dict) else data
+
+    inputs = jobs_mod.expand_inputs(args.inputs)
+    if not inputs:
+        raise SystemExit("No se encontraron archivos de entrada")
+
+    if args.command == "merge":
+        if not args.output:
+            raise SystemExit("merge requiere -o")
+        return [{"op": "merge", "inputs": inputs, "output": args.output}]
+
+    if args.command == "convert":
+        images = [p for p in inputs if p.lower().endswith(IMAGE_EXTS)]
+        if images and len(images) == len(inputs):
+            if not args.output:
+                raise SystemExit("Imágenes → PDF requiere -o")
+            return [{"op": "images_to_pdf", "inputs": images, "output": args.output, "max_side": args.max_side,
+                     "quality": args.quality}]
+        opts = {"dpi": args.dpi, "fmt": args.fmt, "png_level": args.png_level, "quality": args.quality}
+        if args.container != "files":
+            # Un solo ZIP o TIFF con las páginas de todas las entradas
+            if not args.output:
+                raise SystemExit(f"--container {args.container} requiere -o")
+            return [dict(opts, op="pdf_to_images", inputs=inputs, output=args.output, container=args.container)]
+        out_dir = args.out_dir or args.output
+        if not out_dir:
+            raise SystemExit("PDF → imágenes requiere --out-dir")
+        # Con varios PDFs, una subcarpeta por archivo
+        return [dict(opts, op="pdf_to_images", input=src,
+                     out_dir=out_dir if len(inputs) == 1 else jobs_mod.output_for(src, out_dir)) for src in inputs]
+
+    if args.command == "split":
+        if not args.out_dir:
+            raise SystemExit("split requiere --out-dir")
+        return [{"op": "split", "input": src, "ranges": args.ranges, "merge": args.merge, "mode": args.mode,
+                 "every": args.every, "level": args.level, "max_mb": args.max_mb,
+                 "out_dir": args.out_dir if len(inputs) == 1 else jobs_mod.output_for(src, args.out_dir)} for src in inputs]
+
+    outputs = _single_outputs(args, inputs)
+    if args.command == "pipeline":
+        # Se valida aquí para fallar antes de lanzar trabajos; viaja la ruta (las contraseñas no van al reporte)
+        try:
+            pipeline.parse_recipe(args.recipe)
+        except (OSError, ValueError, RuntimeError) as e:
+            raise SystemExit(f"Receta inválida: {e}")
+        return [{"op": "pipeline", "input": src, "output": out, "recipe": os.path.abspath(args.recipe)}
+                for src, out in zip(inputs, outputs)]
+    params = {
+        "compress": lambda: {"method": args.method, "dpi": args.dpi, "codec": args.codec, "quality": args.quality},
+        "rotate": lambda: {"angle": args.angle, "spec": args.spec, "incremental": args.incremental},
+        "unlock": lambda: {"password": args.password, "passwords": read_passwords(args.passwords) if args.passwords else None},
+    }[args.command]()
+    return [dict(params, op=args.command, input=src, output=out) for src, out in zip(inputs, outputs)]
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pdf_toolbox", description="PDF Toolbox sin interfaz gráfica")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="trabajos en paralelo (procesos)")
+    parser.add_argument("--pretty", action="store_true", help="JSON indentado")
+    parser.add_argument("--cache", nargs="?", const=True, default=None, metavar="DIR",
+                        help="reutilizar resultados de entradas y parámetros idénticos")
+    parser.add_argument("--cache-mb", type=int, default=2048, help="tamaño máximo de la caché")
+    parser.add_argument("--large", action="store_true", help="modo de memoria acotada para merge/split/rotate/unlock")
+    parser.add_argument("--memory-mb", type=int, default=MEMORY_MB, help="techo de memoria del modo --large")
+    parser.add_argument("--profile", action="store_true", help="perfilar cada trabajo con cProfile (.prof junto al log)")
+    parser.add_argument("--server", nargs="?", const="", default=None, metavar="DIRECCIÓN",
+                        help=f"enviar los trabajos al servidor local (host:puerto o socket Unix; por defecto ${SERVER_ENV} "
+                             f"o {DEFAULT_HOST}:{DEFAULT_PORT})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add(name, help_text, out=True, out_dir=False):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("inputs", nargs="+", help="rutas, globs o @lista.txt")
+        if out:
+            p.add_argument("-o", "--output")
+        if out_dir:
+            p.add_argument("--out-dir")
+        return p
+
+    add("merge", "Fusionar PDFs")
+    p = add("split", "Dividir PDF", out=False, out_dir=True)
+    p.add_argument("--ranges", default="1-")
+    p.add_argument("--merge", action="store_true", help="unir el rango en un solo archivo")
+    p.add_argument("--mode", choices=["range", "pages", "bookmarks", "size"], default="range")
+    p.add_argument("--every", type=int, default=1, help="páginas por archivo (--mode pages)")
+    p.add_argument("--level", type=int, default=1, help="nivel de marcador (--mode bookmarks)")
+    p.add_argument("--max-mb", type=float, default=10, help="tamaño máximo por archivo (--mode size)")
+    p = add("compress", "Comprimir PDF", out_dir=True)
+    p.add_argument("--method", choices=["lossless", "images", "raster"], default="lossless")
+    p.add_argument("--dpi", type=int, default=150)
+    p.add_argument("--codec", default="auto")
+    p.add_argument("--quality", type=int, default=75)
+    p = add("convert", "PDF → imágenes o imágenes → PDF", out_dir=True)
+    p.add_argument("--dpi", type=int, default=150)
+    p.add_argument("--fmt", choices=["png", "jpg", "webp", "tiff"], default="png")
+    p.add_argument("--container", choices=["files", "zip", "tiff"], default="files",
+                   help="una imagen por página, un ZIP o un TIFF multipágina")
+    p.add_argument("--png-level", type=int, default=3, help="compresión PNG (0-9)")
+    p.add_argument("--quality", type=int, default=85, help="calidad JPEG/WebP (e imágenes → PDF)")
+    p.add_argument("--max-side", type=int, default=None)
+    p = add("rotate", "Rotar PDF", out_dir=True)
+    p.add_argument("--angle", type=int, choices=[90, 180, 270], default=90)
+    p.add_argument("--spec", help='ángulo por rango, p. ej. "1-3,5:90; 7-:180" (reemplaza --angle)')
+    p.add_argument("--incremental", action="store_true", help="agregar una revisión al final en vez de reescribir")
+    p = add("unlock", "Quitar contraseña", out_dir=True)
+    p.add_argument("--password", default="")
+    p.add_argument("--passwords", metavar="ARCHIVO",
+                   help="contraseñas candidatas, una por línea; solo se escriben los PDFs que se logren abrir")
+    p = add("pipeline", "Aplicar una receta de etapas (unlock, rotate, merge, select, compress) en memoria",
+            out_dir=True)
+    p.add_argument("--recipe", required=True, help="receta .json (o .yaml con PyYAML)")
+    p = sub.add_parser("run", help="Ejecutar un manifiesto JSON de trabajos")
+    p.add_argument("manifest")
+    p = sub.add_parser("info", help="Páginas, cifrado, versión y linealización sin abrir el documento entero")
+    p.add_argument("inputs", nargs="+", help="rutas, globs o @lista.txt")
+    p.add_argument("--images", action="store_true", help="contar también las imágenes (más lento)")
+    p = sub.add_parser("serve", help="Servidor local de trabajos con workers calientes (HTTP o socket Unix)")
+    p.add_argument("--host", default=DEFAULT_HOST)
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--socket", help="escuchar en este socket Unix en lugar de TCP")
+    p.add_argument("--workers", type=int, default=None, help="procesos del pool (por defecto, núcleos)")
+    p.add_argument("--token", default=None, help=f"token exigido en 'Authorization: Bearer' (o ${TOKEN_ENV}); sin él se genera uno")
+    p = sub.add_parser("log", help="Últimos trabajos registrados (tiempos por fase, bytes, memoria)")
+    p.add_argument("-n", type=int, default=20)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "info":
+        files = probe_many(jobs_mod.expand_inputs(args.inputs), images=args.images)
+        json.dump({"files": files}, sys.stdout, ensure_ascii=False, indent=2 if args.pretty else None)
+        sys.stdout.write("\n")
+        return 1 if any("error" in f for f in files) else 0
+    if args.command == "log":
+        json.dump({"log": telemetry.default_log_path(), "jobs": telemetry.last_jobs(args.n)}, sys.stdout,
+                  ensure_ascii=False, indent=2 if args.pretty else None)
+        sys.stdout.write("\n")
+        return 0
+    if args.command == "serve":
+        serve(args.host, args.port, args.socket, args.workers, args.token or os.environ.get(TOKEN_ENV))
+        return 0
+    jobs = build_jobs(args)
+    start = time.perf_counter()
+    if args.server is not None:
+        # El servidor reparte entre sus workers: -j no aplica
+        results = [None] * len(jobs)
+        for i, res in ServerClient(args.server or None).run_many(jobs):
+            results[i] = res
+    else:
+        results = list(jobs_mod.run_jobs(jobs, max(1, args.jobs)))
+    report = dict(summarize(results, time.perf_counter() - start), jobs=results)
+    if args.cache:
+        report["cache_hits"] = sum(1 for r in results if r.get("cached"))
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2 if args.pretty else None)
+    sys.stdout.write("\n")
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
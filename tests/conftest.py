@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# PDFs pequeños generados con PyMuPDF para las pruebas (sin corpus externo).
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Sin log de telemetría ni token del servidor en el ~/.cache del usuario
+os.environ["PDF_TOOLBOX_LOG"] = "0"
+os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="pdf_toolbox_tests_")
+
+import pytest
+
+pymupdf = pytest.importorskip("pymupdf")
+
+PASSWORD = "clave"
+
+
+def _image_png(seed: int) -> bytes:
+    pix = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 64, 64), False)
+    pix.set_rect(pix.irect, (seed * 40 % 256, 90, 200))
+    return pix.tobytes("png")
+
+def make_pdf(path: str, pages: int = 3, objstm: bool = False, toc: bool = False, image: bool = False,
+             password: str = None) -> str:
+    """PDF de prueba: texto por página, marcadores e imagen opcionales; xref stream con objstm."""
+    doc = pymupdf.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Página {i + 1}")
+        if image:
+            page.insert_image(pymupdf.Rect(72, 100, 272, 300), stream=_image_png(1))
+    if toc:
+        doc.set_toc([[1, f"Cap {i + 1}", i + 1] for i in range(pages)])
+    opts = {"use_objstms": True, "garbage": 1} if objstm else {}
+    if password:
+        # RC4: pypdf lo descifra sin el paquete cryptography
+        opts.update(encryption=pymupdf.PDF_ENCRYPT_RC4_128, owner_pw=password, user_pw=password)
+    doc.save(path, **opts)
+    doc.close()
+    return path
+
+@pytest.fixture
+def pdf(tmp_path):
+    """Fábrica: pdf("a.pdf", pages=5, objstm=True, ...) → ruta."""
+    def factory(name: str = "doc.pdf", **kw) -> str:
+        return make_pdf(str(tmp_path / name), **kw)
+    return factory
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# run_batch: un trabajo por archivo, fallos aislados, salidas que nunca pisan las entradas,
+# cancelación sin esperar al trabajo en curso y reporte JSON.
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import PASSWORD
+from model import batch, jobs
+from model.pdf_ops import OperationCancelled
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def test_same_name_from_two_folders(tmp_path, pdf):
+    (tmp_path / "x").mkdir()
+    (tmp_path / "y").mkdir()
+    inputs = [pdf("x/a.pdf", pages=2), pdf("y/a.pdf", pages=3)]
+    out = tmp_path / "out"
+    summary = batch.run_batch("rotate", inputs, str(out), {"angle": 90}, workers=2)
+    assert summary["ok"] == 2 and summary["failed"] == 0
+    assert sorted(os.listdir(out)) == ["a.pdf", "a_2.pdf", batch.REPORT_NAME]
+    with pymupdf.open(str(out / "a_2.pdf")) as doc:
+        assert [p.rotation for p in doc] == [90, 90, 90]
+
+def test_failure_does_not_stop_the_batch(tmp_path, pdf):
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"no es un PDF")
+    summary = batch.run_batch("rotate", [str(broken), pdf("bien.pdf")], str(tmp_path / "out"), {"angle": 180},
+                              workers=1)
+    assert (summary["ok"], summary["failed"]) == (1, 1)
+    report = json.load(open(summary["report"], encoding="utf-8"))
+    assert [r["ok"] for r in report["results"]] == [False, True]
+
+def test_out_dir_equal_to_source_keeps_originals(tmp_path, pdf):
+    a = pdf("a.pdf", pages=2)
+    b = pdf("a_salida.pdf", pages=3)  # choca con el sufijo que recibiría la salida de a.pdf
+    before = {p: open(p, "rb").read() for p in (a, b)}
+    summary = batch.run_batch("rotate", [a, b], str(tmp_path), {"angle": 90}, workers=1, report=False)
+    assert summary["ok"] == 2
+    for path, data in before.items():
+        assert open(path, "rb").read() == data
+    outputs = sorted(set(os.listdir(tmp_path)) - {"a.pdf", "a_salida.pdf"})
+    assert len(outputs) == 2
+    for name in outputs:
+        with pymupdf.open(str(tmp_path / name)) as doc:
+            assert all(p.rotation == 90 for p in doc)
+
+def test_output_for_never_returns_the_input(tmp_path):
+    src = str(tmp_path / "x.pdf")
+    assert jobs.output_for(src, str(tmp_path), ".pdf") == str(tmp_path / "x_salida.pdf")
+    assert jobs.output_for(src, str(tmp_path / "otra"), ".pdf") == str(tmp_path / "otra" / "x.pdf")
+
+def test_cancel_does_not_wait_for_running_job(tmp_path, pdf):
+    # Cada trabajo tarda varios segundos (40 páginas a 400 dpi); cancelar no debe esperar a que termine
+    src = pdf("grande.pdf", pages=40)
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    start = time.perf_counter()
+    with pytest.raises(OperationCancelled):
+        batch.run_batch("compress", [src] * 4, str(tmp_path / "out"), {"method": "raster", "dpi": 400},
+                        workers=1, report=False, cancel=cancel)
+    assert time.perf_counter() - start < 3
+
+def test_workers_in_params_is_overridden(tmp_path, pdf):
+    # Cada archivo renderiza en serie aunque los parámetros pidan workers
+    summary = batch.run_batch("compress", [pdf(pages=2)], str(tmp_path / "out"),
+                              {"method": "raster", "dpi": 30, "workers": 4}, workers=1, report=False)
+    assert summary["ok"] == 1
+
+def test_collect_inputs_walks_folders(tmp_path, pdf):
+    (tmp_path / "sub").mkdir()
+    pdf("a.pdf")
+    pdf("sub/b.pdf")
+    (tmp_path / "notas.txt").write_text("x")
+    found = batch.collect_inputs(str(tmp_path))
+    assert sorted(os.path.relpath(p, tmp_path) for p in found) == ["a.pdf", os.path.join("sub", "b.pdf")]
+
+def test_unlock_with_candidates_keeps_secrets_out_of_the_report(tmp_path, pdf):
+    lista = tmp_path / "claves.txt"
+    lista.write_text(f"x\n {PASSWORD}\n{PASSWORD}\n", encoding="utf-8")
+    passwords = batch.read_passwords(str(lista))
+    assert passwords == ["x", f" {PASSWORD}", PASSWORD]  # los espacios pueden ser parte de la clave
+    inputs = [pdf("a.pdf", password=PASSWORD), pdf("b.pdf", password="otra")]
+    summary = batch.run_batch("unlock", inputs, str(tmp_path / "out"), {"passwords": passwords}, workers=1)
+    assert (summary["ok"], summary["failed"]) == (1, 1)
+    with pymupdf.open(str(tmp_path / "out" / "a.pdf")) as doc:
+        assert not doc.needs_pass and doc.page_count == 3
+    assert not (tmp_path / "out" / "b.pdf").exists()
+    assert PASSWORD not in open(summary["report"], encoding="utf-8").read()
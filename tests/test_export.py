@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# export_images: carpeta, ZIP y TIFF multipágina, en serie y en paralelo.
+import io
+import os
+import zipfile
+
+import pytest
+
+from model import pdf_ops
+
+pymupdf = pytest.importorskip("pymupdf")
+Image = pytest.importorskip("PIL.Image")
+
+A4_72DPI = (595, 842)  # tamaño de new_page() de PyMuPDF a 72 ppp
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_zip_with_one_folder_per_pdf(pdf, tmp_path, workers):
+    a, b = pdf("a.pdf", pages=2), pdf("b.pdf", pages=1)
+    out = str(tmp_path / "paginas.zip")
+    res = pdf_ops.export_images([a, b], out, dpi=72, container="zip", workers=workers)
+    assert res["outputs"] == [out] and res["pages"] == 3
+    with zipfile.ZipFile(out) as zf:
+        assert zf.namelist() == ["a/page_0001.png", "a/page_0002.png", "b/page_0001.png"]
+        assert {zf.getinfo(n).compress_type for n in zf.namelist()} == {zipfile.ZIP_STORED}
+        with Image.open(io.BytesIO(zf.read("a/page_0002.png"))) as img:
+            assert img.format == "PNG" and img.size == A4_72DPI
+
+def test_serial_and_parallel_zip_match(pdf, tmp_path):
+    src = pdf(pages=4, image=True)
+    data = []
+    for workers in (1, 2):
+        out = str(tmp_path / f"{workers}.zip")
+        pdf_ops.export_images(src, out, dpi=40, container="zip", workers=workers)
+        with zipfile.ZipFile(out) as zf:
+            data.append([zf.read(n) for n in zf.namelist()])
+    assert data[0] == data[1]
+
+def test_multipage_tiff(pdf, tmp_path):
+    out = str(tmp_path / "paginas.tif")
+    res = pdf_ops.export_images(pdf(pages=3), out, dpi=36, fmt="png", container="tiff", workers=2)
+    assert res["format"] == "tiff"
+    with Image.open(out) as img:
+        assert img.format == "TIFF" and img.n_frames == 3
+        img.seek(2)
+        assert img.size == (298, 421)  # A4 a 36 ppp, redondeado hacia arriba
+
+def test_files_as_jpeg(pdf, tmp_path):
+    out = pdf_ops.pdf_to_images(pdf(pages=2), str(tmp_path / "img"), dpi=30, fmt="jpg")
+    assert [os.path.basename(p) for p in out] == ["page_0001.jpg", "page_0002.jpg"]
+    with Image.open(out[0]) as img:
+        assert img.format == "JPEG"
+
+def test_unknown_container(pdf, tmp_path):
+    with pytest.raises(RuntimeError, match="Contenedor"):
+        pdf_ops.export_images(pdf(), str(tmp_path / "x.7z"), container="7z")
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Revisión incremental de rotate_pdf_incremental: tabla xref clásica y xref stream.
+import re
+
+import pytest
+
+from conftest import PASSWORD
+from model import pdf_ops
+
+pypdf = pytest.importorskip("pypdf")
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def _rotations_fitz(path):
+    with pymupdf.open(path) as doc:
+        return [p.rotation for p in doc]
+
+def _rotations_pypdf(path):
+    return [p.rotation for p in pypdf.PdfReader(path, strict=True).pages]
+
+
+@pytest.mark.parametrize("objstm", [False, True], ids=["xref_table", "xref_stream"])
+def test_revision_reopens_in_both_readers(pdf, tmp_path, objstm):
+    src = pdf(pages=6, objstm=objstm)
+    out = str(tmp_path / "out.pdf")
+    res = pdf_ops.rotate_pdf_incremental(src, out, "1,3:90; 5-:180")
+    expected = [90, 0, 90, 0, 180, 180]
+    assert _rotations_fitz(out) == expected
+    assert _rotations_pypdf(out) == expected
+    assert res["pages"] == 4
+    # El original queda intacto delante de la revisión
+    original = open(src, "rb").read()
+    assert open(out, "rb").read()[:len(original)] == original
+
+@pytest.mark.parametrize("objstm", [False, True], ids=["xref_table", "xref_stream"])
+def test_trailer_keeps_references(pdf, tmp_path, objstm):
+    out = str(tmp_path / "out.pdf")
+    pdf_ops.rotate_pdf_incremental(pdf(objstm=objstm), out, 90)
+    revision = open(out, "rb").read().rsplit(b"startxref", 2)[-2]
+    assert re.search(rb"/Root \d+ 0 R", revision)
+
+def test_xref_stream_index_in_object_order(pdf, tmp_path):
+    # Páginas en orden inverso a sus números de objeto: el orden de página no sirve para /Index
+    with pymupdf.open(pdf(pages=8)) as doc:
+        doc.select(list(reversed(range(8))))
+        src = str(tmp_path / "reversed.pdf")
+        doc.save(src, use_objstms=True)
+    out = str(tmp_path / "out.pdf")
+    pdf_ops.rotate_pdf_incremental(src, out, "1-4:90")
+    assert _rotations_pypdf(out) == [90] * 4 + [0] * 4
+    index = re.findall(rb"/Index \[([^\]]*)\]", open(out, "rb").read())[-1].split()
+    starts = [int(n) for n in index[::2]]
+    assert starts == sorted(starts)
+
+def test_stacked_revisions_accumulate(pdf, tmp_path):
+    src = pdf(pages=3, objstm=True)
+    first, second = str(tmp_path / "r1.pdf"), str(tmp_path / "r2.pdf")
+    pdf_ops.rotate_pdf_incremental(src, first, 90)
+    pdf_ops.rotate_pdf_incremental(first, second, "2:90")
+    assert _rotations_fitz(second) == [90, 180, 90]
+    assert _rotations_pypdf(second) == [90, 180, 90]
+
+def test_in_memory(pdf):
+    data = pdf_ops.rotate_pdf_incremental(open(pdf(pages=2), "rb").read(), None, 270)["data"]
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        assert [p.rotation for p in doc] == [270, 270]
+
+def test_in_place(pdf):
+    src = pdf(pages=2)
+    size = len(open(src, "rb").read())
+    res = pdf_ops.rotate_pdf_incremental(src, src, "1:90")
+    assert _rotations_pypdf(src) == [90, 0]
+    assert len(open(src, "rb").read()) == size + res["appended_bytes"]
+
+def test_failed_copy_leaves_existing_output(pdf, tmp_path, monkeypatch):
+    out = tmp_path / "out.pdf"
+    out.write_bytes(b"del usuario")
+
+    def copy_half(src, dst):
+        dst.write(src.read(100))
+        raise OSError("disco lleno")
+    monkeypatch.setattr(pdf_ops.shutil, "copyfileobj", copy_half)
+    with pytest.raises(OSError):
+        pdf_ops.rotate_pdf_incremental(pdf(), str(out), 90)
+    assert out.read_bytes() == b"del usuario"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["doc.pdf", "out.pdf"]
+
+def test_encrypted_rejected(pdf, tmp_path):
+    with pytest.raises(RuntimeError):
+        pdf_ops.rotate_pdf_incremental(pdf(password=PASSWORD), str(tmp_path / "out.pdf"), 90)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# JobScheduler: prioridad, cancelación y rollback de salidas parciales.
+import os
+import threading
+
+import pytest
+
+from controller.job_queue import CANCELLED, DONE, FAILED, JobScheduler
+
+
+@pytest.fixture
+def scheduler():
+    s = JobScheduler(max_workers=1)
+    yield s
+    s.shutdown(timeout=5)
+
+def _write_then_fail(path, content=b"parcial"):
+    with open(path, "wb") as fp:
+        fp.write(content)
+    raise RuntimeError("falla a mitad")
+
+
+def test_failed_job_removes_output_it_created(tmp_path, scheduler):
+    out = str(tmp_path / "nuevo.pdf")
+    job = scheduler.submit(_write_then_fail, out, outputs=[out])
+    job.wait(5)
+    assert job.status == FAILED and isinstance(job.error, RuntimeError)
+    assert not os.path.exists(out)
+
+def test_failed_job_keeps_existing_file(tmp_path, scheduler):
+    out = tmp_path / "del_usuario.pdf"
+    out.write_bytes(b"original")
+
+    def fail_before_writing():
+        raise RuntimeError("Contraseña incorrecta")
+    job = scheduler.submit(fail_before_writing, outputs=[str(out)])
+    job.wait(5)
+    assert job.status == FAILED
+    assert out.read_bytes() == b"original"
+
+def test_rollback_of_output_folder_keeps_old_files(tmp_path, scheduler):
+    folder = tmp_path / "salida"
+    folder.mkdir()
+    (folder / "viejo.pdf").write_bytes(b"x")
+    job = scheduler.submit(_write_then_fail, str(folder / "nuevo.pdf"), outputs=[str(folder)])
+    job.wait(5)
+    assert sorted(os.listdir(folder)) == ["viejo.pdf"]
+
+def test_cancel_pending_job(scheduler):
+    gate, ran = threading.Event(), []
+    scheduler.submit(gate.wait, 5)  # ocupa el único worker
+    job = scheduler.submit(ran.append, "x")
+    job.cancel()
+    gate.set()
+    assert job.wait(5)
+    assert job.status == CANCELLED and ran == []
+
+def test_cancel_tracked_job(scheduler):
+    started = threading.Event()
+
+    def work(progress=None, cancel=None):
+        started.set()
+        for i in range(1000):
+            if cancel.wait(0.01):
+                raise RuntimeError("cancelado")
+            progress(i, 1000)
+    job = scheduler.submit(work, track=True)
+    assert started.wait(5)
+    job.cancel()
+    assert job.wait(5)
+    assert job.status == CANCELLED
+
+def test_priority_order(scheduler):
+    gate, order = threading.Event(), []
+    scheduler.submit(gate.wait, 5)  # ocupa el único worker
+    jobs = [scheduler.submit(order.append, name, priority=p) for name, p in (("baja", 0), ("alta", 5), ("media", 2))]
+    gate.set()
+    for job in jobs:
+        job.wait(5)
+    assert order == ["alta", "media", "baja"]
+    assert all(j.status == DONE for j in jobs)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Modo archivo grande: la salida escrita objeto por objeto abre en PyMuPDF y en pypdf estricto.
+import os
+import re
+import threading
+
+import pytest
+
+from conftest import PASSWORD
+from model import largefile
+from model.pdf_ops import OperationCancelled
+
+pypdf = pytest.importorskip("pypdf")
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def _check(path):
+    """Textos por página, tras comprobar que ambos lectores abren el archivo sin reparar."""
+    assert pypdf.PdfReader(path, strict=True).pages
+    with pymupdf.open(path) as doc:
+        assert not doc.is_repaired and not doc.is_encrypted
+        return [p.get_text().strip() for p in doc]
+
+def _rotations(path):
+    with pymupdf.open(path) as doc:
+        return [p.rotation for p in doc]
+
+def test_rotate_adds_to_existing_rotation(pdf, tmp_path):
+    src = pdf(pages=3, image=True)
+    with pymupdf.open(src) as doc:
+        doc[1].set_rotation(90)
+        doc.set_metadata({"title": "Informe"})
+        doc.saveIncr()
+    out = str(tmp_path / "out.pdf")
+    res = largefile.rotate_pdf_large(src, out, 90)
+    assert res["pages"] == 3 and res["outputs"] == [out]
+    assert _check(out) == ["Página 1", "Página 2", "Página 3"]
+    with pymupdf.open(out) as doc:
+        assert [p.rotation for p in doc] == [90, 180, 90]
+        assert doc.metadata["title"] == "Informe"
+        assert len(doc[0].get_images()) == 1
+
+def test_remove_password(pdf, tmp_path):
+    src, out = pdf(pages=2, password=PASSWORD), str(tmp_path / "out.pdf")
+    with pytest.raises(RuntimeError, match="Contraseña"):
+        largefile.remove_password_large(src, out, "otra")
+    largefile.remove_password_large(src, out, PASSWORD)
+    assert _check(out) == ["Página 1", "Página 2"]
+
+def test_split(pdf, tmp_path):
+    src = pdf(pages=5, image=True)
+    res = largefile.split_pdf_large(src, "1-2,5", str(tmp_path / "sueltas"))
+    assert [os.path.basename(p) for p in res["outputs"]] == ["page_0001.pdf", "page_0002.pdf", "page_0005.pdf"]
+    assert [_check(p) for p in res["outputs"]] == [["Página 1"], ["Página 2"], ["Página 5"]]
+    res = largefile.split_pdf_large(src, "4-5", str(tmp_path / "unido"), merge_output=True)
+    assert _check(res["outputs"][0]) == ["Página 4", "Página 5"]
+
+def test_merge(pdf, tmp_path):
+    a, b = pdf("a.pdf", pages=2, image=True), pdf("b.pdf", pages=3)
+    out, calls = str(tmp_path / "out.pdf"), []
+    res = largefile.merge_pdfs_large([a, b], out, progress=lambda d, t: calls.append((d, t)))
+    assert res["pages"] == 5
+    assert _check(out) == ["Página 1", "Página 2", "Página 1", "Página 2", "Página 3"]
+    # Avance por página sobre el total de todas las entradas
+    assert calls == [(i, 5) for i in range(6)]
+
+def test_rotation_inherited_from_page_tree(pdf, tmp_path):
+    src = pdf(pages=2)
+    with pymupdf.open(src) as doc:
+        for page in doc:
+            doc.update_object(page.xref, re.sub(r"/Rotate\s*\d+", "", doc.xref_object(page.xref, compressed=True)))
+        doc.xref_set_key(int(doc.xref_get_key(doc.pdf_catalog(), "Pages")[1].split()[0]), "Rotate", "90")
+        doc.saveIncr()
+    assert _rotations(src) == [90, 90]
+    out = str(tmp_path / "out.pdf")
+    largefile.rotate_pdf_large(src, out, "2:90")
+    assert _rotations(out) == [90, 180]
+
+def test_pages_read_by_reference(pdf, tmp_path, monkeypatch):
+    # Un solo recorrido del árbol de páginas por entrada (no uno por archivo de salida) y la lista
+    # aplanada de pypdf ya suelta al terminar
+    flattens, released = [], []
+    flatten, close = pypdf.PdfReader._flatten, largefile._Source.close
+    monkeypatch.setattr(pypdf.PdfReader, "_flatten", lambda self, *a, **kw: flattens.append(1) or flatten(self, *a, **kw))
+    monkeypatch.setattr(largefile._Source, "close",
+                        lambda self: released.append(self.reader.flattened_pages is None) or close(self))
+    res = largefile.split_pdf_large(pdf(pages=6), "1-6", str(tmp_path / "out"))
+    assert len(res["outputs"]) == 6
+    assert len(flattens) == 1 and released == [True]
+
+def test_memory_ceiling_flushes_cache(pdf, tmp_path):
+    # Un techo por debajo de la memoria del proceso obliga a vaciar la caché en cada página
+    out = str(tmp_path / "out.pdf")
+    res = largefile.rotate_pdf_large(pdf(pages=4), out, 180, memory_mb=1)
+    assert res["cache_flushes"] == 4
+    assert _check(out) == [f"Página {i + 1}" for i in range(4)]
+
+def test_failure_leaves_existing_output_untouched(pdf, tmp_path):
+    out = tmp_path / "out.pdf"
+    out.write_bytes(b"del usuario")
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(OperationCancelled):
+        largefile.rotate_pdf_large(pdf(pages=3), str(out), 90, cancel=cancel)
+    assert out.read_bytes() == b"del usuario"
+    assert sorted(os.listdir(tmp_path)) == ["doc.pdf", "out.pdf"]  # sin .tmp a medias
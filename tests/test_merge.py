@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# merge_pdfs / dedupe_new_objects: objetos repetidos entre archivos una sola vez y marcadores desplazados.
+import pytest
+
+from model import pdf_ops
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def test_repeated_images_stored_once(pdf, tmp_path):
+    a = pdf("a.pdf", pages=2, image=True)
+    out = str(tmp_path / "out.pdf")
+    res = pdf_ops.merge_pdfs([a, a, a], out)
+    assert res["deduplicated"] > 0
+    with pymupdf.open(out) as doc:
+        assert doc.page_count == 6
+        images = {x for page in doc for x, *_ in page.get_images()}
+    assert len(images) == 1
+
+def test_identical_pages_stay_apart(pdf, tmp_path):
+    a, b = pdf("a.pdf", pages=2, image=True), pdf("b.pdf", pages=2, image=True)
+    out = str(tmp_path / "out.pdf")
+    pdf_ops.merge_pdfs([a, b], out)
+    with pymupdf.open(out) as doc:
+        # Las páginas nunca se unifican aunque tengan el mismo contenido
+        assert len({p.xref for p in doc}) == 4
+        assert [p.get_text().strip() for p in doc] == ["Página 1", "Página 2"] * 2
+
+def test_dedupe_new_objects_keeps_pages_apart(pdf):
+    with pymupdf.open(pdf("a.pdf", pages=2, image=True)) as doc, pymupdf.open(pdf("b.pdf", pages=2, image=True)) as b:
+        seen = {}
+        pdf_ops.dedupe_new_objects(doc, 1, seen)
+        start = doc.xref_length()
+        doc.insert_pdf(b)
+        merged = pdf_ops.dedupe_new_objects(doc, start, seen)
+        assert merged > 0
+        # Las páginas nunca se unifican aunque tengan el mismo contenido
+        assert len({p.xref for p in doc}) == 4
+        assert [p.get_text().strip() for p in doc] == ["Página 1", "Página 2"] * 2
+
+def test_bookmarks_shifted(pdf, tmp_path):
+    a, b = pdf("a.pdf", pages=2, toc=True), pdf("b.pdf", pages=3, toc=True)
+    out = str(tmp_path / "out.pdf")
+    pdf_ops.merge_pdfs([a, b], out)
+    with pymupdf.open(out) as doc:
+        assert [(t[1], t[2]) for t in doc.get_toc()] == [("Cap 1", 1), ("Cap 2", 2), ("Cap 1", 3), ("Cap 2", 4),
+                                                         ("Cap 3", 5)]
+
+def test_shift_toc():
+    toc = [[1, "A", 1], [2, "B", 3, {"page": 2, "kind": 1}], [1, "Sin página", -1]]
+    assert pdf_ops.shift_toc(toc, 10) == [[1, "A", 11], [2, "B", 13, {"page": 12, "kind": 1}],
+                                          [1, "Sin página", -1]]
+
+def test_in_memory(pdf):
+    a, b = (open(pdf(n, pages=k), "rb").read() for n, k in (("a.pdf", 2), ("b.pdf", 1)))
+    res = pdf_ops.merge_pdfs([a, memoryview(b)], None)
+    with pymupdf.open(stream=res["data"], filetype="pdf") as doc:
+        assert [p.get_text().strip() for p in doc] == ["Página 1", "Página 2", "Página 1"]
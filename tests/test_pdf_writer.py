@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# StreamingPDFWriter / ImagePageWriter: el PDF escrito objeto por objeto abre en PyMuPDF y en pypdf estricto;
+# images_to_pdf incrusta los JPEG tal cual.
+import io
+
+import pytest
+
+from model import pdf_ops
+from model.pdf_writer import ImagePageWriter, StreamingPDFWriter
+
+pypdf = pytest.importorskip("pypdf")
+pymupdf = pytest.importorskip("pymupdf")
+
+GRAY_2X2 = "/Width 2 /Height 2 /ColorSpace /DeviceGray /BitsPerComponent 8"
+
+
+def _image_pdf(sizes, deflate=True) -> bytes:
+    buf = io.BytesIO()
+    pages = ImagePageWriter(StreamingPDFWriter(buf))
+    for w, h in sizes:
+        pages.add_image_page(w, h, GRAY_2X2, bytes([0, 85, 170, 255]), deflate=deflate)
+    pages.close()
+    return buf.getvalue()
+
+@pytest.mark.parametrize("deflate", [False, True])
+def test_image_pages_open_in_both_readers(deflate):
+    data = _image_pdf([(200, 100), (72.5, 300)], deflate)
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        assert not doc.is_repaired
+        assert [tuple(p.rect)[2:] for p in doc] == [(200, 100), (72.5, 300)]
+        assert len(doc[0].get_images()) == 1
+    reader = pypdf.PdfReader(io.BytesIO(data), strict=True)
+    assert len(reader.pages) == 2
+
+def test_offsets_match_objects():
+    data = _image_pdf([(100, 100)])
+    xref_pos = int(data.rsplit(b"startxref\n", 1)[1].split()[0])
+    rows = data[xref_pos:].split(b"\n")[2:]
+    for num, row in enumerate(rows, 1):
+        if not row.endswith(b" n "):
+            break
+        off = int(row[:10])
+        assert data[off:].startswith(b"%d 0 obj" % num)
+
+def test_reserved_but_unwritten_is_free():
+    buf = io.BytesIO()
+    w = StreamingPDFWriter(buf)
+    pages = w.reserve()
+    w.reserve()  # nunca se escribe
+    page = w.add_object(f"<< /Type /Page /Parent {pages} 0 R /MediaBox [0 0 10 10] >>".encode())
+    w.add_object(f"<< /Type /Pages /Kids [{page} 0 R] /Count 1 >>".encode(), pages)
+    root = w.add_object(f"<< /Type /Catalog /Pages {pages} 0 R >>".encode())
+    w.close(root)
+    data = buf.getvalue()
+    assert b"0000000000 00000 f \n" in data
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        assert doc.page_count == 1 and not doc.is_repaired
+    assert len(pypdf.PdfReader(io.BytesIO(data), strict=True).pages) == 1
+
+def test_images_to_pdf_passes_jpeg_through(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    jpg, png = str(tmp_path / "a.jpg"), str(tmp_path / "b.png")
+    Image.new("RGB", (300, 200), (200, 30, 30)).save(jpg, quality=80)
+    Image.new("L", (50, 80), 128).save(png)
+    out = str(tmp_path / "out.pdf")
+    pdf_ops.images_to_pdf([jpg, png], out)
+    with pymupdf.open(out) as doc:
+        assert [tuple(p.rect)[2:] for p in doc] == [(300, 200), (50, 80)]
+        xref = doc[0].get_images()[0][0]
+        assert doc.xref_stream_raw(xref) == open(jpg, "rb").read()
+    pdf_ops.images_to_pdf([jpg], out, max_side=100)
+    with pymupdf.open(out) as doc:
+        assert doc[0].get_images()[0][2:4] == (100, 67)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Recetas: etapas encadenadas en memoria y validación.
+import json
+
+import pytest
+
+from conftest import PASSWORD
+from model import pipeline
+from model.pipeline import RecipeError
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def test_chain_on_locked_file(tmp_path, pdf):
+    locked = pdf("locked.pdf", pages=4, password=PASSWORD)
+    cover = pdf("portada.pdf", pages=1, toc=True)
+    recipe = tmp_path / "receta.json"
+    recipe.write_text(json.dumps({"stages": [
+        {"op": "unlock", "password": PASSWORD},
+        {"op": "rotate", "spec": "2-3:90"},
+        {"op": "merge", "inputs": ["portada.pdf"], "position": "start"},
+        {"op": "select", "ranges": "1-4"},
+        {"op": "compress"},
+    ]}))
+    out = str(tmp_path / "out.pdf")
+    res = pipeline.run_pipeline(locked, out, str(recipe))
+    assert [s["op"] for s in res["stages"]] == ["unlock", "rotate", "merge", "select", "compress", "save"]
+    with pymupdf.open(out) as doc:
+        assert not doc.is_encrypted
+        assert doc.page_count == 4
+        assert [p.rotation for p in doc] == [0, 0, 90, 90]
+        assert doc[0].get_text().strip() == "Página 1" and doc.get_toc()[0][2] == 1
+
+def test_raster_in_memory(pdf):
+    res = pipeline.run_pipeline(open(pdf(pages=2), "rb").read(), None,
+                                [{"op": "compress", "method": "raster", "dpi": 50}])
+    with pymupdf.open(stream=res["data"], filetype="pdf") as doc:
+        assert doc.page_count == 2
+        assert len(doc[0].get_images()) == 1
+
+def test_locked_input_needs_unlock_first(tmp_path, pdf):
+    with pytest.raises(RuntimeError, match="unlock"):
+        pipeline.run_pipeline(pdf(password=PASSWORD), str(tmp_path / "o.pdf"), [{"op": "rotate"}])
+    assert not (tmp_path / "o.pdf").exists()
+
+@pytest.mark.parametrize("stages", [[], [{"op": "nada"}], [{"op": "merge"}],
+                                    [{"op": "compress", "method": "magia"}]])
+def test_invalid_recipes(stages):
+    with pytest.raises(RecipeError):
+        pipeline.parse_recipe(stages)
+
+def test_describe_masks_passwords():
+    assert pipeline.describe([{"op": "unlock", "password": "secreto"}]) == ["unlock(password=***)"]
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# probe(): lectura de trailer y xref sin abrir el documento, comparada con PyMuPDF.
+import io
+
+import pytest
+
+from conftest import PASSWORD
+from model.probe import page_count, probe, probe_many
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def _fitz_pages(path):
+    with pymupdf.open(path) as doc:
+        return doc.page_count
+
+@pytest.mark.parametrize("pages,objstm", [(1, False), (7, False), (12, True)])
+def test_page_count_matches_fitz(pdf, pages, objstm):
+    path = pdf(pages=pages, objstm=objstm)
+    info = probe(path)
+    assert info["method"] == "xref"
+    assert info["pages"] == _fitz_pages(path) == pages
+    assert info["encrypted"] is False
+    assert info["bytes"] == len(open(path, "rb").read())
+
+def test_follows_incremental_updates(pdf):
+    path = pdf(pages=2)
+    with pymupdf.open(path) as doc:
+        doc.new_page()
+        doc.saveIncr()
+    assert probe(path)["pages"] == _fitz_pages(path) == 3
+
+def test_encrypted(pdf):
+    info = probe(pdf(pages=4, password=PASSWORD))
+    assert info["encrypted"] is True
+    assert info["pages"] == 4
+
+def test_buffers(pdf):
+    data = open(pdf(pages=5, objstm=True), "rb").read()
+    assert probe(data)["pages"] == 5
+    assert probe(memoryview(data))["pages"] == 5
+    assert page_count(io.BytesIO(data)) == 5
+
+def test_broken_xref_falls_back(pdf, tmp_path):
+    data = open(pdf(pages=3), "rb").read()
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(data[:data.rindex(b"startxref")])  # sin startxref: solo PyMuPDF lo repara
+    info = probe(str(broken))
+    assert info["method"] == "fitz"
+    assert info["pages"] == 3
+
+def test_probe_many_keeps_order(pdf):
+    paths = [pdf(f"{n}.pdf", pages=n) for n in (4, 1, 3)]
+    assert [i["pages"] for i in probe_many(paths, workers=2)] == [4, 1, 3]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# progress(hechas, total) por página y cancelación entre páginas.
+import threading
+
+import pytest
+
+from model import pdf_ops
+from model.pdf_ops import OperationCancelled
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def test_progress_per_page(pdf, tmp_path):
+    calls = []
+    pdf_ops.rotate_pdf(pdf(pages=4), str(tmp_path / "out.pdf"), 90, progress=lambda d, t: calls.append((d, t)))
+    assert len(calls) >= 4 and {t for _, t in calls} == {4}
+    assert [d for d, _ in calls] == sorted(d for d, _ in calls)
+
+def test_cancel_stops_between_pages(pdf, tmp_path):
+    cancel, calls = threading.Event(), []
+
+    def progress(done, total):
+        calls.append(done)
+        if done == 2:
+            cancel.set()
+    with pytest.raises(OperationCancelled):
+        pdf_ops.compress_pdf_rasterize(pdf(pages=6), str(tmp_path / "out.pdf"), dpi=30, workers=1,
+                                       progress=progress, cancel=cancel)
+    assert max(calls) < 6
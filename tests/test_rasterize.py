@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# compress_pdf_rasterize: un códec por página, tamaños reportados y, con auto, nunca más grande que el original.
+import io
+import os
+
+import pytest
+
+from model import pdf_ops
+
+pymupdf = pytest.importorskip("pymupdf")
+pytest.importorskip("PIL")
+
+
+def _images(path):
+    """(filtro, espacio de color, bits) de la imagen de cada página."""
+    with pymupdf.open(path) as doc:
+        assert not doc.is_repaired
+        out = []
+        for page in doc:
+            (xref, _, _, _, bpc, cs, *_), = page.get_images()
+            out.append((doc.xref_get_key(xref, "Filter")[1], cs, bpc))
+        return out
+
+@pytest.mark.parametrize("codec,expected", [
+    ("jpeg", ("/DCTDecode", "DeviceRGB", 8)),
+    ("gray", ("/DCTDecode", "DeviceGray", 8)),
+    ("bilevel", ("/FlateDecode", "DeviceGray", 1)),
+])
+def test_forced_codec(pdf, tmp_path, codec, expected):
+    out = str(tmp_path / "out.pdf")
+    res = pdf_ops.compress_pdf_rasterize(pdf(pages=2, image=True), out, dpi=60, codec=codec, workers=1)
+    assert res["codecs"] == {codec: 2}
+    assert _images(out) == [expected] * 2
+
+def _scan(page):
+    # Ruido RGB sin pérdida: como un escaneo, ocupa mucho más que la página rasterizada
+    pix = pymupdf.Pixmap(pymupdf.csRGB, 600, 600, os.urandom(600 * 600 * 3), False)
+    page.insert_image(pymupdf.Rect(72, 100, 472, 500), pixmap=pix)
+
+def test_auto_picks_per_page(pdf, tmp_path):
+    # Texto negro sobre blanco → bilevel; página escaneada en color → jpeg
+    with pymupdf.open(pdf("texto.pdf", pages=1)) as doc:
+        _scan(doc.new_page())
+        src = str(tmp_path / "mixto.pdf")
+        doc.save(src)
+    out = str(tmp_path / "out.pdf")
+    res = pdf_ops.compress_pdf_rasterize(src, out, dpi=100, codec="auto", workers=2)
+    assert res["codecs"] == {"bilevel": 1, "jpeg": 1} and not res["kept_original"]
+    assert res["output_bytes"] < res["input_bytes"]
+    assert [cs for _, cs, _ in _images(out)] == ["DeviceGray", "DeviceRGB"]
+
+def test_reported_sizes(pdf, tmp_path):
+    src, out = pdf(pages=2), str(tmp_path / "out.pdf")
+    res = pdf_ops.compress_pdf_rasterize(src, out, dpi=50)
+    assert res["input_bytes"] == os.path.getsize(src)
+    assert res["output_bytes"] == os.path.getsize(out)
+    assert res["ratio"] == pytest.approx(res["output_bytes"] / res["input_bytes"])
+
+def test_auto_keeps_original_when_not_smaller(pdf, tmp_path):
+    # Un PDF de solo texto crece al rasterizarlo
+    src = pdf(pages=2)
+    original = open(src, "rb").read()
+    out = str(tmp_path / "out.pdf")
+    res = pdf_ops.compress_pdf_rasterize(src, out, dpi=50, workers=1)
+    assert res["kept_original"] and res["codecs"] == {}
+    assert open(out, "rb").read() == original and res["output_bytes"] == len(original)
+    assert pdf_ops.compress_pdf_rasterize(original, None, dpi=50, workers=1)["data"] == original
+    stream = io.BytesIO(b"previo")
+    stream.seek(0, io.SEEK_END)
+    pdf_ops.compress_pdf_rasterize(original, stream, dpi=50, workers=1)
+    assert stream.getvalue() == b"previo" + original
+    # Con un códec elegido se rasteriza aunque crezca
+    res = pdf_ops.compress_pdf_rasterize(src, out, dpi=50, codec="bilevel", workers=1)
+    assert not res["kept_original"] and res["output_bytes"] > len(original)
+
+def test_auto_on_unseekable_stream_raises(pdf):
+    class Pipe:
+        def __init__(self):
+            self.data = b""
+
+        def write(self, data):
+            self.data += bytes(data)
+    with pytest.raises(RuntimeError, match="códec"):
+        pdf_ops.compress_pdf_rasterize(pdf(pages=2), Pipe(), dpi=50, workers=1)
+
+def test_unknown_codec(pdf, tmp_path):
+    with pytest.raises(RuntimeError, match="Códec"):
+        pdf_ops.compress_pdf_rasterize(pdf(), str(tmp_path / "out.pdf"), codec="webp")
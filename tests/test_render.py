@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# map_pages: el resultado en paralelo es el mismo y en el mismo orden que en serie;
+# los trozos se envían por una ventana acotada y cancel se revisa entre ellos.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from model import pdf_ops
+from model.pdf_ops import OperationCancelled
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def _page_text(page, index, prefix):
+    return prefix, index, page.get_text().strip()
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_map_pages_in_page_order(pdf, workers):
+    got = list(pdf_ops.map_pages(pdf(pages=9), _page_text, ("p",), workers=workers))
+    assert got == [("p", i, f"Página {i + 1}") for i in range(9)]
+
+def test_map_pages_subset(pdf):
+    got = list(pdf_ops.map_pages(pdf(pages=6), _page_text, ("p",), pages=[4, 0, 2], workers=2))
+    assert [i for _, i, _ in got] == [4, 0, 2]
+
+class _CountingPool(ThreadPoolExecutor):
+    def __init__(self, workers):
+        super().__init__(workers)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+def test_map_pages_bounded_window_and_cancel(pdf, monkeypatch):
+    # Hilos en lugar de procesos para poder contar los envíos
+    pool = _CountingPool(2)
+    monkeypatch.setattr(pdf_ops, "_source_pool", lambda workers, sources: (pool, list(sources)))
+    cancel = threading.Event()
+    results = pdf_ops.map_pages(pdf(pages=16), _page_text, ("p",), workers=2, cancel=cancel)
+    assert next(results)[1] == 0
+    assert pool.submitted == 5  # 8 trozos: ventana de 4 y uno más al consumir el primero
+    cancel.set()
+    with pytest.raises(OperationCancelled):
+        list(results)
+    assert pool.submitted == 5 and pool._shutdown
+
+def test_map_pages_serial_cancel(pdf):
+    cancel = threading.Event()
+    results = pdf_ops.map_pages(pdf(pages=4), _page_text, ("p",), workers=1, cancel=cancel)
+    next(results)
+    cancel.set()
+    with pytest.raises(OperationCancelled):
+        next(results)
+
+def test_rasterize_parallel_matches_serial(pdf, tmp_path):
+    src = pdf(pages=4)
+    sizes = []
+    for workers in (1, 2):
+        out = str(tmp_path / f"r{workers}.pdf")
+        pdf_ops.compress_pdf_rasterize(src, out, dpi=40, codec="jpeg", workers=workers)
+        with pymupdf.open(out) as doc:
+            assert doc.page_count == 4
+            assert all(len(p.get_images()) == 1 for p in doc)
+            sizes.append([tuple(p.rect) for p in doc])
+    assert sizes[0] == sizes[1]
+
+def test_pdf_to_images(pdf, tmp_path):
+    out = pdf_ops.pdf_to_images(pdf(pages=3), str(tmp_path / "img"), dpi=30, workers=2)
+    assert [os.path.basename(p) for p in out] == ["page_0001.png", "page_0002.png", "page_0003.png"]
+    assert all(os.path.getsize(p) > 0 for p in out)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# ResultCache: aciertos por contenido, invalidación, LRU por tamaño y claves de los trabajos.
+import os
+import shutil
+
+import pytest
+
+from model import jobs, result_cache
+from model.result_cache import ResultCache
+
+
+def _copy(src, dst):
+    shutil.copyfile(src, dst)
+    return dst
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache"))
+
+@pytest.fixture
+def run(cache):
+    calls = []
+
+    def run(src, out, params=None):
+        def compute():
+            calls.append(src)
+            with open(out, "wb") as fp:
+                fp.write(open(src, "rb").read()[::-1])
+            return {"output": out}
+        return cache.run("reverse", [src], out, params or {}, compute)
+    run.calls = calls
+    return run
+
+
+def test_hit_by_content_not_name(tmp_path, pdf, run):
+    a = pdf("a.pdf")
+    b = _copy(a, str(tmp_path / "otro_nombre.pdf"))
+    out1, out2 = str(tmp_path / "o1.pdf"), str(tmp_path / "o2.pdf")
+    assert run(a, out1)[1] is False
+    result, hit = run(b, out2)
+    assert hit is True and run.calls == [a]
+    assert result == {"output": out2}  # las rutas del resultado apuntan a la nueva salida
+    assert open(out1, "rb").read() == open(out2, "rb").read()
+
+def test_params_and_content_change_the_key(tmp_path, pdf, run):
+    a = pdf("a.pdf", pages=2)
+    out = str(tmp_path / "o.pdf")
+    run(a, out, {"dpi": 100})
+    assert run(a, out, {"dpi": 150})[1] is False
+    pdf("a.pdf", pages=3)  # mismo nombre, otro contenido
+    assert run(a, out, {"dpi": 100})[1] is False
+    assert len(run.calls) == 3
+
+def test_modified_entry_is_discarded(tmp_path, pdf, run):
+    a = pdf("a.pdf")
+    out = str(tmp_path / "o.pdf")
+    run(a, out)
+    run(a, out)  # acierto: la salida es un hardlink a la entrada de la caché
+    with open(out, "ab") as fp:
+        fp.write(b"editado en su lugar")
+    assert run(a, str(tmp_path / "o2.pdf"))[1] is False
+
+def test_lru_eviction(tmp_path, pdf):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=1)
+    out = str(tmp_path / "o.pdf")
+    for i in range(3):
+        src = pdf(f"{i}.pdf", pages=i + 1)
+        cache.run("copy", [src], out, {}, lambda src=src: shutil.copyfile(src, out))
+    assert cache.evictions >= 2
+    assert cache.stats()["entries"] <= 1
+
+def test_execution_params_do_not_change_the_key(pdf, cache):
+    src = pdf()
+    assert cache.key("compress", [src], {"dpi": 100, "workers": 1}) == \
+        cache.key("compress", [src], {"dpi": 100, "workers": 8, "cache": True})
+
+def test_job_key_ignores_execution_flags(tmp_path, pdf, cache):
+    src = pdf()
+    job = {"op": "compress", "input": src, "output": "x.pdf", "method": "lossless"}
+    key = cache.key("compress", [src], jobs.cache_params(job))
+    noisy = dict(job, large=True, memory_mb=64, profile=True, workers=4, cache=True)
+    assert cache.key("compress", [src], jobs.cache_params(noisy)) == key
+    # En rotate, large cambia la salida (largefile no conserva marcadores)
+    rotate = {"op": "rotate", "input": src, "output": "x.pdf", "angle": 90}
+    assert cache.key("rotate", [src], jobs.cache_params(dict(rotate, large=True))) != \
+        cache.key("rotate", [src], jobs.cache_params(rotate))
+
+def test_hash_memo_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "HASH_MEMO_SIZE", 3)
+    monkeypatch.setattr(result_cache, "_hash_memo", type(result_cache._hash_memo)())
+    paths = []
+    for i in range(6):
+        p = tmp_path / f"{i}.bin"
+        p.write_bytes(b"%d" % i)
+        paths.append(str(p))
+        result_cache.content_hash(str(p))
+    assert len(result_cache._hash_memo) == 3
+    assert result_cache.content_hash(paths[0]) == result_cache.content_hash(paths[0])
+    assert os.path.abspath(paths[0]) in {k[0] for k in result_cache._hash_memo}
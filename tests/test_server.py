@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Servidor local de trabajos: token obligatorio, rechazo de peticiones de navegador y trabajos completos.
+import http.client
+import json
+import os
+import threading
+
+import pytest
+
+from model import server
+from model.server import ServerClient, ServerError
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+@pytest.fixture(scope="module")
+def httpd():
+    app = server.JobServer(workers=1)
+    httpd = server.make_server(app, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    app.close()
+
+@pytest.fixture
+def client(httpd):
+    return ServerClient("%s:%d" % httpd.server_address[:2], token=httpd.token)
+
+def _raw(httpd, method, path, headers=None, body=None):
+    conn = http.client.HTTPConnection(*httpd.server_address[:2], timeout=10)
+    conn.request(method, path, body, headers or {})
+    resp = conn.getresponse()
+    status, data = resp.status, json.loads(resp.read() or b"null")
+    conn.close()
+    return status, data
+
+def _auth(httpd):
+    return {"Authorization": f"Bearer {httpd.token}"}
+
+
+def test_token_generated_and_required(httpd):
+    assert httpd.token
+    assert _raw(httpd, "GET", "/health")[0] == 401
+    assert _raw(httpd, "GET", "/health", {"Authorization": "Bearer otro"})[0] == 401
+    assert _raw(httpd, "GET", "/health", _auth(httpd))[0] == 200
+
+def test_client_reads_token_file(httpd):
+    # Como serve(): el token queda en un archivo solo legible por el usuario
+    server._write_token(server.default_token_path(), httpd.token)
+    assert ServerClient("%s:%d" % httpd.server_address[:2]).health()
+    assert os.stat(server.default_token_path()).st_mode & 0o777 == 0o600
+
+def test_browser_requests_rejected(httpd):
+    job = json.dumps({"op": "merge", "inputs": [], "output": "/tmp/x.pdf"})
+    assert _raw(httpd, "GET", "/health", dict(_auth(httpd), Origin="http://evil.example"))[0] == 403
+    assert _raw(httpd, "GET", "/health", dict(_auth(httpd), Host="evil.example:8765"))[0] == 403
+    status, data = _raw(httpd, "POST", "/jobs", dict(_auth(httpd), **{"Content-Type": "text/plain"}), job)
+    assert status == 415
+
+def test_loopback_host_names():
+    for host in ("localhost", "127.0.0.1:8765", "[::1]:8765", "LOCALHOST:1"):
+        assert server._loopback_host(host)
+    for host in ("", "evil.example", "127.0.0.1.evil.example:80", "[::2]:8765"):
+        assert not server._loopback_host(host)
+
+def test_run_job(client, tmp_path, pdf):
+    out = str(tmp_path / "rotado.pdf")
+    res = client.run({"op": "rotate", "input": pdf(pages=2), "output": out, "angle": 90})
+    assert res["ok"], res
+    with pymupdf.open(out) as doc:
+        assert [p.rotation for p in doc] == [90, 90]
+    with pytest.raises(ServerError) as err:
+        client.status("no-existe")
+    assert err.value.status == 404
+
+def test_run_many(client, tmp_path, pdf):
+    src = pdf(pages=1)
+    jobs = [{"op": "rotate", "input": src, "output": str(tmp_path / f"{i}.pdf"), "angle": 90 * i}
+            for i in range(1, 4)]
+    results = dict(client.run_many(jobs))
+    assert sorted(results) == [0, 1, 2] and all(r["ok"] for r in results.values())
+    with pymupdf.open(str(tmp_path / "3.pdf")) as doc:
+        assert doc[0].rotation == 270
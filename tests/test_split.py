@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# split_pdf_by: bloques de N páginas, cortes por marcador y partes por tamaño.
+import os
+
+import pytest
+
+from model import pdf_ops
+
+pymupdf = pytest.importorskip("pymupdf")
+
+
+def _texts(path):
+    with pymupdf.open(path) as doc:
+        return [p.get_text().strip() for p in doc]
+
+def _with_toc(path, toc):
+    with pymupdf.open(path) as doc:
+        doc.set_toc(toc)
+        doc.saveIncr()
+    return path
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_every_n_pages(pdf, tmp_path, workers):
+    out = pdf_ops.split_pdf_by(pdf(pages=7), str(tmp_path / "out"), "pages", every=3, workers=workers)
+    assert [os.path.basename(p) for p in out] == ["paginas_0001-0003.pdf", "paginas_0004-0006.pdf",
+                                                 "paginas_0007-0007.pdf"]
+    assert [_texts(p) for p in out] == [["Página 1", "Página 2", "Página 3"], ["Página 4", "Página 5", "Página 6"],
+                                        ["Página 7"]]
+
+def test_bookmarks_by_level(pdf, tmp_path):
+    src = _with_toc(pdf(pages=5), [[1, "Intro", 2], [2, "Detalle", 3], [1, "Fin: anexo", 4]])
+    out = pdf_ops.split_pdf_by(src, str(tmp_path / "n1"), "bookmarks", level=1)
+    assert [os.path.basename(p) for p in out] == ["001_inicio.pdf", "002_Intro.pdf", "003_Fin_anexo.pdf"]
+    assert [len(_texts(p)) for p in out] == [1, 2, 2]
+    out = pdf_ops.split_pdf_by(src, str(tmp_path / "n2"), "bookmarks", level=2)
+    assert [len(_texts(p)) for p in out] == [1, 1, 1, 2]
+
+def test_bookmarks_required(pdf, tmp_path):
+    with pytest.raises(RuntimeError, match="marcadores"):
+        pdf_ops.split_pdf_by(pdf(), str(tmp_path / "out"), "bookmarks")
+
+def test_by_size(pdf, tmp_path):
+    src = pdf(pages=6, image=True)
+    whole = pdf_ops.split_pdf_by(src, str(tmp_path / "grande"), "size", max_bytes=10 * 1024 * 1024)
+    assert [len(_texts(p)) for p in whole] == [6]
+    # Un límite menor que cualquier página: una por parte, en orden
+    parts = pdf_ops.split_pdf_by(src, str(tmp_path / "chico"), "size", max_bytes=1)
+    assert [_texts(p) for p in parts] == [[f"Página {i + 1}"] for i in range(6)]
+
+def test_parts_keep_only_their_resources(pdf, tmp_path):
+    with pymupdf.open(pdf("texto.pdf", pages=1)) as doc, pymupdf.open(pdf("img.pdf", pages=1, image=True)) as img:
+        doc.insert_pdf(img)
+        src = str(tmp_path / "mixto.pdf")
+        doc.save(src)
+    first, second = pdf_ops.split_pdf_by(src, str(tmp_path / "out"), "pages", every=1)
+    assert os.path.getsize(first) < os.path.getsize(second)
+    with pymupdf.open(first) as doc:
+        assert not doc[0].get_images()
+
+def test_unknown_mode(pdf, tmp_path):
+    with pytest.raises(RuntimeError, match="Modo"):
+        pdf_ops.split_pdf_by(pdf(), str(tmp_path / "out"), "capitulos")
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# trace(): fases, estado, log JSON y pico de memoria por trabajo o compartido con trabajos simultáneos.
+import threading
+import time
+
+from model import telemetry
+
+
+def test_phases_and_status():
+    with telemetry.trace("op", log_path=None) as t:
+        with telemetry.phase("render"):
+            time.sleep(0.01)
+        telemetry.add_phase("render", 0.5, 3)
+    assert t.record["status"] == "ok"
+    assert t.record["phases"]["render"]["count"] == 4
+    assert t.record["phases"]["render"]["seconds"] >= 0.5
+
+def test_error_is_recorded():
+    try:
+        with telemetry.trace("op", log_path=None) as t:
+            raise ValueError("roto")
+    except ValueError:
+        pass
+    assert t.record["status"] == "error" and "roto" in t.record["error"]
+
+def test_log_lines_and_last_jobs(tmp_path):
+    log = str(tmp_path / "jobs.jsonl")
+    src = tmp_path / "in.bin"
+    src.write_bytes(b"x" * 1000)
+    for op in ("a", "b"):
+        with telemetry.trace(op, inputs=[str(src)], log_path=log):
+            pass
+    records = telemetry.last_jobs(5, log)
+    assert [r["op"] for r in records] == ["b", "a"]
+    assert records[0]["bytes_in"] == 1000 and records[0]["peak_rss_mb"] > 0
+
+def test_peak_scope_alone_and_overlapping():
+    with telemetry.trace("solo", log_path=None) as t:
+        pass
+    assert t.record["peak_scope"] in ("job", "process")  # "process" si no hay /proc/self/clear_refs
+    records, inside = {}, threading.Barrier(2)
+
+    def job(name):
+        with telemetry.trace(name, log_path=None) as t:
+            inside.wait(5)
+        records[name] = t.record
+    threads = [threading.Thread(target=job, args=(n,)) for n in ("a", "b")]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join(5)
+    # Simultáneos: ninguno puede atribuirse el pico del proceso
+    assert records["a"]["peak_scope"] == records["b"]["peak_scope"] == "process"
+    assert not telemetry._active
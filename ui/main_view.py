@@ -2,33 +2,26 @@
 # -*- coding: utf-8 -*-
 import os
 import subprocess
+import threading
+import time
 import tkinter as tk
 import customtkinter as ctk
-from tkinter import messagebox
-from ui.widgets import GlassCard, DropArea, SUPPORTS_DND
-
-# Intentar importar soporte DnD para la ventana principal
-if SUPPORTS_DND:
-    from tkinterdnd2 import TkinterDnD
-    # Clase base híbrida
-    class CTkDnD(ctk.CTk, TkinterDnD.DnDWrapper):
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, **kwargs)
-            self.TkdndVersion = TkinterDnD._require(self)
-    BaseClass = CTkDnD
-else:
-    BaseClass = ctk.CTk
+from tkinter import filedialog, messagebox
+from model.lazy import prewarm
+from ui.widgets import GlassCard, DropArea, ThumbnailStrip, VirtualFileList, enable_dnd
 
 APP_NAME = "PDF Toolbox"
 VERSION = "v2.0"
+PROGRESS_INTERVAL = 0.1  # s entre actualizaciones de la barra (no saturar el event loop de Tk)
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
-class PDFToolboxApp(BaseClass):
-    def __init__(self, controller):
+class PDFToolboxApp(ctk.CTk):
+    def __init__(self, controller, prewarm_libs=True):
         super().__init__()
         self.controller = controller
+        self.prewarm_libs = prewarm_libs
         self.title(f"{APP_NAME} {VERSION}")
         self.geometry("1100x800")
         self.minsize(900, 650)
@@ -44,16 +37,47 @@ class PDFToolboxApp(BaseClass):
         # UI
         self._build_sidebar()
         self._build_content_area()
+        self._build_progress_bar()
         self._build_toast()
 
         # Iniciar logger del controller
         self.controller.log = self.log_message
         self.controller.error_handler = self.show_error
         self.controller.on_success_action = self.show_success_modal
+        self.controller.on_job_update = self.on_job_update
 
         # Vista inicial
         self._show_view("MERGE")
 
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(50, self._after_first_paint)
+
+    def _after_first_paint(self):
+        # Lo que no hace falta para mostrar la ventana: DnD (tkinterdnd2) y las bibliotecas de PDF
+        enable_dnd(self)
+        if self.prewarm_libs:
+            prewarm()
+
+    def _on_close(self):
+        if not self.controller.jobs.busy():
+            self.destroy()
+            return
+        answer = messagebox.askyesnocancel(
+            APP_NAME,
+            "Hay trabajos en curso.\n\nSí: esperar a que terminen.\nNo: cancelarlos y descartar los archivos parciales."
+        )
+        if answer is None:
+            return
+        # El cierre se hace fuera del hilo de Tk para no congelar la ventana
+        threading.Thread(target=self.controller.shutdown, kwargs={"wait": answer, "timeout": None if answer else 5}, daemon=True).start()
+        self._close_when_idle()
+
+    def _close_when_idle(self):
+        if self.controller.jobs.busy():
+            self.after(200, self._close_when_idle)
+        else:
+            self.destroy()
+
     def show_success_modal(self, path):
         # Thread-safe UI update
         self.after(0, lambda: self._build_success_modal(path))
@@ -94,7 +118,7 @@ class PDFToolboxApp(BaseClass):
     def _build_sidebar(self):
         self.sidebar = ctk.CTkFrame(self, width=200, corner_radius=0)
         self.sidebar.grid(row=0, column=0, sticky="nsew")
-        self.sidebar.grid_rowconfigure(8, weight=1) # Spacer
+        self.sidebar.grid_rowconfigure(10, weight=1) # Spacer
 
         lbl = ctk.CTkLabel(self.sidebar, text=APP_NAME, font=ctk.CTkFont(size=20, weight="bold"))
         lbl.grid(row=0, column=0, padx=20, pady=(20, 10))
@@ -107,7 +131,10 @@ class PDFToolboxApp(BaseClass):
             ("Comprimir", "COMPRESS"),
             ("Convertir", "CONVERT"),
             ("Rotar PDF", "ROTATE"),
-            ("Seguridad", "PASSWORD")
+            ("Seguridad", "PASSWORD"),
+            ("Recetas", "PIPELINE"),
+            ("Lote", "BATCH"),
+            ("Rendimiento", "PERF")
         ]
 
         for i, (text, key) in enumerate(btn_config, start=1):
@@ -132,7 +159,7 @@ class PDFToolboxApp(BaseClass):
             offvalue="Light"
         )
         self.theme_switch.select() # Por defecto Dark
-        self.theme_switch.grid(row=9, column=0, padx=20, pady=20, sticky="s")
+        self.theme_switch.grid(row=11, column=0, padx=20, pady=20, sticky="s")
 
     def _build_content_area(self):
         self.content = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
@@ -145,29 +172,18 @@ class PDFToolboxApp(BaseClass):
         self._init_views()
 
     def _init_views(self):
-        # Merge
-        self.views["MERGE"] = self._create_view_frame()
-        self._build_merge_view(self.views["MERGE"])
-        
-        # Split
-        self.views["SPLIT"] = self._create_view_frame()
-        self._build_split_view(self.views["SPLIT"])
-
-        # Compress
-        self.views["COMPRESS"] = self._create_view_frame()
-        self._build_compress_view(self.views["COMPRESS"])
-
-        # Convert
-        self.views["CONVERT"] = self._create_view_frame()
-        self._build_convert_view(self.views["CONVERT"])
-
-        # Rotate
-        self.views["ROTATE"] = self._create_view_frame()
-        self._build_rotate_view(self.views["ROTATE"])
-
-        # Password
-        self.views["PASSWORD"] = self._create_view_frame()
-        self._build_password_view(self.views["PASSWORD"])
+        # Cada vista se construye la primera vez que se navega a ella (_show_view)
+        self.view_builders = {
+            "MERGE": self._build_merge_view,
+            "SPLIT": self._build_split_view,
+            "COMPRESS": self._build_compress_view,
+            "CONVERT": self._build_convert_view,
+            "ROTATE": self._build_rotate_view,
+            "PASSWORD": self._build_password_view,
+            "PIPELINE": self._build_pipeline_view,
+            "BATCH": self._build_batch_view,
+            "PERF": self._build_perf_view,
+        }
 
     def _create_view_frame(self):
         f = ctk.CTkFrame(self.content, fg_color="transparent")
@@ -180,11 +196,57 @@ class PDFToolboxApp(BaseClass):
             v.grid_remove()
             self.nav_buttons[k].configure(fg_color="transparent")
         
+        # Construir en la primera visita
+        if key not in self.views and key in self.view_builders:
+            self.views[key] = self._create_view_frame()
+            self.view_builders[key](self.views[key])
+
         # Mostrar seleccionada
         if key in self.views:
             self.views[key].grid()
             self.nav_buttons[key].configure(fg_color=("gray75", "gray25"))
             self.current_view = key
+            if key == "PERF":
+                self._refresh_perf()
+
+    # ---------- Progreso de trabajos ----------
+    def _build_progress_bar(self):
+        self.progress_frame = ctk.CTkFrame(self, corner_radius=0)
+        self.progress_frame.grid_columnconfigure(1, weight=1)
+        self.progress_lbl = ctk.CTkLabel(self.progress_frame, text="", width=260, anchor="w")
+        self.progress_lbl.grid(row=0, column=0, padx=(20, 10), pady=8)
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame)
+        self.progress_bar.grid(row=0, column=1, sticky="ew", pady=8)
+        self.progress_bar.set(0)
+        ctk.CTkButton(
+            self.progress_frame, text="Cancelar", width=90, command=self.controller.cancel_all,
+            fg_color="transparent", border_width=1
+        ).grid(row=0, column=2, padx=20, pady=8)
+        self._progress_last = 0.0
+        self._progress_pending = False
+
+    def on_job_update(self, job):
+        # Llamado desde hilos de trabajo: se agrupan las actualizaciones y solo
+        # los cambios de estado pasan siempre
+        now = time.monotonic()
+        if job.status == "running" and (self._progress_pending or now - self._progress_last < PROGRESS_INTERVAL):
+            return
+        self._progress_last = now
+        self._progress_pending = True
+        self.after(0, self._refresh_progress)
+
+    def _refresh_progress(self):
+        self._progress_pending = False
+        active = [j for j in self.controller.jobs.jobs() if j.status == "running"]
+        queued = len(self.controller.jobs.jobs()) - len(active)
+        if not active:
+            self.progress_frame.grid_remove()
+            return
+        job = active[0]
+        extra = f" (+{len(active) - 1 + queued} en cola)" if len(active) > 1 or queued else ""
+        self.progress_lbl.configure(text=f"{job.name}: {job.progress:.0%}{extra}")
+        self.progress_bar.set(job.progress)
+        self.progress_frame.grid(row=1, column=0, columnspan=2, sticky="ew")
 
     # ---------- Toast Notification ----------
     def _build_toast(self):
@@ -227,42 +289,32 @@ class PDFToolboxApp(BaseClass):
         card = GlassCard(parent, "Unir PDFs")
         card.pack(fill="both", expand=True)
 
-        listbox = tk.Listbox(
-            card.inner, 
-            bg="#2b2b2b", 
-            fg="white", 
-            selectbackground="#3b82f6", 
-            relief="flat",
-            highlightthickness=0
-        )
-        listbox.pack(fill="both", expand=True, pady=(0, 10))
+        lbl_totals = ctk.CTkLabel(card.inner, text="Sin archivos", anchor="w", text_color="gray70")
 
-        files_state = []
+        def show_totals(lst):
+            files, pages, size, pending = lst.totals()
+            text = f"{files} archivos · {pages} páginas · {size / (1024 * 1024):.1f} MB"
+            lbl_totals.configure(text=text + (f" (leyendo {pending}…)" if pending else "") if files else "Sin archivos")
 
-        def update_list():
-            listbox.delete(0, tk.END)
-            for f in files_state:
-                listbox.insert(tk.END, os.path.basename(f))
+        file_list = VirtualFileList(card.inner, info=self.controller.pdf_info, on_change=show_totals)
+        file_list.pack(fill="both", expand=True, pady=(0, 5))
+        lbl_totals.pack(fill="x", pady=(0, 10))
 
         def on_drop(files):
-            pdfs = [f for f in files if f.lower().endswith(".pdf")]
-            if not pdfs: return
-            files_state.extend(pdfs)
-            update_list()
+            # Carpetas incluidas; solo se agregan las filas nuevas
+            file_list.extend(self.controller.collect_pdfs(files))
 
-        DropArea(card.inner, "Arrastra PDFs aquí", on_drop, multiple=True).pack(fill="x", pady=10)
+        DropArea(card.inner, "Arrastra PDFs o carpetas aquí", on_drop, multiple=True).pack(fill="x", pady=10)
 
         btn_row = ctk.CTkFrame(card.inner, fg_color="transparent")
         btn_row.pack(fill="x")
 
         def run_merge():
-            self.controller.merge_pdfs(list(files_state))
-            files_state.clear()
-            update_list()
+            self.controller.merge_pdfs(list(file_list.items))
+            file_list.clear()
         
         def clear():
-            files_state.clear()
-            update_list()
+            file_list.clear()
 
         ctk.CTkButton(btn_row, text="Fusionar PDFs", command=run_merge).pack(side="left", padx=(0, 10))
         ctk.CTkButton(btn_row, text="Limpiar", command=clear, fg_color="transparent", border_width=1).pack(side="left")
@@ -276,6 +328,8 @@ class PDFToolboxApp(BaseClass):
         self.split_file = tk.StringVar()
         self.split_range = tk.StringVar(value="1-")
         self.split_merge = tk.BooleanVar(value=False)
+        self.split_mode = tk.StringVar(value="Rango")
+        self.split_value = tk.StringVar(value="")
 
         def on_drop(files):
             if files: self.split_file.set(files[0])
@@ -285,18 +339,32 @@ class PDFToolboxApp(BaseClass):
         ctk.CTkLabel(card.inner, text="Archivo seleccionado:", anchor="w").pack(fill="x")
         ctk.CTkEntry(card.inner, textvariable=self.split_file).pack(fill="x", pady=(0, 10))
 
+        # Vista previa de páginas (miniaturas en caché, cargadas al desplazarse)
+        strip = ThumbnailStrip(card.inner, self.controller.thumbs, height=300)
+        strip.pack(fill="x", pady=(0, 10))
+        self.split_file.trace_add("write", lambda *a: strip.set_file(self.split_file.get().strip()))
+
         ctk.CTkLabel(card.inner, text="Rango de páginas (ej. 1-3, 5):", anchor="w").pack(fill="x")
         ctk.CTkEntry(card.inner, textvariable=self.split_range).pack(fill="x", pady=(0, 10))
 
         ctk.CTkCheckBox(card.inner, text="Unir rango en un solo archivo", variable=self.split_merge).pack(anchor="w", pady=(0, 10))
 
+        modes = {"Rango": "range", "Cada N páginas": "pages", "Marcadores": "bookmarks", "Tamaño (MB)": "size"}
+        ctk.CTkLabel(card.inner, text="Modo (N páginas, nivel de marcador o MB máximos):", anchor="w").pack(fill="x")
+        mode_row = ctk.CTkFrame(card.inner, fg_color="transparent")
+        mode_row.pack(fill="x", pady=(0, 10))
+        ctk.CTkSegmentedButton(mode_row, values=list(modes), variable=self.split_mode).pack(side="left")
+        ctk.CTkEntry(mode_row, textvariable=self.split_value, width=80).pack(side="left", padx=10)
+
         ctk.CTkButton(
             card.inner, 
             text="Dividir PDF", 
             command=lambda: self.controller.split_pdf(
                 self.split_file.get(), 
                 self.split_range.get(), 
-                self.split_merge.get()
+                self.split_merge.get(),
+                modes[self.split_mode.get()],
+                self.split_value.get()
             )
         ).pack(anchor="w")
 
@@ -309,6 +377,7 @@ class PDFToolboxApp(BaseClass):
         self.comp_file = tk.StringVar()
         self.comp_method = tk.StringVar(value="lossless")
         self.comp_dpi = tk.IntVar(value=150)
+        self.comp_codec = tk.StringVar(value="auto")
 
         def on_drop(files):
             if files: self.comp_file.set(files[0])
@@ -318,9 +387,10 @@ class PDFToolboxApp(BaseClass):
 
         ctk.CTkLabel(card.inner, text="Método de compresión:", anchor="w").pack(fill="x")
         ctk.CTkRadioButton(card.inner, text="Sin pérdida (Recomendado)", variable=self.comp_method, value="lossless").pack(anchor="w", pady=5)
+        ctk.CTkRadioButton(card.inner, text="Reducir imágenes (conserva texto y vectores)", variable=self.comp_method, value="images").pack(anchor="w", pady=5)
         ctk.CTkRadioButton(card.inner, text="Rasterizar (Reduce calidad)", variable=self.comp_method, value="raster").pack(anchor="w", pady=5)
 
-        ctk.CTkLabel(card.inner, text="DPI (para Raster):", anchor="w").pack(fill="x", pady=(10, 0))
+        ctk.CTkLabel(card.inner, text="DPI (Raster o máximo para imágenes):", anchor="w").pack(fill="x", pady=(10, 0))
         ctk.CTkSlider(card.inner, from_=72, to=300, variable=self.comp_dpi, number_of_steps=10).pack(fill="x")
         
         lbl_dpi = ctk.CTkLabel(card.inner, text="150")
@@ -330,13 +400,17 @@ class PDFToolboxApp(BaseClass):
         # Bind no es directo en slider var trace, pero podemos usar command si quisiéramos. 
         # Simplificación: el user ve el slider.
 
+        ctk.CTkLabel(card.inner, text="Códec (para Raster, auto elige el más pequeño por página):", anchor="w").pack(fill="x", pady=(10, 0))
+        ctk.CTkSegmentedButton(card.inner, values=["auto", "jpeg", "gray", "bilevel"], variable=self.comp_codec).pack(anchor="w")
+
         ctk.CTkButton(
             card.inner, 
             text="Comprimir", 
             command=lambda: self.controller.compress_pdf(
                 self.comp_file.get(), 
                 self.comp_method.get(), 
-                self.comp_dpi.get()
+                self.comp_dpi.get(),
+                self.comp_codec.get()
             )
         ).pack(anchor="w", pady=10)
 
@@ -354,7 +428,14 @@ class PDFToolboxApp(BaseClass):
         self.p2i_file = tk.StringVar()
         DropArea(p2i, "Arrastra PDF", lambda f: self.p2i_file.set(f[0] if f else ""), multiple=False).pack(fill="x", pady=10)
         ctk.CTkEntry(p2i, textvariable=self.p2i_file).pack(fill="x", pady=5)
-        ctk.CTkButton(p2i, text="Convertir a Imágenes", command=lambda: self.controller.pdf_to_images(self.p2i_file.get())).pack(pady=10)
+        # formato, contenedor
+        formats = {"PNG": ("png", "files"), "JPEG": ("jpg", "files"), "WebP": ("webp", "files"),
+                   "TIFF multipágina": ("tiff", "tiff"), "ZIP de PNG": ("png", "zip")}
+        self.p2i_format = tk.StringVar(value="PNG")
+        ctk.CTkOptionMenu(p2i, values=list(formats), variable=self.p2i_format).pack(anchor="w", pady=5)
+        ctk.CTkButton(p2i, text="Convertir a Imágenes",
+                      command=lambda: self.controller.pdf_to_images(self.p2i_file.get(), 150,
+                                                                    *formats[self.p2i_format.get()])).pack(pady=10)
 
         # IMG -> PDF
         i2p = tab.tab("Imágenes a PDF")
@@ -387,6 +468,7 @@ class PDFToolboxApp(BaseClass):
 
         self.rot_file = tk.StringVar()
         self.rot_angle = tk.IntVar(value=90)
+        self.rot_pages = tk.StringVar(value="1-")
 
         DropArea(card.inner, "Arrastra PDF", lambda f: self.rot_file.set(f[0] if f else ""), multiple=False).pack(fill="x", pady=10)
         ctk.CTkEntry(card.inner, textvariable=self.rot_file).pack(fill="x", pady=5)
@@ -394,10 +476,13 @@ class PDFToolboxApp(BaseClass):
         ctk.CTkLabel(card.inner, text="Ángulo de rotación (horario):").pack(anchor="w", pady=(10, 5))
         ctk.CTkSegmentedButton(card.inner, values=["90", "180", "270"], variable=self.rot_angle).pack(anchor="w")
 
+        ctk.CTkLabel(card.inner, text="Páginas (ej. 1-3, 5; vacío = todas):").pack(anchor="w", pady=(10, 5))
+        ctk.CTkEntry(card.inner, textvariable=self.rot_pages).pack(fill="x")
+
         ctk.CTkButton(
             card.inner, 
             text="Rotar PDF", 
-            command=lambda: self.controller.rotate_pdf(self.rot_file.get(), self.rot_angle.get())
+            command=lambda: self.controller.rotate_pdf(self.rot_file.get(), self.rot_angle.get(), self.rot_pages.get().strip())
         ).pack(anchor="w", pady=20)
 
 
@@ -420,6 +505,150 @@ class PDFToolboxApp(BaseClass):
             text="Desbloquear PDF", 
             command=lambda: self.controller.remove_password(self.pass_file.get(), self.pass_txt.get())
         ).pack(anchor="w")
+        ctk.CTkButton(
+            card.inner,
+            text="Desbloquear carpeta con lista de contraseñas",
+            command=self.controller.unlock_batch,
+            fg_color="transparent", border_width=1
+        ).pack(anchor="w", pady=(10, 0))
+
+    # ---------- PIPELINE ----------
+    def _build_pipeline_view(self, parent):
+        card = GlassCard(parent, "Recetas (varias etapas en memoria)")
+        card.pack(fill="both", expand=True)
+
+        self.pipe_file = tk.StringVar()
+        self.pipe_recipe = tk.StringVar()
+
+        DropArea(card.inner, "Arrastra un PDF", lambda f: self.pipe_file.set(f[0] if f else ""), multiple=False).pack(fill="x", pady=10)
+        ctk.CTkEntry(card.inner, textvariable=self.pipe_file, placeholder_text="Ruta del archivo...").pack(fill="x", pady=(0, 10))
+
+        stages = ctk.CTkTextbox(card.inner, height=120, font=ctk.CTkFont(family="Courier", size=12))
+
+        def choose_recipe():
+            path = filedialog.askopenfilename(title="Receta (JSON o YAML)",
+                                              filetypes=[("Recetas", "*.json *.yaml *.yml"), ("Todos", "*.*")])
+            if not path:
+                return
+            lines = self.controller.describe_recipe(path)
+            if lines is None:
+                return
+            self.pipe_recipe.set(path)
+            stages.configure(state="normal")
+            stages.delete("1.0", "end")
+            stages.insert("end", "\n".join(f"{i}. {line}" for i, line in enumerate(lines, 1)))
+            stages.configure(state="disabled")
+
+        row = ctk.CTkFrame(card.inner, fg_color="transparent")
+        row.pack(fill="x")
+        ctk.CTkEntry(row, textvariable=self.pipe_recipe, placeholder_text="Receta...").pack(side="left", fill="x", expand=True)
+        ctk.CTkButton(row, text="Elegir receta", command=choose_recipe, fg_color="transparent", border_width=1).pack(side="left", padx=(10, 0))
+        stages.pack(fill="x", pady=10)
+        stages.configure(state="disabled")
+
+        def run_folder():
+            source = filedialog.askdirectory(title="Carpeta con PDFs")
+            if source:
+                self.controller.pipeline_batch(source, self.pipe_recipe.get())
+
+        ctk.CTkButton(
+            card.inner,
+            text="Aplicar receta",
+            command=lambda: self.controller.run_pipeline(self.pipe_file.get(), self.pipe_recipe.get())
+        ).pack(anchor="w", pady=(10, 0))
+        ctk.CTkButton(
+            card.inner,
+            text="Aplicar a una carpeta (lote)",
+            command=run_folder,
+            fg_color="transparent", border_width=1
+        ).pack(anchor="w", pady=(10, 0))
+
+    # ---------- BATCH ----------
+    BATCH_OPS = {
+        "Comprimir (sin pérdida)": ("compress", {"method": "lossless"}),
+        "Comprimir (reducir imágenes)": ("compress", {"method": "images"}),
+        "Comprimir (rasterizar)": ("compress", {"method": "raster"}),
+        "Rotar 90°": ("rotate", {"angle": 90}),
+        "Rotar 180°": ("rotate", {"angle": 180}),
+        "Rotar 270°": ("rotate", {"angle": 270}),
+        "PDF a imágenes": ("pdf_to_images", {}),
+    }
+
+    def _build_batch_view(self, parent):
+        card = GlassCard(parent, "Procesar por lote")
+        card.pack(fill="both", expand=True)
+
+        self.batch_source = []
+        self.batch_op = tk.StringVar(value=next(iter(self.BATCH_OPS)))
+        self.batch_dpi = tk.IntVar(value=150)
+
+        lbl_count = ctk.CTkLabel(card.inner, text="Ningún archivo seleccionado", anchor="w")
+
+        def set_source(source, text):
+            self.batch_source = source
+            lbl_count.configure(text=text)
+
+        def on_drop(files):
+            pdfs = [f for f in files if f.lower().endswith(".pdf") or os.path.isdir(f)]
+            if pdfs: set_source(pdfs, f"{len(pdfs)} elementos seleccionados")
+
+        def choose_folder():
+            d = filedialog.askdirectory(title="Carpeta con PDFs")
+            if d: set_source(d, f"Carpeta: {d}")
+
+        DropArea(card.inner, "Arrastra PDFs o carpetas", on_drop, multiple=True).pack(fill="x", pady=10)
+        ctk.CTkButton(card.inner, text="Elegir carpeta", command=choose_folder, fg_color="transparent", border_width=1).pack(anchor="w")
+        lbl_count.pack(fill="x", pady=(5, 10))
+
+        ctk.CTkLabel(card.inner, text="Operación:", anchor="w").pack(fill="x")
+        ctk.CTkOptionMenu(card.inner, values=list(self.BATCH_OPS), variable=self.batch_op).pack(anchor="w", pady=(0, 10))
+
+        ctk.CTkLabel(card.inner, text="DPI (raster, imágenes):", anchor="w").pack(fill="x")
+        ctk.CTkSlider(card.inner, from_=72, to=300, variable=self.batch_dpi, number_of_steps=10).pack(fill="x")
+
+        def run_batch():
+            op, params = self.BATCH_OPS[self.batch_op.get()]
+            params = dict(params)
+            if op == "pdf_to_images" or params.get("method") in ("images", "raster"):
+                params["dpi"] = int(self.batch_dpi.get())
+            self.controller.batch(self.batch_source, op, params)
+
+        ctk.CTkButton(card.inner, text="Procesar lote", command=run_batch).pack(anchor="w", pady=20)
+
+    def _build_perf_view(self, parent):
+        card = GlassCard(parent, "Últimos trabajos")
+        card.pack(fill="both", expand=True)
+
+        self.perf_text = ctk.CTkTextbox(card.inner, height=320, font=ctk.CTkFont(family="Courier", size=12))
+        self.perf_text.pack(fill="both", expand=True, pady=10)
+
+        row = ctk.CTkFrame(card.inner, fg_color="transparent")
+        row.pack(fill="x")
+        ctk.CTkButton(row, text="Actualizar", command=self._refresh_perf).pack(side="left")
+
+        def toggle_profile():
+            self.controller.profile = bool(profile_switch.get())
+        profile_switch = ctk.CTkSwitch(row, text="Perfilar trabajos (cProfile)", command=toggle_profile)
+        profile_switch.pack(side="left", padx=20)
+
+    def _refresh_perf(self):
+        lines = []
+        for r in self.controller.last_jobs():
+            mb = lambda b: f"{(b or 0) / (1024 * 1024):.1f}"
+            lines.append(f"{r.get('ts', '')}  {r.get('op', '?'):<22} {r.get('status', ''):<9} {r.get('seconds', 0):>8.2f} s"
+                         f"  {mb(r.get('bytes_in'))} → {mb(r.get('bytes_out'))} MB  pico {r.get('peak_rss_mb', 0)} MB"
+                         + (" (proceso)" if r.get("peak_scope") == "process" else ""))
+            phases = r.get("phases") or {}
+            if phases:
+                lines.append("    " + "  ".join(f"{k} {v['seconds']:.2f}s×{v['count']}" for k, v in phases.items()))
+            if r.get("error"):
+                lines.append(f"    {r['error']}")
+            if (r.get("profile") or {}).get("file"):
+                lines.append(f"    perfil: {r['profile']['file']}")
+        self.perf_text.configure(state="normal")
+        self.perf_text.delete("1.0", "end")
+        self.perf_text.insert("end", "\n".join(lines) or "Sin trabajos registrados todavía")
+        self.perf_text.configure(state="disabled")
 
 if __name__ == "__main__":
     # Test run
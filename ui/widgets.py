@@ -1,17 +1,35 @@
 # -*- coding: utf-8 -*-
+import importlib.util
+import os
+import queue
+import threading
 import tkinter as tk
 import customtkinter as ctk
 from tkinter import filedialog
 
-# Drag & Drop support
-SUPPORTS_DND = False
-try:
-    from tkinterdnd2 import DND_FILES, TkinterDnD
-    # Para usar DnD con CustomTkinter, se suele requerir una clase base mixta o inicialización específica.
-    # Aquí asumimos que la raíz (main_view) manejará la inicialización de DnD.
-    SUPPORTS_DND = True
-except Exception:
-    DND_FILES = None
+# Drag & Drop support: tkinterdnd2 y la extensión tkdnd de Tcl se cargan tras
+# el primer dibujado (enable_dnd); las áreas creadas antes esperan en _dnd_pending
+SUPPORTS_DND = importlib.util.find_spec("tkinterdnd2") is not None
+DND_FILES = "DND_Files"
+_dnd_ready = False
+_dnd_pending = []
+
+def enable_dnd(root) -> bool:
+    """Carga tkdnd en la ventana raíz y registra las áreas de arrastre ya creadas."""
+    global _dnd_ready
+    if _dnd_ready or not SUPPORTS_DND:
+        return _dnd_ready
+    try:
+        from tkinterdnd2 import TkinterDnD
+        root.TkdndVersion = TkinterDnD._require(root)
+        _dnd_ready = True
+    except Exception:
+        pass
+    for area in _dnd_pending:
+        if _dnd_ready and area.winfo_exists():
+            area._register_dnd()
+    _dnd_pending.clear()
+    return _dnd_ready
 
 class GlassCard(ctk.CTkFrame):
     """Contenedor con estilo moderno y bordes redondeados."""
@@ -54,17 +72,21 @@ class DropArea(ctk.CTkFrame):
         )
         self.btn.pack(pady=(0, 15))
 
-        # Configurar Drag & Drop
-        if SUPPORTS_DND:
-            # Intentamos registrar el frame para DnD
-            # Nota: Esto puede fallar si 'master' no es una ventana TkinterDnD válida,
-            # pero lo intentamos de forma segura.
-            try:
-                self.drop_target_register(DND_FILES)
-                self.dnd_bind("<<Drop>>", self._on_drop)
-                self.lbl.configure(text=f"{title}\n(Drag & Drop disponible)")
-            except Exception:
-                pass
+        # Configurar Drag & Drop (ahora o cuando la raíz cargue tkdnd)
+        self._title = title
+        if _dnd_ready:
+            self._register_dnd()
+        elif SUPPORTS_DND:
+            _dnd_pending.append(self)
+
+    def _register_dnd(self):
+        # Nota: esto puede fallar si la raíz no cargó tkdnd; lo intentamos de forma segura
+        try:
+            self.drop_target_register(DND_FILES)
+            self.dnd_bind("<<Drop>>", self._on_drop)
+            self.lbl.configure(text=f"{self._title}\n(Drag & Drop disponible)")
+        except Exception:
+            pass
 
     def _open_dialog(self):
         if self.multiple:
@@ -78,22 +100,255 @@ class DropArea(ctk.CTkFrame):
         data = event.data
         if not data: return
         
-        # Parseo simple de rutas de tkinterdnd2 (maneja {} para rutas con espacios)
-        paths, curr, in_brace = [], "", False
-        for ch in data:
-            if ch == "{":
-                in_brace, curr = True, ""
-            elif ch == "}":
-                in_brace = False
-                if curr: paths.append(curr); curr = ""
-            elif ch == " " and not in_brace:
-                if curr: paths.append(curr); curr = ""
-            else:
-                curr += ch
-        if curr: paths.append(curr)
+        # tkinterdnd2 entrega una lista Tcl (rutas con espacios entre {}): la separa Tcl en C
+        paths = list(self.tk.splitlist(data))
 
         if not self.multiple and paths:
             paths = [paths[0]]
             
         if paths:
             self.on_files(paths)
+
+class ThumbnailStrip(ctk.CTkFrame):
+    """Tira horizontal de miniaturas: solo crea las celdas visibles y las pide en segundo plano."""
+    CELL = 210
+    MARGIN = 2  # celdas extra a cada lado de la zona visible
+
+    def __init__(self, master, cache, height=320):
+        super().__init__(master, fg_color="transparent")
+        self.cache = cache
+        self.path = None
+        self.count = 0
+        self.height = height
+        self._drawn = {}   # página -> PhotoImage (o None mientras carga)
+        self._refresh_pending = False
+
+        self.canvas = tk.Canvas(self, height=height, bg="#2b2b2b", highlightthickness=0)
+        self.canvas.pack(fill="x")
+        self.scroll = ctk.CTkScrollbar(self, orientation="horizontal", command=self._on_scroll)
+        self.scroll.pack(fill="x")
+        self.canvas.configure(xscrollcommand=self._on_view_change)
+        self.canvas.bind("<Configure>", lambda e: self._schedule_refresh())
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.xview_scroll(-1 if e.delta > 0 else 1, "units"))
+
+    def set_file(self, path):
+        if path == self.path:
+            return
+        if self.path:
+            self.cache.forget_pending(self.path)
+        self.path, self.count = path, 0
+        self._drawn.clear()
+        self.canvas.delete("all")
+        self.canvas.xview_moveto(0)
+        if not path or not os.path.isfile(path):
+            return
+        # Abrir el documento puede tardar: el conteo se hace fuera del hilo de Tk
+        def count():
+            try:
+                n = self.cache.page_count(path)
+            except Exception:
+                n = 0
+            self.after(0, lambda: self._layout(path, n))
+        threading.Thread(target=count, daemon=True).start()
+
+    def _layout(self, path, count):
+        if path != self.path:
+            return
+        self.count = count
+        self.canvas.configure(scrollregion=(0, 0, count * self.CELL, self.height))
+        self._schedule_refresh()
+
+    def _on_scroll(self, *args):
+        self.canvas.xview(*args)
+
+    def _on_view_change(self, first, last):
+        self.scroll.set(first, last)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self._refresh)
+
+    def _refresh(self):
+        self._refresh_pending = False
+        if not self.count:
+            return
+        left = self.canvas.canvasx(0)
+        right = left + self.canvas.winfo_width()
+        first = max(0, int(left // self.CELL) - self.MARGIN)
+        last = min(self.count - 1, int(right // self.CELL) + self.MARGIN)
+        visible = range(first, last + 1)
+        for page in [p for p in self._drawn if p not in visible]:
+            self.canvas.delete(f"p{page}")
+            del self._drawn[page]
+        missing = [p for p in visible if p not in self._drawn]
+        for page in missing:
+            x = page * self.CELL
+            self.canvas.create_rectangle(x + 5, 5, x + self.CELL - 5, self.height - 25, outline="gray40", tags=f"p{page}")
+            self.canvas.create_text(x + self.CELL // 2, self.height - 12, text=str(page + 1), fill="gray70", tags=f"p{page}")
+            self._drawn[page] = None
+        if missing:
+            path = self.path
+            self.cache.request(path, missing, lambda p, page, data: self.after(0, self._show, p, page, data))
+
+    def _show(self, path, page, data):
+        if path != self.path or page not in self._drawn:
+            return
+        img = tk.PhotoImage(data=data)
+        self._drawn[page] = img  # referencia viva mientras la celda exista
+        self.canvas.create_image(page * self.CELL + self.CELL // 2, (self.height - 20) // 2, image=img, tags=f"p{page}")
+
+class VirtualFileList(ctk.CTkFrame):
+    """Lista de archivos virtualizada: dibuja solo las filas visibles y carga metadatos en segundo plano."""
+    ROW = 22
+    FLUSH_MS = 150  # cada cuánto se vuelcan los metadatos nuevos a la vista
+
+    def __init__(self, master, info=None, on_change=None):
+        super().__init__(master, fg_color="transparent")
+        self.info = info
+        self.on_change = on_change or (lambda lst: None)
+        self.items = []
+        self.meta = {}        # ruta -> {"pages", "bytes"} (o {} si falló)
+        self.selected = None
+        self._rows = {}       # índice -> ids del canvas
+        self._queue = queue.Queue()
+        self._arrived = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._flush_scheduled = self._refresh_pending = False
+
+        self.canvas = tk.Canvas(self, bg="#2b2b2b", highlightthickness=0)
+        self.scroll = ctk.CTkScrollbar(self, command=self.canvas.yview)
+        self.scroll.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.configure(yscrollcommand=self._on_view_change)
+        self.canvas.bind("<Configure>", lambda e: self._redraw())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Delete>", lambda e: self.remove_selected())
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+
+    # ---- Modelo ----
+    def extend(self, paths):
+        if not paths:
+            return
+        self.items.extend(paths)
+        if self.info:
+            for p in paths:
+                if p not in self.meta:
+                    self._queue.put(p)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._meta_worker, daemon=True)
+                self._thread.start()
+        self._update_region()
+        self.on_change(self)
+
+    def clear(self):
+        self.items = []
+        self.selected = None
+        self._redraw()
+        self.on_change(self)
+
+    def remove_selected(self):
+        if self.selected is None or self.selected >= len(self.items):
+            return
+        del self.items[self.selected]
+        self.selected = None
+        self._redraw()
+        self.on_change(self)
+
+    def totals(self):
+        """(archivos, páginas conocidas, bytes conocidos, archivos aún sin metadatos)."""
+        pages = size = pending = 0
+        for p in self.items:
+            m = self.meta.get(p)
+            if m is None:
+                pending += 1
+            else:
+                pages += m.get("pages") or 0
+                size += m.get("bytes") or 0
+        return len(self.items), pages, size, pending
+
+    # ---- Metadatos en segundo plano ----
+    def _meta_worker(self):
+        while True:
+            path = self._queue.get()
+            try:
+                m = self.info(path)
+            except Exception:
+                m = {}
+            with self._lock:
+                self._arrived.append((path, m))
+                schedule = not self._flush_scheduled
+                self._flush_scheduled = True
+            if schedule:
+                self.after(self.FLUSH_MS, self._flush_meta)
+
+    def _flush_meta(self):
+        with self._lock:
+            arrived, self._arrived = self._arrived, []
+            self._flush_scheduled = False
+        self.meta.update(arrived)
+        for i in self._rows:
+            self._draw_meta(i)
+        self.on_change(self)
+
+    # ---- Vista ----
+    def _update_region(self):
+        self.canvas.configure(scrollregion=(0, 0, 1, len(self.items) * self.ROW))
+        self._schedule_refresh()
+
+    def _on_view_change(self, first, last):
+        self.scroll.set(first, last)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self._refresh)
+
+    def _redraw(self):
+        self.canvas.delete("row")
+        self._rows.clear()
+        self._update_region()
+
+    def _refresh(self):
+        self._refresh_pending = False
+        top = self.canvas.canvasy(0)
+        first = max(0, int(top // self.ROW))
+        last = min(len(self.items), int((top + self.canvas.winfo_height()) // self.ROW) + 2)
+        for i in [i for i in self._rows if not first <= i < last]:
+            for item in self._rows.pop(i):
+                self.canvas.delete(item)
+        width = self.canvas.winfo_width()
+        for i in range(first, last):
+            if i in self._rows:
+                continue
+            y = i * self.ROW
+            bg = self.canvas.create_rectangle(0, y, width, y + self.ROW, width=0,
+                                              fill="#3b82f6" if i == self.selected else "", tags="row")
+            name = self.canvas.create_text(8, y + self.ROW // 2, anchor="w", fill="white",
+                                           text=os.path.basename(self.items[i]), tags="row")
+            meta = self.canvas.create_text(width - 8, y + self.ROW // 2, anchor="e", fill="gray70", text="", tags="row")
+            self._rows[i] = (bg, name, meta)
+            self._draw_meta(i)
+
+    def _draw_meta(self, i):
+        m = self.meta.get(self.items[i]) if i < len(self.items) else None
+        if m is None:
+            text = "…" if self.info else ""
+        elif not m:
+            text = "error"
+        else:
+            pages = m["pages"] if m.get("pages") is not None else "?"
+            text = f"{pages} pág · {m['bytes'] / (1024 * 1024):.1f} MB" + (" · protegido" if m.get("encrypted") else "")
+        self.canvas.itemconfigure(self._rows[i][2], text=text)
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        i = int(self.canvas.canvasy(event.y) // self.ROW)
+        if i < len(self.items):
+            old, self.selected = self.selected, i
+            for j in (old, i):
+                if j in self._rows:
+                    self.canvas.itemconfigure(self._rows[j][0], fill="#3b82f6" if j == i else "")